@@ -0,0 +1,263 @@
+# Línea de comandos de Agropath, sin menú interactivo.
+#
+# Permite correr desde un programador de tareas (cron, CI...) lo mismo que el
+# menú: construir los mapas, calcular rutas, ajustar la regresión de
+# producción y calcular costos de un archivo de distancias. Los resultados se
+# escriben en JSON o CSV (en la salida estándar o en un archivo) y los
+# mensajes de avance van a la salida de errores, así la salida se puede leer
+# directamente con otro programa. Cada invocación es independiente, de modo
+# que se pueden lanzar varias en paralelo.
+#
+# Códigos de salida: 0 todo bien, 1 error, 2 argumentos inválidos,
+# 3 resultado parcial (algunas rutas o mapas fallaron).
+#
+# Uso: python src/agropath.py [--formato json|csv] [--resultado ARCHIVO] [--enrutador grafo] <comando> ...
+#   python src/agropath.py mapas [artefactos...] [--salida docs] [--forzar] [--hilos N]
+#   python src/agropath.py rutas [--fincas] [--puerto] [--pares pares.csv] [--geometria]
+#   python src/agropath.py regresion [--grafica regresion.svg]
+#   python src/agropath.py costos --archivo distancias.csv [--combustible ...]
+
+import argparse
+import contextlib
+import csv
+import json
+import math
+import os
+import sys
+
+EXITO = 0
+ERROR = 1
+USO = 2
+PARCIAL = 3
+
+
+class ArgumentoInvalido(ValueError):
+    """Argumentos que argparse no puede revisar solo (por ejemplo, nombres de artefactos); sale con USO."""
+
+
+def _estado_de_salida(filas, fallo):
+    """PARCIAL si falló alguna fila, ERROR si fallaron todas."""
+    fallidas = sum(1 for fila in filas if fallo(fila))
+    if fallidas == 0:
+        return EXITO
+    return ERROR if fallidas == len(filas) else PARCIAL
+
+
+def comando_mapas(args):
+    """Construye los mapas de docs/ (ver construir_todo.py); una fila por artefacto."""
+    import construir_todo
+
+    grafo = construir_todo.artefactos()
+    try:
+        construir_todo.validar_seleccion(args.artefactos, grafo)
+    except ValueError as error:
+        raise ArgumentoInvalido(str(error)) from None
+
+    estados = construir_todo.construir(args.salida, args.forzar, args.hilos, args.artefactos or None)
+    filas = [
+        {
+            "artefacto": nombre,
+            "estado": estado,
+            "archivo": os.path.abspath(os.path.join(args.salida, grafo[nombre].salida))
+            if grafo[nombre].salida else None,
+        }
+        for nombre, estado in estados.items()
+    ]
+    return filas, _estado_de_salida(filas, lambda fila: fila["estado"].startswith("error"))
+
+
+# Columnas del CSV de pares origen-destino ("nombre" es opcional).
+COLUMNAS_PARES = ("origen_lat", "origen_lon", "destino_lat", "destino_lon")
+
+
+def _leer_pares(ruta):
+    """
+    Lee pares origen-destino de un CSV con encabezado: columnas origen_lat,
+    origen_lon, destino_lat, destino_lon y, opcionalmente, nombre (las demás
+    columnas se ignoran).
+
+    Lanza ValueError si faltan columnas, o si una fila tiene una coordenada
+    vacía, no numérica o fuera de rango.
+    """
+    with open(ruta, newline="", encoding="utf-8") as archivo:
+        lector = csv.DictReader(archivo)
+        faltan = [c for c in COLUMNAS_PARES if c not in (lector.fieldnames or ())]
+        if faltan:
+            raise ValueError(f"{ruta}: faltan las columnas {', '.join(faltan)}")
+
+        pares = []
+        for n, fila in enumerate(lector, start=2):
+            try:
+                lat_o, lon_o, lat_d, lon_d = (float(fila[c]) for c in COLUMNAS_PARES)
+            except (TypeError, ValueError):
+                raise ValueError(f"{ruta}, fila {n}: coordenadas inválidas") from None
+            if not all(math.isfinite(v) for v in (lat_o, lon_o, lat_d, lon_d)) \
+                    or abs(lat_o) > 90 or abs(lat_d) > 90 or abs(lon_o) > 180 or abs(lon_d) > 180:
+                raise ValueError(f"{ruta}, fila {n}: coordenadas fuera de rango")
+            nombre = (fila.get("nombre") or "").strip() or f"par {len(pares) + 1}"
+            pares.append((nombre, (lat_o, lon_o), (lat_d, lon_d)))
+    return pares
+
+
+def comando_rutas(args):
+    """Calcula rutas con el enrutador elegido; una fila por ruta (distancia, puntos o error)."""
+    from registro_ubicaciones import cargar_ubicaciones
+    from rutas_osrm import obtener_rutas_lote
+
+    pares = []
+    if args.pares:
+        pares += _leer_pares(args.pares)
+    if args.fincas or args.puerto or not args.pares:
+        registro = cargar_ubicaciones()
+        acopio = registro.acopio.punto
+        if args.fincas or not (args.puerto or args.pares):
+            pares += [(f["nombre"], f.punto, acopio) for f in registro.fincas]
+        if args.puerto:
+            pares.append((registro.puerto["nombre"], acopio, registro.puerto.punto))
+
+    resultados = obtener_rutas_lote([(origen, destino) for _, origen, destino in pares],
+                                    usar_cache=not args.sin_cache)
+    filas = []
+    for (nombre, origen, destino), (resultado, error) in zip(pares, resultados):
+        fila = {
+            "nombre": nombre,
+            "origen_lat": origen[0], "origen_lon": origen[1],
+            "destino_lat": destino[0], "destino_lon": destino[1],
+            "distancia_km": None, "puntos": None, "error": None,
+        }
+        if error is not None:
+            fila["error"] = str(error)
+        else:
+            puntos, distancia_m = resultado
+            fila["distancia_km"] = round(distancia_m / 1000, 3)
+            fila["puntos"] = len(puntos)
+            if args.geometria:
+                fila["geometria"] = [list(p) for p in puntos]
+        filas.append(fila)
+    return filas, _estado_de_salida(filas, lambda fila: fila["error"] is not None)
+
+
+def comando_regresion(args):
+    """Ajusta la regresión de producción; una sola fila con los números del ajuste."""
+    from analisis_produccion import ajuste_produccion
+
+    X, y, y_pred, ajuste = ajuste_produccion()
+    if args.grafica:
+        from graficas import guardar_grafica
+
+        guardar_grafica(args.grafica, X, y, y_pred)
+    return [{**ajuste, "archivo": args.grafica}], EXITO
+
+
+def comando_costos(args):
+    """Costos por tonelada de una lista de distancias (ver calculadora.py); una fila por combinación."""
+    from calculadora import costos_de_argumentos, validar_argumentos_costos
+
+    try:
+        validar_argumentos_costos(args)
+    except ValueError as error:
+        raise ArgumentoInvalido(str(error)) from None
+    return costos_de_argumentos(args), EXITO
+
+
+def _sin_nan(valor):
+    # NaN e infinito no son JSON válido: se escriben como null.
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    if isinstance(valor, dict):
+        return {k: _sin_nan(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_sin_nan(v) for v in valor]
+    return valor
+
+
+def escribir_filas(filas, formato, destino):
+    """Escribe las filas (lista de diccionarios) en JSON o CSV."""
+    if formato == "json":
+        json.dump(_sin_nan(filas), destino, indent=2, ensure_ascii=False, allow_nan=False)
+        destino.write("\n")
+        return
+
+    # En CSV las columnas son la unión de las claves de todas las filas; las
+    # listas (por ejemplo la geometría) se escriben como JSON dentro de la celda.
+    columnas = list(dict.fromkeys(clave for fila in filas for clave in fila))
+    escritor = csv.DictWriter(destino, fieldnames=columnas, lineterminator="\n")
+    escritor.writeheader()
+    for fila in filas:
+        escritor.writerow({k: json.dumps(v) if isinstance(v, (list, dict)) else v for k, v in fila.items()})
+
+
+def crear_parser():
+    from calculadora import agregar_argumentos_costos
+    from construir_todo import DIRECTORIO_DOCS, entero_positivo
+
+    parser = argparse.ArgumentParser(
+        prog="agropath", description="Agropath sin menú: mapas, rutas, regresión y costos para ejecución desatendida.",
+    )
+    parser.add_argument("--formato", choices=("json", "csv"), default="json", help="formato de los resultados")
+    parser.add_argument("--resultado", metavar="ARCHIVO",
+                        help="escribir los resultados en ARCHIVO en vez de la salida estándar")
+    parser.add_argument("--enrutador", choices=("osrm", "local", "grafo"),
+                        help="de dónde salen las rutas de los comandos mapas y rutas (ver enrutadores.py)")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    mapas = subparsers.add_parser("mapas", help="construir los mapas HTML")
+    mapas.add_argument("artefactos", nargs="*", help="artefactos a construir (por defecto todos)")
+    mapas.add_argument("--salida", default=DIRECTORIO_DOCS, help="carpeta de salida (por defecto docs/)")
+    mapas.add_argument("--forzar", action="store_true", help="reconstruir aunque las entradas no hayan cambiado")
+    mapas.add_argument("--hilos", type=entero_positivo, default=4, help="artefactos construidos en paralelo")
+    mapas.set_defaults(ejecutar=comando_mapas)
+
+    rutas = subparsers.add_parser("rutas", help="calcular rutas y distancias")
+    rutas.add_argument("--fincas", action="store_true",
+                       help="rutas de cada finca al centro de acopio (por defecto si no se indica otra cosa)")
+    rutas.add_argument("--puerto", action="store_true", help="ruta del centro de acopio al puerto")
+    rutas.add_argument("--pares", metavar="CSV", help="CSV con origen_lat,origen_lon,destino_lat,destino_lon[,nombre]")
+    rutas.add_argument("--geometria", action="store_true", help="incluir los puntos de cada ruta")
+    rutas.add_argument("--sin-cache", action="store_true", help="no usar la cache de rutas")
+    rutas.set_defaults(ejecutar=comando_rutas)
+
+    regresion = subparsers.add_parser("regresion", help="ajustar la regresión de producción anual")
+    regresion.add_argument("--grafica", metavar="ARCHIVO", help="guardar también la gráfica (.svg o .png)")
+    regresion.set_defaults(ejecutar=comando_regresion)
+
+    costos = subparsers.add_parser("costos", help="costos por tonelada de un lote de distancias")
+    agregar_argumentos_costos(costos)
+    costos.set_defaults(ejecutar=comando_costos)
+    return parser
+
+
+def main(argv=None):
+    """
+    Ejecuta un comando y escribe sus resultados.
+
+    Retorna:
+        El código de salida (EXITO, ERROR o PARCIAL; argparse sale con USO).
+    """
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+
+    # Los mensajes de avance de los módulos (print) van a stderr para no
+    # mezclarse con los resultados.
+    try:
+        if args.enrutador:
+            from enrutadores import configurar_enrutador, crear_enrutador
+
+            configurar_enrutador(crear_enrutador(args.enrutador))
+        with contextlib.redirect_stdout(sys.stderr):
+            filas, codigo = args.ejecutar(args)
+        if args.resultado:
+            with open(args.resultado, "w", newline="", encoding="utf-8") as destino:
+                escribir_filas(filas, args.formato, destino)
+        else:
+            escribir_filas(filas, args.formato, sys.stdout)
+    except ArgumentoInvalido as error:
+        parser.error(str(error))  # sale con USO
+    except (OSError, ValueError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return ERROR
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
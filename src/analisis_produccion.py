@@ -1,64 +1,94 @@
-import matplotlib.pyplot as plt
-import pandas as pd
-from sklearn.linear_model import LinearRegression
+import numpy as np
 
-def regresion_produccion():
-    try:
-        # Se intenta cargar el archivo CSV que contiene los datos de producción de soya.
-        # Si no existe, se captura el error.
-        dataset_soya = pd.read_csv(r'dataset\Soy.csv')
-    except FileNotFoundError:
-        print("Error: No se encontro el archivo.")
-    else:
-        # Filtrar solo las filas donde la columna "Attribute_Desc" sea "Total storage".
-        # Esto limpia el dataset para quedarnos solo con la información relevante.
-        dataset_soya = dataset_soya[dataset_soya["Attribute_Desc"] == "Total storage"]
+from consultas_soya import TABLA_EXISTENCIAS
+from graficas import dibujar_regresion, guardar_grafica
+from pronosticos import modelo_soya
+
+
+def ajuste_produccion():
+    """
+    Ajusta la recta de regresión de la producción anual (existencias totales).
 
-        # La columna "Marketing_Year" tiene años en formato "YYYY/YY".
-        # Se extrae el primer año, se convierte a entero y se usa como columna "Year".
-        dataset_soya["Year"] = (
-            dataset_soya["Marketing_Year"]
-            .str.split("/")     # Separa por "/" 
-            .str[0]             # Se toma la parte del año inicial
-            .astype(int)        # Se convierte a número entero
-        )
+    Retorna:
+        X, y, y_pred, ajuste: años, producción real y estimada (millones de
+        bushels) y un diccionario con los números del ajuste ("pendiente" en
+        millones de bushels por año, "ultimo_año" y "prediccion_siguiente"
+        para el año siguiente).
 
-        # Agrupar por año y obtener el promedio de "Amount".
-        # Esto construye un dataset anual resumido.
-        dataset_soya_yearly = dataset_soya.groupby("Year", as_index=False)["Amount"].mean()
+    Lanza FileNotFoundError si no se encuentra el CSV de producción.
+    """
+    # modelo_soya() ajusta de una sola vez la tendencia lineal de todas las series
+    # del dataset (y guarda los coeficientes en la cache, así que si el CSV no
+    # cambió no se vuelve a ajustar nada).
+    años, series, modelo = modelo_soya()
 
-        # Convertir las cantidades a millones de "bushels"
-        # Dividiendo entre 1000 para hacer la escala más legible.
-        dataset_soya_yearly["Millions_bushels"] = dataset_soya_yearly["Amount"] / 1000
+    # Serie de "Total storage" (existencias totales, tabla 1): promedio anual
+    # de los cuatro trimestres, solo en los años que tienen dato.
+    i = modelo.indice(TABLA_EXISTENCIAS, "Total storage")
+    con_datos = ~np.isnan(series[:, i])
 
-        # X es la variable independiente (año), y es la variable dependiente (producción).
-        X = dataset_soya_yearly[["Year"]]               # Debe ser un DataFrame (2D)
-        y = dataset_soya_yearly["Millions_bushels"]     # Serie (1D)
+    # X es la variable independiente (año), y es la variable dependiente (producción).
+    # Las cantidades se dividen entre 1000 para verlas en millones de "bushels".
+    X = años[con_datos]
+    y = series[con_datos, i] / 1000
 
-        # Crear el modelo de regresión lineal.
-        modelo_regresion = LinearRegression()
+    # Valores estimados por la recta de regresión en esos mismos años.
+    y_pred = modelo.predecir(X)[0][:, i] / 1000
 
-        # Ajustar el modelo con los datos.
-        modelo_regresion.fit(X, y)
+    # Números del ajuste: pendiente de la recta y estimación del año siguiente.
+    siguiente = modelo.predecir(np.array([X[-1] + 1]))[0][0, i] / 1000
+    ajuste = {
+        "pendiente": float((y_pred[-1] - y_pred[0]) / (X[-1] - X[0])) if len(X) > 1 else 0.0,
+        "ultimo_año": int(X[-1]),
+        "prediccion_siguiente": float(siguiente),
+    }
+    return X, y, y_pred, ajuste
 
-        # Predecir los valores estimados por el modelo.
-        y_pred = modelo_regresion.predict(X)
 
-        # Graficar la recta de regresión.
-        plt.plot(X, y_pred, color='blue')
+def regresion_produccion(archivo=None, progreso=None):
+    """
+    Grafica la producción anual (existencias totales) y su recta de regresión.
 
-        # Etiquetas de los ejes.
-        plt.xlabel("Year")
-        plt.ylabel("Millions_bushels")
+    Parámetros:
+        archivo: si se indica (por ejemplo "regresion_soya.svg" o ".png"), la
+            gráfica se guarda ahí sin abrir ninguna ventana, lo que permite
+            usarla en servidores sin pantalla. Si es None se muestra en pantalla.
+        progreso: Trabajo de trabajos.py cuando se ejecuta en segundo plano
+            (recibe el avance y los mensajes, y permite cancelar).
+
+    Retorna:
+        Los números de ajuste_produccion() más "archivo"; None si no se
+        encontró el CSV.
+    """
+    avisar = print if progreso is None else progreso.anotar
+    if progreso is not None:
+        progreso(0, 3, "Ajustando modelo")
+    try:
+        # Se intenta cargar el archivo CSV que contiene los datos de producción de soya.
+        # Si no existe, se captura el error.
+        X, y, y_pred, ajuste = ajuste_produccion()
+    except FileNotFoundError:
+        avisar("Error: No se encontro el archivo.")
+    else:
+        ajuste["archivo"] = archivo
+        if progreso is not None:
+            progreso(1, 3, "Dibujando gráfica")
 
-        # Se desactiva la grilla para una visualización más limpia.
-        plt.grid(False)
+        if archivo is not None:
+            # Modo sin interfaz: figura explícita sobre el lienzo Agg, escrita directo a disco.
+            guardar_grafica(archivo, X, y, y_pred)
+            avisar(f"Gráfica guardada en {archivo}")
+            if progreso is not None:
+                progreso(3, 3)
+            return ajuste
 
-        # Graficar los puntos reales.
-        plt.scatter(X, y)
+        # Modo interactivo: pyplot solo se importa aquí, porque elige un backend con ventana.
+        import matplotlib.pyplot as plt
 
-        # Dibujar nuevamente la línea de regresión en rojo por encima de los puntos.
-        plt.plot(X, y_pred, color='red')
+        # Se grafican los puntos reales y, encima, la recta de regresión en rojo.
+        fig = plt.figure()
+        dibujar_regresion(fig.gca(), X, y, y_pred)
 
         # Mostrar la gráfica final.
-        plt.show()
\ No newline at end of file
+        plt.show()
+        return ajuste
@@ -0,0 +1,281 @@
+import numpy as np
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from calculadora import calcular_costo_total_soya, calcular_costos_lote
+from matriz_distancias import matriz_distancias
+
+# Toneladas por finca cuando la lista de fincas no trae el dato.
+TONELADAS_POR_DEFECTO = 1.0
+
+
+def _coordenadas(puntos):
+    return np.array([(p["lat"], p["lon"]) for p in puntos], dtype=np.float64).reshape(-1, 2)
+
+
+def _columna(puntos, clave, por_defecto):
+    return np.array([p.get(clave, por_defecto) for p in puntos], dtype=np.float64)
+
+
+def matrices_distancia(fincas, centros, puertos, fuente="auto"):
+    """
+    Distancias por carretera (km) finca → centro y centro → puerto.
+
+    Parámetros:
+        fincas, centros, puertos: listas de diccionarios con "lat" y "lon".
+        fuente: "auto", "osrm" o "geodesica" (ver matriz_distancias.py).
+
+    Retorna:
+        km_fc: arreglo (fincas, centros).
+        km_cp: arreglo (centros, puertos).
+    """
+    centros_xy = _coordenadas(centros)
+    km_fc = matriz_distancias(_coordenadas(fincas), centros_xy, fuente=fuente)[0] / 1000
+    km_cp = matriz_distancias(centros_xy, _coordenadas(puertos), fuente=fuente)[0] / 1000
+    return km_fc, km_cp
+
+
+def asignar_voraz(km_fc, km_cp, toneladas=None, capacidad_centros=None):
+    """
+    Asignación voraz: cada finca va al centro con menor costo total
+    (finca → centro → mejor puerto) que todavía tenga capacidad.
+
+    Sin capacidades es un solo argmin vectorizado. Con capacidades, las
+    fincas se atienden primero según su "arrepentimiento" (diferencia entre
+    su segunda y su primera opción), que es lo que más pierden si se quedan
+    sin su centro preferido. No considera la capacidad de los puertos.
+
+    Retorna:
+        Diccionario con las mismas claves que asignar_optimo(); cada finca
+        se envía completa a un solo centro.
+    """
+    km_fc = np.asarray(km_fc, dtype=np.float64)
+    km_cp = np.asarray(km_cp, dtype=np.float64)
+    fincas, centros = km_fc.shape
+    toneladas = np.full(fincas, TONELADAS_POR_DEFECTO) if toneladas is None else np.asarray(toneladas, dtype=np.float64)
+
+    # El costo logístico es lineal en la distancia, así que el mejor puerto de
+    # cada centro es simplemente el más cercano.
+    puerto = np.argmin(np.where(np.isnan(km_cp), np.inf, km_cp), axis=1)
+    km_total = km_fc + km_cp[np.arange(centros), puerto][None, :]
+    km_total = np.where(np.isnan(km_total), np.inf, km_total)
+
+    if capacidad_centros is None:
+        centro = np.argmin(km_total, axis=1)
+    else:
+        restante = np.asarray(capacidad_centros, dtype=np.float64).copy()
+        ordenados = np.sort(km_total, axis=1)
+        arrepentimiento = ordenados[:, 1] - ordenados[:, 0] if centros > 1 else np.zeros(fincas)
+        centro = np.full(fincas, -1, dtype=np.int64)
+        for f in np.argsort(-np.nan_to_num(arrepentimiento, posinf=np.finfo(float).max)):
+            costos = np.where(restante >= toneladas[f], km_total[f], np.inf)
+            c = int(np.argmin(costos))
+            if np.isfinite(costos[c]):
+                centro[f] = c
+                restante[c] -= toneladas[f]
+
+    # Las fincas sin ninguna ruta (o sin centro con capacidad) quedan sin asignar.
+    filas = np.arange(fincas)
+    centro = np.where((centro >= 0) & np.isfinite(km_total[filas, np.maximum(centro, 0)]), centro, -1)
+    asignadas = centro >= 0
+
+    flujo_fc = np.zeros((fincas, centros))
+    flujo_fc[np.flatnonzero(asignadas), centro[asignadas]] = toneladas[asignadas]
+    flujo_cp = np.zeros((centros, km_cp.shape[1]))
+    np.add.at(flujo_cp, (np.arange(centros), puerto), flujo_fc.sum(axis=0))
+    return _resultado(km_fc, km_cp, flujo_fc, flujo_cp, toneladas)
+
+
+def asignar_optimo(km_fc, km_cp, toneladas=None, capacidad_centros=None, capacidad_puertos=None,
+                   costo_apertura=None):
+    """
+    Asignación de costo mínimo finca → centro → puerto (flujo de costo mínimo).
+
+    Se resuelve como programa lineal con HiGHS (scipy.optimize.milp):
+        x[f, c] toneladas de la finca f al centro c,
+        y[c, p] toneladas del centro c al puerto p,
+    minimizando el costo logístico de calculadora.py, con
+        Σc x[f, c] = toneladas[f]                   (toda la cosecha sale)
+        Σf x[f, c] - Σp y[c, p] = 0                 (lo que entra al centro sale)
+        Σf x[f, c] ≤ capacidad_centros[c]
+        Σc y[c, p] ≤ capacidad_puertos[p]
+
+    Si se pasa `costo_apertura` (costo fijo de usar cada centro) se agrega
+    una variable binaria por centro y el problema pasa a ser de localización
+    de instalaciones (MILP): el modelo decide también qué centros abrir.
+
+    Parámetros:
+        km_fc, km_cp: distancias en km (NaN = sin ruta).
+        toneladas: toneladas de cada finca (por defecto 1).
+        capacidad_centros, capacidad_puertos: toneladas máximas; None = sin límite.
+        costo_apertura: costo fijo de abrir un centro, en las mismas unidades que
+            el costo total: un número (igual para todos) o uno por centro.
+
+    Retorna:
+        Diccionario con:
+            centro: centro principal de cada finca (el que recibe más toneladas; -1 si ninguno).
+            flujo_fc, flujo_cp: toneladas por par.
+            distancia_km: distancia media por tonelada de cada finca hasta el puerto.
+            costo_logistico_ton, costo_total_ton: por finca (calculadora.py).
+            costo_total: costo logístico total (más aperturas, si corresponde).
+            abiertos: arreglo booleano de centros usados.
+    Lanza ValueError si el problema no tiene solución (capacidad insuficiente).
+    """
+    km_fc = np.asarray(km_fc, dtype=np.float64)
+    km_cp = np.asarray(km_cp, dtype=np.float64)
+    fincas, centros = km_fc.shape
+    puertos = km_cp.shape[1]
+    toneladas = np.full(fincas, TONELADAS_POR_DEFECTO) if toneladas is None else np.asarray(toneladas, dtype=np.float64)
+    nx, ny = fincas * centros, centros * puertos
+    nz = centros if costo_apertura is not None else 0
+    # Un solo número es el mismo costo fijo para todos los centros.
+    apertura = np.broadcast_to(np.asarray(costo_apertura, dtype=np.float64), centros) if nz else np.empty(0)
+
+    # Costo por tonelada de cada arco; los pares sin ruta quedan con cota superior 0.
+    costo_fc = calcular_costos_lote(np.nan_to_num(km_fc))[1]
+    costo_cp = calcular_costos_lote(np.nan_to_num(km_cp))[1]
+    c = np.concatenate([costo_fc.ravel(), costo_cp.ravel(), apertura])
+    superior = np.concatenate([
+        np.where(np.isnan(km_fc), 0, np.inf).ravel(),
+        np.where(np.isnan(km_cp), 0, np.inf).ravel(),
+        np.ones(nz),
+    ])
+
+    # Índices de las variables: x[f, c] = f*C + c ; y[c, p] = nx + c*P + p ; z[c] = nx + ny + c
+    f_idx, c_idx = np.divmod(np.arange(nx), centros)
+    cy_idx, p_idx = np.divmod(np.arange(ny), puertos)
+    bloques, inferiores, superiores = [], [], []
+
+    # Oferta de cada finca.
+    bloques.append(sparse.csr_matrix((np.ones(nx), (f_idx, np.arange(nx))), shape=(fincas, nx + ny + nz)))
+    inferiores.append(toneladas)
+    superiores.append(toneladas)
+
+    # Conservación del flujo en cada centro.
+    filas = np.concatenate([c_idx, cy_idx])
+    columnas = np.concatenate([np.arange(nx), nx + np.arange(ny)])
+    valores = np.concatenate([np.ones(nx), -np.ones(ny)])
+    bloques.append(sparse.csr_matrix((valores, (filas, columnas)), shape=(centros, nx + ny + nz)))
+    inferiores.append(np.zeros(centros))
+    superiores.append(np.zeros(centros))
+
+    # Capacidad de los centros (multiplicada por z[c] si se decide qué centros abrir).
+    if capacidad_centros is not None or nz:
+        # Un centro nunca recibe más que la cosecha total; así tampoco quedan
+        # capacidades infinitas como coeficientes cuando se multiplican por z[c].
+        capacidad = np.full(centros, toneladas.sum())
+        if capacidad_centros is not None:
+            capacidad = np.minimum(capacidad, np.asarray(capacidad_centros, dtype=np.float64))
+        filas, columnas, valores = c_idx, np.arange(nx), np.ones(nx)
+        if nz:
+            filas = np.concatenate([filas, np.arange(centros)])
+            columnas = np.concatenate([columnas, nx + ny + np.arange(centros)])
+            valores = np.concatenate([valores, -capacidad])
+            limite = np.zeros(centros)
+        else:
+            limite = capacidad
+        bloques.append(sparse.csr_matrix((valores, (filas, columnas)), shape=(centros, nx + ny + nz)))
+        inferiores.append(np.full(centros, -np.inf))
+        superiores.append(limite)
+
+    # Capacidad de los puertos.
+    if capacidad_puertos is not None:
+        bloques.append(sparse.csr_matrix((np.ones(ny), (p_idx, nx + np.arange(ny))), shape=(puertos, nx + ny + nz)))
+        inferiores.append(np.full(puertos, -np.inf))
+        superiores.append(np.asarray(capacidad_puertos, dtype=np.float64))
+
+    restricciones = LinearConstraint(sparse.vstack(bloques).tocsr(), np.concatenate(inferiores), np.concatenate(superiores))
+    integralidad = np.concatenate([np.zeros(nx + ny), np.ones(nz)])
+    solucion = milp(c, constraints=restricciones, integrality=integralidad, bounds=Bounds(0, superior))
+    if solucion.x is None:
+        raise ValueError(f"No se encontró una asignación factible: {solucion.message}")
+
+    flujo_fc = solucion.x[:nx].reshape(fincas, centros)
+    flujo_cp = solucion.x[nx:nx + ny].reshape(centros, puertos)
+    resultado = _resultado(km_fc, km_cp, flujo_fc, flujo_cp, toneladas)
+    if nz:
+        resultado["costo_total"] += float(np.dot(apertura, solucion.x[nx + ny:].round()))
+    return resultado
+
+
+def _resultado(km_fc, km_cp, flujo_fc, flujo_cp, toneladas):
+    # Distancia media por tonelada de cada finca hasta el puerto: tramo finca → centro
+    # más el tramo centro → puerto promedio de lo que sale de ese centro.
+    entrada = flujo_cp.sum(axis=1)
+    km_salida = np.divide((flujo_cp * np.nan_to_num(km_cp)).sum(axis=1), entrada,
+                          out=np.zeros_like(entrada), where=entrada > 0)
+    enviadas = flujo_fc.sum(axis=1)
+    km_finca = np.divide((flujo_fc * (np.nan_to_num(km_fc) + km_salida[None, :])).sum(axis=1), enviadas,
+                         out=np.full_like(enviadas, np.nan), where=enviadas > 0)
+
+    costo_total_ton, costo_logistico_ton = calcular_costo_total_soya(km_finca)
+    centro = np.where(enviadas > 0, np.argmax(flujo_fc, axis=1), -1)
+    return {
+        "centro": centro,
+        "flujo_fc": flujo_fc,
+        "flujo_cp": flujo_cp,
+        "distancia_km": km_finca,
+        "costo_logistico_ton": costo_logistico_ton,
+        "costo_total_ton": costo_total_ton,
+        "costo_total": float(np.nansum(costo_logistico_ton * enviadas)),
+        "abiertos": flujo_fc.sum(axis=0) > 0,
+    }
+
+
+def asignar(fincas, centros, puertos, fuente="auto", metodo="optimo", **opciones):
+    """
+    Asigna cada finca a un centro de acopio y cada centro a un puerto.
+
+    Parámetros:
+        fincas: lista de diccionarios con "lat", "lon" y opcionalmente "toneladas".
+        centros: centros candidatos con "lat", "lon" y opcionalmente "capacidad".
+        puertos: puertos con "lat", "lon" y opcionalmente "capacidad".
+        fuente: origen de las distancias (ver matriz_distancias.py).
+        metodo: "optimo" (programa lineal) o "voraz" (rápido, aproximado).
+        opciones: se pasan a asignar_optimo() (por ejemplo costo_apertura).
+
+    Retorna:
+        El diccionario de asignar_optimo() / asignar_voraz().
+
+    Lanza ValueError si el método es "voraz" y se piden restricciones que no
+    considera (opciones o capacidad de los puertos): el resultado las ignoraría.
+    """
+    km_fc, km_cp = matrices_distancia(fincas, centros, puertos, fuente)
+    toneladas = _columna(fincas, "toneladas", TONELADAS_POR_DEFECTO)
+    capacidad_centros = _columna(centros, "capacidad", np.inf)
+    capacidad_puertos = _columna(puertos, "capacidad", np.inf)
+    capacidad_centros = None if np.all(np.isinf(capacidad_centros)) else capacidad_centros
+    capacidad_puertos = None if np.all(np.isinf(capacidad_puertos)) else capacidad_puertos
+
+    if metodo == "voraz":
+        ignoradas = sorted(opciones) + (["capacidad de los puertos"] if capacidad_puertos is not None else [])
+        if ignoradas:
+            raise ValueError(f"El método voraz no considera: {', '.join(ignoradas)}. Use metodo=\"optimo\".")
+        return asignar_voraz(km_fc, km_cp, toneladas, capacidad_centros)
+    if metodo == "optimo":
+        return asignar_optimo(km_fc, km_cp, toneladas, capacidad_centros, capacidad_puertos, **opciones)
+    raise ValueError(f"Método de asignación desconocido: {metodo}. Opciones: optimo, voraz")
+
+
+if __name__ == "__main__":
+    import time
+
+    # Ejemplo sintético: fincas y centros candidatos aleatorios en el centro de Illinois.
+    generador = np.random.default_rng(0)
+    fincas = [
+        {"lat": lat, "lon": lon, "toneladas": t}
+        for lat, lon, t in zip(generador.uniform(39.0, 41.5, 3000), generador.uniform(-90.5, -88.0, 3000),
+                               generador.uniform(50, 500, 3000))
+    ]
+    total = sum(f["toneladas"] for f in fincas)
+    centros = [
+        {"lat": lat, "lon": lon, "capacidad": total / 8}
+        for lat, lon in zip(generador.uniform(39.0, 41.5, 20), generador.uniform(-90.5, -88.0, 20))
+    ]
+    puertos = [{"lat": 38.61, "lon": -90.20}, {"lat": 41.64, "lon": -87.52}]
+
+    for metodo in ("voraz", "optimo"):
+        inicio = time.perf_counter()
+        resultado = asignar(fincas, centros, puertos, fuente="geodesica", metodo=metodo)
+        print(f"{metodo}: costo logístico ${resultado['costo_total']:,.0f} "
+              f"({resultado['abiertos'].sum()} centros usados) en {time.perf_counter() - inicio:.2f} s")
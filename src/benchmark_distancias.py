@@ -0,0 +1,65 @@
+# Benchmark de las distancias por tramo usadas por build_graph.
+#
+# Compara el bucle original con geopy.geodesic contra los modos vectorizados
+# de distancias.py, usando las rutas reales de OSRM que ya están guardadas
+# en docs/rutas_unificadas.html (entre 1 900 y 2 100 puntos por ruta).
+#
+# Uso: python src/benchmark_distancias.py [ruta_html] [repeticiones]
+
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+from geopy.distance import geodesic
+
+from distancias import longitudes_segmentos
+
+HTML_POR_DEFECTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docs", "rutas_unificadas.html")
+
+
+def cargar_rutas(ruta_html):
+    """Extrae las coordenadas de cada L.polyline del HTML generado por folium."""
+    with open(ruta_html, encoding="utf-8") as archivo:
+        contenido = archivo.read()
+    return [
+        [tuple(p) for p in json.loads(coincidencia)]
+        for coincidencia in re.findall(r"L\.polyline\(\s*(\[\[.*?\]\])", contenido, re.S)
+    ]
+
+
+def bucle_geodesic(route_points):
+    # Implementación original de build_graph: un geodesic() por tramo.
+    return [geodesic(route_points[i], route_points[i + 1]).meters for i in range(len(route_points) - 1)]
+
+
+def medir(funcion, rutas, repeticiones):
+    # Se toma el mejor tiempo de varias repeticiones para reducir el ruido.
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for ruta in rutas:
+            funcion(ruta)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+if __name__ == "__main__":
+    ruta_html = sys.argv[1] if len(sys.argv) > 1 else HTML_POR_DEFECTO
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    rutas = cargar_rutas(ruta_html)
+    puntos = [len(r) for r in rutas]
+    print(f"{len(rutas)} rutas, {sum(puntos)} puntos (entre {min(puntos)} y {max(puntos)} por ruta)\n")
+
+    referencia = np.concatenate([bucle_geodesic(r) for r in rutas])
+    t_base = medir(bucle_geodesic, rutas, repeticiones)
+    print(f"{'bucle geodesic':<16} {t_base*1000:9.2f} ms   1.0x")
+
+    for modo in ("karney", "vincenty", "haversine"):
+        t = medir(lambda r: longitudes_segmentos(r, modo), rutas, repeticiones)
+        resultado = np.concatenate([longitudes_segmentos(r, modo) for r in rutas])
+        error = np.abs(resultado - referencia).max()
+        print(f"{modo:<16} {t*1000:9.2f} ms {t_base/t:6.1f}x   error máx. {error:.2e} m")
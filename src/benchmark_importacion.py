@@ -0,0 +1,143 @@
+# Benchmark del tiempo de importación (arranque) de los módulos de Agropath.
+#
+# Cada módulo se importa en un proceso nuevo con "python -X importtime", de
+# modo que ninguna importación previa esconde su costo, y se lee el tiempo
+# acumulado que reporta CPython. Los resultados se guardan en
+# cache/importacion.json; en la siguiente ejecución se muestra la diferencia
+# con la medición anterior para seguir el costo de arranque de cada módulo.
+#
+# Uso: python src/benchmark_importacion.py [módulos...] [--repeticiones N] [--detalle K]
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+from cache_rutas import DIRECTORIO_CACHE
+
+DIRECTORIO_SRC = os.path.dirname(os.path.abspath(__file__))
+ARCHIVO_RESULTADOS = os.path.join(DIRECTORIO_CACHE, "importacion.json")
+
+# Línea de -X importtime: "import time:  self [us] | cumulative | paquete" (sangría = profundidad).
+_LINEA = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+
+
+def modulos_por_defecto():
+    """El menú y el módulo de cada una de sus opciones (ver menu_principal.COMANDOS)."""
+    from menu_principal import COMANDOS
+
+    modulos = ["menu_principal"]
+    for comando in COMANDOS.values():
+        if comando.modulo and comando.modulo not in modulos:
+            modulos.append(comando.modulo)
+    return modulos
+
+
+def importar(modulo):
+    """
+    Importa `modulo` en un proceso nuevo con -X importtime.
+
+    Retorna:
+        Lista de (paquete, propio_us, acumulado_us, profundidad), en el orden
+        en que CPython las reporta (cada paquete después de sus dependencias).
+    """
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=DIRECTORIO_SRC, capture_output=True, text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if resultado.returncode != 0:
+        ultima = resultado.stderr.strip().splitlines()[-1:] or ["error desconocido"]
+        raise RuntimeError(f"No se pudo importar {modulo}: {ultima[0]}")
+
+    filas = []
+    for linea in resultado.stderr.splitlines():
+        coincidencia = _LINEA.match(linea)
+        if coincidencia:
+            propio, acumulado, sangria, paquete = coincidencia.groups()
+            filas.append((paquete, int(propio), int(acumulado), (len(sangria) - 1) // 2))
+    return filas
+
+
+def medir(modulo, repeticiones=3, detalle=5):
+    """
+    Tiempo de importación de `modulo` (el mejor de `repeticiones` procesos).
+
+    Retorna:
+        Diccionario con "total_ms" y "dependencias": las `detalle` importaciones
+        directas más costosas, como lista de (paquete, ms).
+
+    Lanza RuntimeError si el módulo no se puede importar o si el intérprete
+    ya lo carga al arrancar (por ejemplo os): entonces no hay costo que medir.
+    """
+    mejor = None
+    for _ in range(repeticiones):
+        filas = importar(modulo)
+        # La línea del módulo es la última de profundidad 0 con su nombre; sus
+        # dependencias son las líneas con sangría justo antes (el arranque del
+        # intérprete, por ejemplo site, aparece antes y no se cuenta).
+        lineas = [i for i, (paquete, _, _, prof) in enumerate(filas) if prof == 0 and paquete == modulo]
+        if not lineas:
+            raise RuntimeError(f"{modulo} ya se importa al arrancar el intérprete; no se puede medir")
+        fin = lineas[-1]
+        inicio = fin
+        while inicio > 0 and filas[inicio - 1][3] > 0:
+            inicio -= 1
+        if mejor is None or filas[fin][2] < mejor[0]:
+            mejor = (filas[fin][2], filas[inicio:fin])
+
+    total, dependencias = mejor
+    directas = sorted(
+        ((paquete, acumulado) for paquete, _, acumulado, prof in dependencias if prof == 1),
+        key=lambda fila: fila[1], reverse=True,
+    )
+    return {
+        "total_ms": total / 1000,
+        "dependencias": [(paquete, acumulado / 1000) for paquete, acumulado in directas[:detalle]],
+    }
+
+
+def _cargar_anteriores():
+    try:
+        with open(ARCHIVO_RESULTADOS, encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el costo de importar cada módulo (python -X importtime).")
+    parser.add_argument("modulos", nargs="*", help="módulos a medir (por defecto, el menú y sus opciones)")
+    parser.add_argument("--repeticiones", type=int, default=3, help="procesos por módulo; se toma el mejor")
+    parser.add_argument("--detalle", type=int, default=3, help="dependencias más costosas que se muestran")
+    parser.add_argument("--no-guardar", action="store_true", help="no actualizar cache/importacion.json")
+    args = parser.parse_args(argv)
+
+    anteriores = _cargar_anteriores()
+    resultados = {}
+    for modulo in args.modulos or modulos_por_defecto():
+        try:
+            resultados[modulo] = medir(modulo, args.repeticiones, args.detalle)
+        except RuntimeError as error:
+            print(f"{modulo:<24} {error}")
+            continue
+
+        total = resultados[modulo]["total_ms"]
+        cambio = ""
+        if modulo in anteriores:
+            diferencia = total - anteriores[modulo]["total_ms"]
+            cambio = f" ({diferencia:+.1f} ms)"
+        dependencias = ", ".join(f"{p} {ms:.0f} ms" for p, ms in resultados[modulo]["dependencias"])
+        print(f"{modulo:<24} {total:9.1f} ms{cambio:<14} {dependencias}")
+
+    if not args.no_guardar and resultados:
+        os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+        with open(ARCHIVO_RESULTADOS, "w", encoding="utf-8") as archivo:
+            json.dump({**anteriores, **resultados}, archivo, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
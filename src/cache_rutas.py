@@ -0,0 +1,195 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+
+# Directorio donde se guarda la cache de rutas en disco.
+# Se ubica en la raíz del repositorio para que todos los módulos la compartan.
+DIRECTORIO_CACHE = os.environ.get(
+    "AGROPATH_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cache"),
+)
+
+# Tiempo de vida de una ruta guardada (30 días) y número máximo de rutas.
+TTL_POR_DEFECTO = 30 * 24 * 3600
+MAX_ENTRADAS_POR_DEFECTO = 2000
+
+# Decimales con los que se redondean las coordenadas antes de formar la clave.
+# 5 decimales ≈ 1.1 m, suficiente para que el mismo punto siempre caiga en la misma clave.
+DECIMALES_CLAVE = 5
+
+
+def clave_ruta(profile, origin_latlon, dest_latlon, decimales=DECIMALES_CLAVE):
+    """
+    Construye la clave de cache de una ruta a partir de su contenido.
+
+    La clave es un hash SHA-1 del perfil y de las coordenadas redondeadas
+    de origen y destino, de modo que la misma consulta siempre produce
+    la misma clave sin importar desde qué módulo se haga.
+    """
+    o_lat, o_lon = (round(float(c), decimales) for c in origin_latlon)
+    d_lat, d_lon = (round(float(c), decimales) for c in dest_latlon)
+    texto = f"{profile}|{o_lat:.{decimales}f},{o_lon:.{decimales}f}|{d_lat:.{decimales}f},{d_lon:.{decimales}f}"
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def _empaquetar(route_points):
+    # Los puntos se guardan como un arreglo plano de float64 comprimido,
+    # mucho más compacto que guardar el JSON de OSRM.
+    plano = array("d")
+    for lat, lon in route_points:
+        plano.append(lat)
+        plano.append(lon)
+    return zlib.compress(plano.tobytes(), 6)
+
+
+def _desempaquetar(blob):
+    plano = array("d")
+    plano.frombytes(zlib.decompress(blob))
+    return list(zip(plano[0::2], plano[1::2]))
+
+
+class CacheRutas:
+    """
+    Cache persistente de rutas OSRM guardada en un archivo SQLite.
+
+    Cada entrada guarda la geometría (lista de puntos lat, lon) y la
+    distancia en metros. Las entradas vencen después de `ttl` segundos y,
+    cuando se supera `max_entradas`, se eliminan las usadas hace más tiempo (LRU).
+
+    Los contadores `aciertos` y `fallos` permiten ver cuántas consultas
+    se respondieron localmente.
+    """
+
+    def __init__(self, ruta_archivo=None, ttl=TTL_POR_DEFECTO, max_entradas=MAX_ENTRADAS_POR_DEFECTO):
+        if ruta_archivo is None:
+            os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+            ruta_archivo = os.path.join(DIRECTORIO_CACHE, "rutas.sqlite3")
+        self.ruta_archivo = ruta_archivo
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta_archivo, check_same_thread=False)
+        self._conexion.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rutas (
+                clave TEXT PRIMARY KEY,
+                distancia REAL NOT NULL,
+                geometria BLOB NOT NULL,
+                creada REAL NOT NULL,
+                ultimo_acceso REAL NOT NULL
+            )
+            """
+        )
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_acceso ON rutas (ultimo_acceso)")
+        self._conexion.commit()
+
+    def obtener(self, clave):
+        """
+        Busca una ruta en la cache.
+
+        Retorna:
+            (route_points, distance_m) si la ruta existe y no ha vencido,
+            o None en caso contrario.
+        """
+        ahora = time.time()
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT distancia, geometria, creada FROM rutas WHERE clave = ?", (clave,)
+            ).fetchone()
+
+            if fila is None or ahora - fila[2] > self.ttl:
+                if fila is not None:
+                    # La entrada venció: se elimina para no volver a leerla.
+                    self._conexion.execute("DELETE FROM rutas WHERE clave = ?", (clave,))
+                    self._conexion.commit()
+                self.fallos += 1
+                return None
+
+            # Se actualiza el último acceso para el orden LRU.
+            self._conexion.execute("UPDATE rutas SET ultimo_acceso = ? WHERE clave = ?", (ahora, clave))
+            self._conexion.commit()
+            self.aciertos += 1
+
+        return _desempaquetar(fila[1]), fila[0]
+
+    def guardar(self, clave, route_points, distance_m):
+        """
+        Guarda una ruta en la cache y aplica la expulsión LRU si hace falta.
+        """
+        ahora = time.time()
+        blob = _empaquetar(route_points)
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO rutas (clave, distancia, geometria, creada, ultimo_acceso) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (clave, float(distance_m), blob, ahora, ahora),
+            )
+            self._expulsar()
+            self._conexion.commit()
+
+    def _expulsar(self):
+        # Primero se eliminan las entradas vencidas y luego, si todavía se
+        # supera el límite, las menos usadas recientemente.
+        self._conexion.execute("DELETE FROM rutas WHERE creada < ?", (time.time() - self.ttl,))
+        total = self._conexion.execute("SELECT COUNT(*) FROM rutas").fetchone()[0]
+        sobrantes = total - self.max_entradas
+        if sobrantes > 0:
+            self._conexion.execute(
+                "DELETE FROM rutas WHERE clave IN "
+                "(SELECT clave FROM rutas ORDER BY ultimo_acceso ASC LIMIT ?)",
+                (sobrantes,),
+            )
+
+    def geometrias(self):
+        """
+        Recorre todas las rutas guardadas (vencidas o no) y entrega la lista de
+        puntos de cada una. Sirve para construir una red vial local (ver enrutadores.py).
+        """
+        with self._lock:
+            blobs = [fila[0] for fila in self._conexion.execute("SELECT geometria FROM rutas")]
+        for blob in blobs:
+            yield _desempaquetar(blob)
+
+    def limpiar(self):
+        """Elimina todas las rutas guardadas y reinicia los contadores."""
+        with self._lock:
+            self._conexion.execute("DELETE FROM rutas")
+            self._conexion.commit()
+            self.aciertos = 0
+            self.fallos = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._conexion.execute("SELECT COUNT(*) FROM rutas").fetchone()[0]
+
+    def estadisticas(self):
+        """Retorna un diccionario con entradas, aciertos, fallos y tasa de aciertos."""
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self),
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+        }
+
+
+_cache_por_defecto = None
+_lock_por_defecto = threading.Lock()
+
+
+def cache_por_defecto():
+    """
+    Retorna la cache compartida del proceso, creándola la primera vez.
+    Así todos los módulos de rutas usan el mismo archivo y los mismos contadores.
+    """
+    global _cache_por_defecto
+    with _lock_por_defecto:
+        if _cache_por_defecto is None:
+            _cache_por_defecto = CacheRutas()
+    return _cache_por_defecto
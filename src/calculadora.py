@@ -1,4 +1,11 @@
 # Calculadora de Costo Total de Soya al Centro de Acopio
+import argparse
+import csv
+import json
+import sys
+
+import numpy as np
+
 COSTO_PRODUCCION_TON = 154.65
 
 
@@ -7,23 +14,206 @@ FACTOR_OPERACIONAL_FIJO = 2.5
 FACTOR_VUELTA = 0.5                 
 
 
-def calcular_costo_total_soya(distancia_ida_km):
-    costo_combustible_ida = distancia_ida_km * COSTO_COMBUSTIBLE_TON_KM
+# Solo usa operaciones aritméticas, así que distancia_ida_km puede ser un número
+# o un arreglo de NumPy (por ejemplo la matriz de matriz_distancias.py).
+# Los parámetros también pueden cambiarse (por defecto, las constantes de arriba).
+def calcular_costo_total_soya(distancia_ida_km, costo_combustible_ton_km=COSTO_COMBUSTIBLE_TON_KM,
+                              factor_operacional=FACTOR_OPERACIONAL_FIJO, factor_vuelta=FACTOR_VUELTA,
+                              costo_produccion_ton=COSTO_PRODUCCION_TON):
+    costo_combustible_ida = distancia_ida_km * costo_combustible_ton_km
     
-    costo_combustible_vuelta = costo_combustible_ida * FACTOR_VUELTA
+    costo_combustible_vuelta = costo_combustible_ida * factor_vuelta
     
     costo_combustible_total = costo_combustible_ida + costo_combustible_vuelta
     
-    costos_operacionales = costo_combustible_total * FACTOR_OPERACIONAL_FIJO
+    costos_operacionales = costo_combustible_total * factor_operacional
     
     costo_logistico_ton = costo_combustible_total + costos_operacionales
     
     
-    costo_total_ton = COSTO_PRODUCCION_TON + costo_logistico_ton
+    costo_total_ton = costo_produccion_ton + costo_logistico_ton
     
     return costo_total_ton, costo_logistico_ton
 
 
+def calcular_costos_lote(distancias_km, costo_combustible_ton_km=COSTO_COMBUSTIBLE_TON_KM,
+                         factor_operacional=FACTOR_OPERACIONAL_FIJO, factor_vuelta=FACTOR_VUELTA,
+                         costo_produccion_ton=COSTO_PRODUCCION_TON):
+    """
+    Costos de muchas distancias y muchas combinaciones de parámetros en una sola operación.
+
+    Parámetros:
+        distancias_km: número, lista o arreglo de cualquier forma (por ejemplo
+            la matriz finca × destino de matriz_distancias.py). NaN (ruta
+            inexistente) da costo NaN.
+        costo_combustible_ton_km, factor_operacional, factor_vuelta: valor
+            único o lista de valores a evaluar (análisis de sensibilidad).
+        costo_produccion_ton: costo de producción por tonelada (valor único).
+
+    Retorna:
+        costo_total, costo_logistico: arreglos de forma
+        distancias.shape + combustible.shape + operacional.shape + vuelta.shape;
+        los parámetros que son un solo número no agregan dimensiones.
+
+    Lanza ValueError si alguna distancia es negativa.
+    """
+    distancias = np.asarray(distancias_km, dtype=np.float64)
+    if np.any(distancias < 0):
+        raise ValueError("La distancia no puede ser negativa.")
+
+    # Cada arreglo recibe su propio eje (distancias primero) y
+    # calcular_costo_total_soya, que solo usa aritmética, arma la grilla
+    # completa por broadcasting.
+    parametros = [np.asarray(v, dtype=np.float64)
+                  for v in (costo_combustible_ton_km, factor_operacional, factor_vuelta)]
+    arreglos = [distancias] + parametros
+    dimensiones = [a.ndim for a in arreglos]
+    ejes = []
+    for n, a in enumerate(arreglos):
+        antes, despues = sum(dimensiones[:n]), sum(dimensiones[n + 1:])
+        ejes.append(a.reshape((1,) * antes + a.shape + (1,) * despues))
+    return calcular_costo_total_soya(*ejes, costo_produccion_ton=costo_produccion_ton)
+
+
+def filas_costos(distancias_km, costo_combustible_ton_km=COSTO_COMBUSTIBLE_TON_KM,
+                 factor_operacional=FACTOR_OPERACIONAL_FIJO, factor_vuelta=FACTOR_VUELTA,
+                 costo_produccion_ton=COSTO_PRODUCCION_TON):
+    """
+    Igual que calcular_costos_lote, pero en formato de tabla: una fila (diccionario)
+    por cada combinación de distancia y parámetros. Útil para exportar a CSV o JSON.
+    """
+    distancias = np.ravel(np.asarray(distancias_km, dtype=np.float64))
+    combustible, operacional, vuelta = (np.atleast_1d(np.asarray(v, dtype=np.float64))
+                                        for v in (costo_combustible_ton_km, factor_operacional, factor_vuelta))
+    total, logistico = calcular_costos_lote(distancias, combustible, operacional, vuelta, costo_produccion_ton)
+    columnas = np.meshgrid(distancias, combustible, operacional, vuelta, indexing="ij")
+    nombres = ("distancia_km", "costo_combustible_ton_km", "factor_operacional", "factor_vuelta")
+    datos = [c.ravel() for c in columnas] + [logistico.ravel(), total.ravel()]
+    return [
+        dict(zip(nombres + ("costo_logistico_ton", "costo_total_ton"), fila))
+        for fila in zip(*(d.tolist() for d in datos))
+    ]
+
+
+# Columna que se busca por defecto en los CSV de distancias.
+COLUMNA_DISTANCIA = "distancia_km"
+
+
+def validar_distancias(distancias):
+    """Lanza ValueError si alguna distancia no es un número finito o es negativa."""
+    distancias = np.asarray(distancias, dtype=np.float64)
+    if not np.all(np.isfinite(distancias)):
+        raise ValueError("La distancia debe ser un número finito (sin NaN ni infinito).")
+    if np.any(distancias < 0):
+        raise ValueError("La distancia no puede ser negativa.")
+
+
+def leer_distancias(ruta, columna=COLUMNA_DISTANCIA):
+    """
+    Lee las distancias (km) de una columna de un CSV.
+
+    Si el CSV tiene encabezado se usa la columna `columna`; si no la tiene,
+    la única columna numérica del archivo (por ejemplo, en "id,km" las dos
+    columnas son numéricas y el archivo es ambiguo). Un CSV sin encabezado
+    debe tener una sola columna.
+
+    Lanza ValueError si no se puede saber qué columna usar, o si alguna
+    celda de esa columna no es un número.
+    """
+    with open(ruta, newline="", encoding="utf-8") as archivo:
+        filas = [fila for fila in csv.reader(archivo) if any(celda.strip() for celda in fila)]
+    if not filas:
+        return []
+
+    def numero(celda):
+        try:
+            float(celda)
+            return True
+        except ValueError:
+            return False
+
+    encabezado = [c.strip() for c in filas[0]]
+    if all(numero(c) for c in encabezado):
+        # Sin encabezado: solo se acepta una columna.
+        if len(encabezado) != 1:
+            raise ValueError(f"{ruta}: el CSV no tiene encabezado y tiene {len(encabezado)} columnas; "
+                             f"agregue un encabezado con la columna '{columna}'")
+        indice, datos, inicio = 0, filas, 1
+    else:
+        datos, inicio = filas[1:], 2
+        if columna in encabezado:
+            indice = encabezado.index(columna)
+        else:
+            numericas = [i for i in range(len(encabezado))
+                         if datos and all(i < len(f) and numero(f[i]) for f in datos)]
+            if len(numericas) != 1:
+                raise ValueError(f"{ruta}: no existe la columna '{columna}' y hay {len(numericas)} columnas "
+                                 f"numéricas ({', '.join(encabezado[i] for i in numericas) or 'ninguna'}); "
+                                 "indique cuál usar")
+            indice = numericas[0]
+
+    distancias = []
+    for n, fila in enumerate(datos, start=inicio):
+        celda = fila[indice].strip() if indice < len(fila) else ""
+        try:
+            distancias.append(float(celda))
+        except ValueError:
+            raise ValueError(f"{ruta}, fila {n}: '{celda}' no es una distancia válida") from None
+    validar_distancias(distancias)
+    return distancias
+
+
+def valores_json(filas):
+    """Las filas con NaN e infinito como None (null), que JSON sí admite."""
+    return [{k: None if isinstance(v, float) and not np.isfinite(v) else v for k, v in fila.items()} for fila in filas]
+
+
+def agregar_argumentos_costos(parser):
+    """
+    Agrega a `parser` (un ArgumentParser o un subcomando) las opciones de
+    costos: --distancia, --archivo, --columna, --combustible, --operacional
+    y --vuelta. Las usan calculadora.py y agropath.py costos.
+    """
+    parser.add_argument("--distancia", type=float, nargs="+", default=[], help="distancias de ida en km")
+    parser.add_argument("--archivo", help="CSV con distancias en km (columna distancia_km, o su única columna numérica)")
+    parser.add_argument("--columna", default=COLUMNA_DISTANCIA, help="columna del CSV con las distancias")
+    parser.add_argument("--combustible", type=float, nargs="+", default=[COSTO_COMBUSTIBLE_TON_KM],
+                        help="costo de combustible por ton-km (uno o varios valores)")
+    parser.add_argument("--operacional", type=float, nargs="+", default=[FACTOR_OPERACIONAL_FIJO],
+                        help="factor operacional (uno o varios valores)")
+    parser.add_argument("--vuelta", type=float, nargs="+", default=[FACTOR_VUELTA],
+                        help="factor de vuelta (uno o varios valores)")
+
+
+def validar_argumentos_costos(args):
+    """
+    Revisa las opciones de agregar_argumentos_costos() antes de leer nada.
+
+    Lanza ValueError (un error de uso) si no se indicó ninguna distancia o si
+    algún valor de la línea de comandos no es un número finito.
+    """
+    if not args.distancia and not args.archivo:
+        raise ValueError("indique al menos una distancia con --distancia o --archivo")
+    for nombre in ("distancia", "combustible", "operacional", "vuelta"):
+        if not np.all(np.isfinite(getattr(args, nombre))):
+            raise ValueError(f"--{nombre} debe ser un número finito")
+
+
+def costos_de_argumentos(args):
+    """
+    Filas de filas_costos() para las opciones ya validadas: las distancias de
+    --distancia más las de --archivo, con los parámetros pedidos.
+
+    Lanza OSError o ValueError si el CSV no se puede leer o alguna distancia
+    no es válida.
+    """
+    distancias = list(args.distancia)
+    if args.archivo:
+        distancias += leer_distancias(args.archivo, args.columna)
+    validar_distancias(distancias)
+    return filas_costos(distancias, args.combustible, args.operacional, args.vuelta)
+
+
 def calcular_costos():
     print("--- Calculadora de Costo Total de Soya ---")
     try:
@@ -31,8 +221,7 @@ def calcular_costos():
         
         distancia_ida = float(distancia_input)
         
-        if distancia_ida < 0:
-            raise ValueError("La distancia no puede ser negativa.")
+        validar_distancias(distancia_ida)
 
         costo_total, flete = calcular_costo_total_soya(distancia_ida)
         
@@ -47,4 +236,41 @@ def calcular_costos():
     except ValueError as e:
         print(f"\nError de entrada: {e}. Por favor, ingrese un número válido para la distancia.")
     except Exception as e:
-        print(f"\nOcurrió un error: {e}")
\ No newline at end of file
+        print(f"\nOcurrió un error: {e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Costo total y logístico de la soya por tonelada.")
+    agregar_argumentos_costos(parser)
+    parser.add_argument("--formato", choices=("tabla", "csv", "json"), default="tabla")
+    args = parser.parse_args(argv)
+    try:
+        validar_argumentos_costos(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        filas = costos_de_argumentos(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.formato == "json":
+        json.dump(valores_json(filas), sys.stdout, indent=2, allow_nan=False)
+        print()
+    elif args.formato == "csv":
+        escritor = csv.DictWriter(sys.stdout, fieldnames=list(filas[0]))
+        escritor.writeheader()
+        escritor.writerows(filas)
+    else:
+        for fila in filas:
+            print(
+                f"{fila['distancia_km']:.2f} km | combustible {fila['costo_combustible_ton_km']:.5f} | "
+                f"operacional {fila['factor_operacional']:.2f} | vuelta {fila['factor_vuelta']:.2f} | "
+                f"flete ${fila['costo_logistico_ton']:.2f}/ton | total ${fila['costo_total_ton']:.2f}/ton"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import functools
+import json
+import os
+
+import folium
+import numpy as np
+import requests
+
+from cache_rutas import DIRECTORIO_CACHE
+from simplificacion import cuantizar, decimales_para_tolerancia, douglas_peucker
+
+# GeoJSON con los límites de los estados de EE. UU. (ejemplos oficiales de folium).
+# Se incluye una copia en dataset/ para poder generar los mapas sin conexión;
+# la URL solo se usa si esa copia no existe.
+URL_ESTADOS = "https://raw.githubusercontent.com/python-visualization/folium/main/examples/data/us-states.json"
+RUTA_ESTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dataset", "us-states.json")
+
+# Illinois y los estados con los que limita.
+ILLINOIS = "IL"
+VECINOS_ILLINOIS = ("IA", "IN", "KY", "MO", "WI")
+
+# Tolerancia de simplificación de los polígonos (m). A zoom 6-7, que es como
+# se abren los mapas, 500 m es menos de un píxel.
+TOLERANCIA_LIMITES_M = 500.0
+
+
+@functools.lru_cache(maxsize=None)
+def cargar_estados():
+    """
+    Carga el GeoJSON de los estados una sola vez por proceso.
+
+    Orden de búsqueda: copia incluida en dataset/, copia en la cache local
+    y, por último, descarga desde URL_ESTADOS (que se guarda en la cache).
+
+    El diccionario retornado se comparte entre todos los mapas: no se debe modificar.
+    """
+    en_cache = os.path.join(DIRECTORIO_CACHE, "us-states.json")
+    for ruta in (RUTA_ESTADOS, en_cache):
+        if os.path.exists(ruta):
+            with open(ruta, encoding="utf-8") as archivo:
+                return json.load(archivo)
+
+    geojson = requests.get(URL_ESTADOS, timeout=20).json()
+    os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+    with open(en_cache, "w", encoding="utf-8") as archivo:
+        json.dump(geojson, archivo, separators=(",", ":"))
+    return geojson
+
+
+def _simplificar_anillo(anillo, tolerancia_m, decimales):
+    # GeoJSON guarda [lon, lat]; simplificacion.py trabaja con (lat, lon).
+    puntos = np.asarray(anillo, dtype=np.float64)[:, ::-1]
+    conservar = douglas_peucker(puntos, tolerancia_m)
+    reducido = cuantizar(puntos[conservar], decimales)
+    # Un anillo válido necesita al menos 4 puntos (el último repite el primero).
+    if len(reducido) < 4:
+        reducido = np.round(puntos, decimales)
+    return reducido[:, ::-1].tolist()
+
+
+def _simplificar_geometria(geometria, tolerancia_m, decimales):
+    if geometria["type"] == "Polygon":
+        anillos = [_simplificar_anillo(a, tolerancia_m, decimales) for a in geometria["coordinates"]]
+        return {"type": "Polygon", "coordinates": anillos}
+    if geometria["type"] == "MultiPolygon":
+        poligonos = [
+            [_simplificar_anillo(a, tolerancia_m, decimales) for a in poligono]
+            for poligono in geometria["coordinates"]
+        ]
+        return {"type": "MultiPolygon", "coordinates": poligonos}
+    return geometria
+
+
+def capa_estados(estados=None, tolerancia_m=TOLERANCIA_LIMITES_M):
+    """
+    Retorna el GeoJSON de los límites listo para los mapas.
+
+    Parámetros:
+        estados: ids de estado a conservar (por ejemplo ("IL", "MO"), una
+            lista o un solo id); None conserva todos.
+        tolerancia_m: tolerancia de simplificación de los polígonos;
+            0 o None los deja con la resolución original.
+
+    El resultado se memoriza, así que varios mapas generados en el mismo
+    proceso reutilizan el mismo objeto sin volver a leer ni simplificar.
+    """
+    # lru_cache necesita argumentos hashables: los estados pasan a una tupla
+    # ordenada, así ["MO", "IL"] y ("IL", "MO") comparten la misma entrada.
+    if estados is not None:
+        estados = (estados,) if isinstance(estados, str) else tuple(sorted(set(estados)))
+    return _capa_estados(estados, tolerancia_m)
+
+
+@functools.lru_cache(maxsize=None)
+def _capa_estados(estados, tolerancia_m):
+    geojson = cargar_estados()
+    features = geojson["features"]
+    if estados is not None:
+        features = [f for f in features if f["id"] in estados]
+
+    if tolerancia_m:
+        decimales = decimales_para_tolerancia(tolerancia_m)
+        features = [
+            {**f, "geometry": _simplificar_geometria(f["geometry"], tolerancia_m, decimales)}
+            for f in features
+        ]
+
+    return {"type": "FeatureCollection", "features": features}
+
+
+def agregar_capa_estados(m, estados=(ILLINOIS,) + VECINOS_ILLINOIS, tolerancia_m=TOLERANCIA_LIMITES_M):
+    """
+    Añade al mapa la capa de límites estatales con Illinois resaltado.
+
+    Parámetros:
+        m: folium.Map al que se añade la capa.
+        estados: estados a dibujar; por defecto Illinois y sus vecinos.
+            None dibuja todos los estados.
+        tolerancia_m: tolerancia de simplificación (ver capa_estados()).
+    """
+    # style_function: Illinois en verde y con mayor opacidad; el resto en gris.
+    # highlight_function: estilo cuando el usuario pasa el mouse por encima.
+    # tooltip: muestra el nombre del estado cuando el cursor lo toca.
+    folium.GeoJson(
+        capa_estados(estados, tolerancia_m),
+        name="Illinois",
+        style_function=lambda feature: {
+            "fillColor": "green" if feature["id"] == ILLINOIS else "gray",
+            "color": "black",
+            "weight": 1,
+            "fillOpacity": 0.3 if feature["id"] == ILLINOIS else 0.05,
+        },
+        highlight_function=lambda feature: {
+            "weight": 2,
+            "color": "black",
+            "fillOpacity": 0.6 if feature["id"] == ILLINOIS else 0.1,
+        },
+        tooltip=folium.GeoJsonTooltip(fields=["name"]),
+    ).add_to(m)
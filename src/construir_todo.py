@@ -0,0 +1,362 @@
+# Construcción de todos los mapas de docs/ en una sola pasada.
+#
+# Los artefactos forman un grafo de dependencias:
+#
+#   estados ──────────┬─> mapa_fincas, mapa_acopio, mapa_puerto
+#   rutas_fincas ─────┼─> mapa_rutas_fincas ─┐
+#   ruta_puerto ──────┴─> mapa_ruta_puerto   ├─> mapa_unificado
+#                                            ┘
+# Cada entrada (límites, rutas) se obtiene una sola vez y se comparte entre
+# los mapas que la usan; los artefactos independientes se construyen en
+# paralelo, y un mapa solo se regenera si cambió el hash de sus entradas.
+#
+# Uso: python src/construir_todo.py [--salida docs] [--forzar] [--hilos N]
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from graphlib import TopologicalSorter
+
+from cache_rutas import DIRECTORIO_CACHE
+
+DIRECTORIO_DOCS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docs")
+ARCHIVO_MANIFIESTO = os.path.join(DIRECTORIO_CACHE, "construccion.json")
+
+# Candado del manifiesto: segundos máximos de espera y antigüedad a partir de
+# la cual se considera abandonado (un proceso que murió sin liberarlo).
+ESPERA_CANDADO_S = 10
+CANDADO_ABANDONADO_S = 60
+
+
+class Artefacto:
+    """
+    Un nodo del grafo de construcción.
+
+    - nombre: identificador único.
+    - dependencias: nombres de los artefactos cuyo valor necesita.
+    - construir: función que recibe los valores de las dependencias (en orden)
+      y, si el artefacto tiene salida, la ruta del archivo a escribir.
+    - salida: nombre del archivo HTML generado, o None si solo produce datos.
+    - modulos: módulos cuyo código forma parte del hash (si cambian, se reconstruye).
+    - huella: función sin argumentos que identifica el valor sin recorrerlo
+      (por ejemplo, fecha y tamaño del archivo de origen); None calcula el
+      hash del valor completo.
+    """
+
+    __slots__ = ("nombre", "dependencias", "construir", "salida", "modulos", "huella")
+
+    def __init__(self, nombre, dependencias, construir, salida=None, modulos=(), huella=None):
+        self.nombre = nombre
+        self.dependencias = tuple(dependencias)
+        self.construir = construir
+        self.salida = salida
+        self.modulos = tuple(modulos)
+        self.huella = huella
+
+
+def _hash_valor(valor):
+    # Hash de contenido de un valor intermedio (rutas, GeoJSON...).
+    texto = json.dumps(valor, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def _hash_modulos(modulos):
+    sha = hashlib.sha256()
+    for nombre in modulos:
+        modulo = sys.modules.get(nombre) or __import__(nombre)
+        with open(modulo.__file__, "rb") as archivo:
+            sha.update(archivo.read())
+    return sha.hexdigest()
+
+
+def _huella_archivos(*rutas):
+    # Ruta, fecha de modificación y tamaño de cada archivo existente: basta para
+    # saber si cambió sin leer su contenido (como cargar_ubicaciones()).
+    partes = []
+    for ruta in rutas:
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            continue
+        partes.append(f"{os.path.abspath(ruta)}:{estado.st_mtime_ns}:{estado.st_size}")
+    return hashlib.sha256("|".join(partes).encode("utf-8")).hexdigest()
+
+
+def _huella_estados():
+    # El GeoJSON de los límites sale del primer archivo que exista (ver
+    # capa_limites.cargar_estados); el código de capa_limites.py ya está en
+    # el hash por `modulos`.
+    from capa_limites import RUTA_ESTADOS
+
+    return _huella_archivos(RUTA_ESTADOS, os.path.join(DIRECTORIO_CACHE, "us-states.json"))
+
+
+def _ubicaciones():
+    # Contenido del registro: si cambia el archivo de ubicaciones, cambia el hash
+    # y se reconstruyen las rutas y los mapas que dependen de él.
+    from registro_ubicaciones import cargar_ubicaciones
+
+    return [[u.tipo, u.nombre, u.lat, u.lon, u.info, u.toneladas, u.capacidad] for u in cargar_ubicaciones()]
+
+
+def _registro():
+    # Se lee en cada construcción (cargar_ubicaciones() reutiliza la copia
+    # mientras el archivo no cambie), nunca al importar los módulos.
+    from registro_ubicaciones import cargar_ubicaciones
+
+    return cargar_ubicaciones()
+
+
+def _rutas_fincas():
+    from rutas_osrm import obtener_rutas_lote
+
+    registro = _registro()
+    fincas, destino = registro.fincas, registro.acopio.punto
+    rutas = {}
+    pares = [((f["lat"], f["lon"]), destino) for f in fincas]
+    for finca, (resultado, error) in zip(fincas, obtener_rutas_lote(pares)):
+        if error is not None:
+            print(f"Error con {finca['nombre']}: {error}")
+            continue
+        rutas[finca["nombre"]] = resultado
+    return rutas
+
+
+def _ruta_puerto():
+    from rutas_osrm import get_osrm_route
+
+    registro = _registro()
+    return get_osrm_route(registro.acopio.punto, registro.puerto.punto)
+
+
+def artefactos():
+    """Retorna el grafo de artefactos del sitio como diccionario {nombre: Artefacto}."""
+    from capa_limites import capa_estados
+    from centro_de_acopio import centros_de_acopio
+    from fincas_de_produccion import fincas_de_produccion
+    from puerto import puerto as mapa_puerto
+    import ruta_centro_puerto
+    import ruta_fincas_centro
+    import ruta_finales
+
+    lista = [
+        # Entradas compartidas
+        Artefacto("estados", [], capa_estados, modulos=["capa_limites"], huella=_huella_estados),
+        Artefacto("ubicaciones", [], _ubicaciones, modulos=["registro_ubicaciones"]),
+        Artefacto("rutas_fincas", ["ubicaciones"], lambda _: _rutas_fincas(), modulos=["rutas_osrm"]),
+        Artefacto("ruta_puerto", ["ubicaciones"], lambda _: _ruta_puerto(), modulos=["rutas_osrm"]),
+
+        # Mapas de puntos de interés: el GeoJSON ya quedó memorizado por "estados".
+        Artefacto("mapa_fincas", ["estados", "ubicaciones"], lambda _, __, salida: fincas_de_produccion(salida),
+                  "mapa_fincas_illinois.html", ["fincas_de_produccion", "capa_limites", "marcadores"]),
+        Artefacto("mapa_acopio", ["estados", "ubicaciones"], lambda _, __, salida: centros_de_acopio(salida),
+                  "centro_de_acopio.html", ["centro_de_acopio", "capa_limites"]),
+        Artefacto("mapa_puerto", ["estados", "ubicaciones"], lambda _, __, salida: mapa_puerto(salida),
+                  "puerto_st_louis.html", ["puerto", "capa_limites"]),
+
+        # Mapas de rutas
+        Artefacto(
+            "mapa_rutas_fincas", ["rutas_fincas"],
+            lambda rutas, salida: ruta_fincas_centro.build_map(
+                _registro().fincas, _registro().acopio.punto, rutas, salida
+            ),
+            "rutas_fincas_centro.html", ["ruta_fincas_centro", "simplificacion", "marcadores"],
+        ),
+        Artefacto(
+            "mapa_ruta_puerto", ["ruta_puerto"],
+            lambda ruta, salida: ruta_centro_puerto.build_map(
+                _registro().acopio.punto, _registro().puerto.punto, ruta[0], salida
+            ),
+            "ruta_centro_puerto.html", ["ruta_centro_puerto", "simplificacion"],
+        ),
+        Artefacto(
+            "mapa_unificado", ["rutas_fincas", "ruta_puerto"],
+            lambda rutas, ruta, salida: ruta_finales.build_unified_map(
+                _registro().fincas, _registro().acopio, _registro().puerto, rutas, ruta, salida
+            ),
+            "rutas_unificadas.html", ["ruta_finales", "simplificacion", "marcadores"],
+        ),
+    ]
+    return {a.nombre: a for a in lista}
+
+
+def validar_seleccion(seleccion, grafo=None):
+    """Lanza ValueError si algún nombre de `seleccion` no es un artefacto, con la lista de los disponibles."""
+    grafo = artefactos() if grafo is None else grafo
+    desconocidos = [nombre for nombre in seleccion if nombre not in grafo]
+    if desconocidos:
+        raise ValueError(f"artefactos desconocidos: {', '.join(desconocidos)} (disponibles: {', '.join(grafo)})")
+
+
+def _cargar_manifiesto():
+    try:
+        with open(ARCHIVO_MANIFIESTO, encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+@contextlib.contextmanager
+def _candado_manifiesto():
+    # Archivo creado con O_CREAT | O_EXCL: solo un proceso a la vez lo consigue.
+    # Si lleva más de CANDADO_ABANDONADO_S segundos se asume que su dueño murió.
+    candado = f"{ARCHIVO_MANIFIESTO}.lock"
+    limite = time.monotonic() + ESPERA_CANDADO_S
+    while True:
+        try:
+            os.close(os.open(candado, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(candado) > CANDADO_ABANDONADO_S:
+                    os.remove(candado)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > limite:
+                raise TimeoutError(f"el manifiesto está bloqueado por otro proceso ({candado})")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.remove(candado)
+
+
+def _guardar_manifiesto(cambios):
+    # Con el candado tomado se vuelve a leer el manifiesto y solo se actualizan
+    # las entradas de esta construcción, así dos construcciones en paralelo (por
+    # ejemplo, lanzadas por agropath.py con artefactos distintos) no borran las
+    # entradas de la otra. El archivo se escribe aparte y se reemplaza de una vez
+    # (os.replace es atómico).
+    os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+    with _candado_manifiesto():
+        manifiesto = {**_cargar_manifiesto(), **cambios}
+        temporal = f"{ARCHIVO_MANIFIESTO}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump(manifiesto, archivo, indent=2, sort_keys=True)
+        os.replace(temporal, ARCHIVO_MANIFIESTO)
+
+
+def construir(directorio=DIRECTORIO_DOCS, forzar=False, hilos=4, seleccion=None):
+    """
+    Construye los artefactos respetando sus dependencias.
+
+    Parámetros:
+        directorio: carpeta donde se escriben los HTML.
+        forzar: si es True se reconstruye todo aunque los hashes no hayan cambiado.
+        hilos: número máximo de artefactos construidos a la vez.
+        seleccion: nombres de artefactos a construir (con sus dependencias);
+            None construye todos.
+
+    Retorna:
+        Diccionario {nombre: estado} con "construido", "sin cambios" o "error: ...".
+
+    Lanza ValueError si `seleccion` incluye un artefacto que no existe.
+    """
+    grafo = artefactos()
+    if seleccion is not None:
+        validar_seleccion(seleccion, grafo)
+        # Se agregan las dependencias de los artefactos pedidos.
+        pendientes, elegidos = list(seleccion), set()
+        while pendientes:
+            nombre = pendientes.pop()
+            if nombre not in elegidos:
+                elegidos.add(nombre)
+                pendientes.extend(grafo[nombre].dependencias)
+        grafo = {n: a for n, a in grafo.items() if n in elegidos}
+
+    os.makedirs(directorio, exist_ok=True)
+    manifiesto = _cargar_manifiesto()
+    cambios = {}
+    valores, hashes, estados = {}, {}, {}
+
+    def ejecutar(artefacto):
+        # Hash de las entradas: código de los módulos + hashes de las dependencias.
+        entradas = [_hash_modulos(artefacto.modulos)] + [hashes[d] for d in artefacto.dependencias]
+        argumentos = [valores[d] for d in artefacto.dependencias]
+
+        if artefacto.salida is None:
+            valor = artefacto.construir(*argumentos)
+            # La huella se toma después de construir: el archivo de origen puede
+            # haberse creado en ese momento (por ejemplo, una descarga a la cache).
+            huella = artefacto.huella() if artefacto.huella is not None else valor
+            return valor, _hash_valor([entradas, huella]), "construido"
+
+        clave = hashlib.sha256("|".join(entradas).encode("utf-8")).hexdigest()
+        ruta = os.path.abspath(os.path.join(directorio, artefacto.salida))
+        if not forzar and manifiesto.get(ruta) == clave and os.path.exists(ruta):
+            return None, clave, "sin cambios"
+        artefacto.construir(*argumentos, ruta)
+        return None, clave, "construido"
+
+    orden = TopologicalSorter({n: a.dependencias for n, a in grafo.items()})
+    orden.prepare()
+    en_curso = {}
+    inicio = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        while orden.is_active():
+            for nombre in orden.get_ready():
+                if any(not estados[d].startswith(("construido", "sin cambios")) for d in grafo[nombre].dependencias):
+                    # Si falló una dependencia, el artefacto no se puede construir.
+                    estados[nombre] = "error: falló una dependencia"
+                    orden.done(nombre)
+                    continue
+                en_curso[pool.submit(ejecutar, grafo[nombre])] = nombre
+
+            if not en_curso:
+                continue
+            listos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in listos:
+                nombre = en_curso.pop(futuro)
+                try:
+                    valores[nombre], hashes[nombre], estados[nombre] = futuro.result()
+                    salida = grafo[nombre].salida
+                    if salida is not None:
+                        # El manifiesto se indexa por archivo para admitir varias carpetas de salida.
+                        cambios[os.path.abspath(os.path.join(directorio, salida))] = hashes[nombre]
+                except Exception as e:
+                    estados[nombre] = f"error: {e}"
+                orden.done(nombre)
+
+    _guardar_manifiesto(cambios)
+    print(f"Construcción terminada en {time.perf_counter() - inicio:.2f} s.")
+    return estados
+
+
+def entero_positivo(texto):
+    """Tipo de argparse para --hilos: un entero mayor o igual a 1."""
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"se esperaba un entero: {texto!r}") from None
+    if valor < 1:
+        raise argparse.ArgumentTypeError(f"debe ser al menos 1: {valor}")
+    return valor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Construye todos los mapas de Agropath en una sola pasada.")
+    parser.add_argument("--salida", default=DIRECTORIO_DOCS, help="carpeta de salida (por defecto docs/)")
+    parser.add_argument("--forzar", action="store_true", help="reconstruir aunque las entradas no hayan cambiado")
+    parser.add_argument("--hilos", type=entero_positivo, default=4, help="artefactos construidos en paralelo")
+    parser.add_argument("artefactos", nargs="*", help="artefactos a construir (por defecto todos)")
+    args = parser.parse_args(argv)
+    try:
+        validar_seleccion(args.artefactos)
+    except ValueError as error:
+        parser.error(str(error))
+
+    estados = construir(args.salida, args.forzar, args.hilos, args.artefactos or None)
+    for nombre, estado in estados.items():
+        print(f"  {nombre}: {estado}")
+    return 1 if any(e.startswith("error") for e in estados.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
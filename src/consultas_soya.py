@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+from datos_soya import cargar_soya
+
+# Número de cada tabla del USDA dentro de Soy.csv.
+TABLA_EXISTENCIAS = 1          # Existencias por trimestre (en finca, fuera de finca, total)
+TABLA_SUPERFICIE = 2           # Superficie sembrada/cosechada, rendimiento, producción, valor
+TABLA_BALANCE_SOYA = 3         # Oferta, uso y precio de la soya (anual)
+TABLA_BALANCE_HARINA = 4       # Oferta, uso y precio de la harina (anual)
+TABLA_BALANCE_ACEITE = 5       # Oferta, uso y precio del aceite (anual)
+TABLA_SOYA_TRIMESTRAL = 6      # Oferta y uso de la soya por trimestre / mes
+TABLA_HARINA_MENSUAL = 7       # Oferta y uso de la harina por mes
+TABLA_ACEITE_MENSUAL = 8       # Oferta y uso del aceite por mes
+TABLA_VALOR_MENSUAL = 9        # Valor mensual de los productos por bushel procesado
+
+# Periodo que corresponde al total del año comercial.
+TOTAL_ANUAL = "MY Total"
+
+MESES = (
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+)
+
+
+class IndiceSoya:
+    """
+    Índice de varios niveles sobre Soy.csv: tabla × atributo × año × periodo.
+
+    Las filas se ordenan una sola vez por (tabla, atributo, año) y cada par
+    (tabla, atributo) queda como un bloque contiguo cuyo rango se guarda en
+    un diccionario. Una consulta busca el bloque, acota los años con búsqueda
+    binaria y copia solo las filas del resultado, sin recorrer el resto.
+
+    Dentro de cada año los periodos conservan el orden del archivo, que es el
+    del año comercial (por ejemplo septiembre → agosto).
+    """
+
+    def __init__(self, datos):
+        self.datos = datos
+        # Orden estable: empata por posición en el archivo, es decir, por periodo.
+        orden = np.lexsort((
+            datos["Year"].to_numpy(),
+            datos["Attribute_Desc2"].cat.codes.to_numpy(),
+            datos["Table_number"].to_numpy(),
+        ))
+        ordenados = datos.iloc[orden]
+
+        self.años = ordenados["Year"].to_numpy()
+        self.periodos = ordenados["Timeperiod_Desc"].to_numpy(dtype=object)
+        self.montos = ordenados["Amount"].to_numpy()
+        self.unidades = ordenados["Unit_Desc"].to_numpy(dtype=object)
+
+        tablas = ordenados["Table_number"].to_numpy()
+        atributos = ordenados["Attribute_Desc2"].to_numpy(dtype=object)
+        cortes = np.flatnonzero((tablas[1:] != tablas[:-1]) | (atributos[1:] != atributos[:-1])) + 1
+        inicios = np.concatenate(([0], cortes))
+        fines = np.concatenate((cortes, [len(tablas)]))
+
+        # {(tabla, atributo): (inicio, fin)} con el rango de filas de cada serie.
+        self.bloques = {
+            (int(tablas[i]), atributos[i]): (int(i), int(f)) for i, f in zip(inicios, fines)
+        }
+        self.nombres_tablas = dict(
+            datos.groupby("Table_number", observed=True)["Table_name"].first().items()
+        )
+
+        # Alias: en las tablas 1 a 8 Attribute_Desc y Attribute_Desc2 coinciden;
+        # en la 9 Attribute_Desc ("Yield", "Price"...) se repite para cada producto.
+        pares = datos[["Table_number", "Attribute_Desc", "Attribute_Desc2"]].drop_duplicates()
+        self._alias = {}
+        for tabla, corto, largo in pares.itertuples(index=False):
+            self._alias.setdefault((int(tabla), corto), []).append(largo)
+
+    def atributos(self, tabla):
+        """Lista de atributos (Attribute_Desc2) disponibles en una tabla."""
+        return [atributo for (t, atributo) in self.bloques if t == tabla]
+
+    def _bloque(self, tabla, atributo):
+        if (tabla, atributo) in self.bloques:
+            return self.bloques[(tabla, atributo)]
+        opciones = self._alias.get((tabla, atributo), [])
+        if len(opciones) == 1:
+            return self.bloques[(tabla, opciones[0])]
+        if opciones:
+            raise KeyError(f"'{atributo}' es ambiguo en la tabla {tabla}; opciones: {', '.join(opciones)}")
+        raise KeyError(f"La tabla {tabla} no tiene el atributo '{atributo}'.")
+
+    def _rango(self, tabla, atributo, desde, hasta):
+        # Los años de un bloque están ordenados: se acotan con búsqueda binaria.
+        base, limite = self._bloque(tabla, atributo)
+        años = self.años[base:limite]
+        inicio = base + int(np.searchsorted(años, desde, side="left")) if desde is not None else base
+        fin = base + int(np.searchsorted(años, hasta, side="right")) if hasta is not None else limite
+        return inicio, max(inicio, fin)
+
+    def consultar(self, tabla, atributo, desde=None, hasta=None, periodos=None):
+        """
+        Filas de una serie en formato ordenado (tidy).
+
+        Parámetros:
+            tabla: número de tabla (ver las constantes TABLA_*).
+            atributo: Attribute_Desc2, o Attribute_Desc si no es ambiguo.
+            desde, hasta: años comerciales inicial y final (incluidos); None = sin límite.
+            periodos: periodo o lista de periodos a conservar (por ejemplo
+                TOTAL_ANUAL o MESES); None = todos.
+
+        Retorna:
+            DataFrame con columnas Year, Periodo, Amount y Unit.
+        """
+        inicio, fin = self._rango(tabla, atributo, desde, hasta)
+        resultado = pd.DataFrame({
+            "Year": self.años[inicio:fin],
+            "Periodo": self.periodos[inicio:fin],
+            "Amount": self.montos[inicio:fin],
+            "Unit": self.unidades[inicio:fin],
+        })
+        if periodos is not None:
+            if isinstance(periodos, str):
+                periodos = [periodos]
+            resultado = resultado[resultado["Periodo"].isin(periodos)].reset_index(drop=True)
+        return resultado
+
+    def serie(self, tabla, atributo, desde=None, hasta=None, periodo=TOTAL_ANUAL):
+        """
+        Serie anual como arreglos de NumPy.
+
+        Retorna:
+            años: arreglo int16.
+            montos: arreglo float64 (NaN donde el USDA no publicó dato).
+        """
+        inicio, fin = self._rango(tabla, atributo, desde, hasta)
+        conservar = self.periodos[inicio:fin] == periodo
+        return self.años[inicio:fin][conservar], self.montos[inicio:fin][conservar]
+
+    def mensual(self, tabla, atributo, desde=None, hasta=None):
+        """
+        Datos mensuales como tabla año × mes (columnas en el orden del año comercial).
+        Los totales anuales y trimestrales se excluyen.
+        """
+        filas = self.consultar(tabla, atributo, desde, hasta, periodos=MESES)
+        columnas = list(dict.fromkeys(filas["Periodo"]))
+        return filas.pivot(index="Year", columns="Periodo", values="Amount")[columnas]
+
+
+_indice = None
+
+
+def indice_soya(datos=None):
+    """
+    Retorna el índice de Soy.csv, construido una sola vez por proceso
+    (se reconstruye si cargar_soya() devuelve datos nuevos).
+    """
+    global _indice
+    if datos is None:
+        datos = cargar_soya()
+    if _indice is None or _indice.datos is not datos:
+        _indice = IndiceSoya(datos)
+    return _indice
+
+
+if __name__ == "__main__":
+    indice = indice_soya()
+
+    años, produccion = indice.serie(TABLA_BALANCE_SOYA, "Production", 2000, 2024)
+    print(f"Producción de soya {años[0]}–{años[-1]} (millones de bushels):")
+    print(np.column_stack((años, produccion)))
+
+    print("\nExportaciones mensuales de aceite (miles de libras):")
+    print(indice.mensual(TABLA_ACEITE_MENSUAL, "Exports", 2020, 2023))
@@ -0,0 +1,134 @@
+import glob
+import os
+import pickle
+
+import pandas as pd
+
+from cache_rutas import DIRECTORIO_CACHE
+
+# Archivo de datos de soya (USDA) incluido en el repositorio.
+RUTA_SOYA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dataset", "Soy.csv")
+
+# Tipos explícitos para cada columna. Las columnas de texto repiten pocos
+# valores (entre 2 y 45 distintos en ~9.400 filas), así que como "category"
+# se guardan una sola vez y cada fila solo ocupa un código entero.
+TIPOS_SOYA = {
+    "Timeperiod_Desc": "category",
+    "Marketing_Year": "category",
+    "MY_Definition": "category",
+    "Commodity": "category",
+    "Attribute_Desc": "category",
+    "Attribute_Desc2": "category",
+    "Amount": "float64",
+    "Unit_Desc": "category",
+    "Table_number": "int8",
+    "Table_name": "category",
+}
+
+# Formato del archivo binario: Feather (columnar, requiere pyarrow) o, si
+# pyarrow no está instalado, pickle de pandas, que también conserva los tipos.
+try:
+    import pyarrow  # noqa: F401
+    EXTENSION_CACHE = "feather"
+except ImportError:
+    EXTENSION_CACHE = "pkl"
+
+_cargados = {}
+
+
+def _leer_csv(ruta):
+    """
+    Lee el CSV con tipos explícitos y agrega la columna "Year".
+
+    "Year" es el año inicial de "Marketing_Year" ("2023/24" → 2023). Se calcula
+    sobre las categorías (45 valores) y no fila por fila.
+    """
+    datos = pd.read_csv(ruta, dtype=TIPOS_SOYA, encoding="utf-8-sig")
+    años = datos["Marketing_Year"].cat.categories.str[:4].astype("int16")
+    datos["Year"] = años.to_numpy()[datos["Marketing_Year"].cat.codes.to_numpy()]
+    return datos
+
+
+def _firma(ruta):
+    # Si el CSV cambia, cambian su fecha de modificación o su tamaño.
+    info = os.stat(ruta)
+    return f"{info.st_mtime_ns}-{info.st_size}"
+
+
+def _archivo_cache(ruta, firma):
+    nombre = os.path.splitext(os.path.basename(ruta))[0]
+    return os.path.join(DIRECTORIO_CACHE, f"{nombre}-{firma}.{EXTENSION_CACHE}")
+
+
+def _guardar_cache(datos, archivo):
+    os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+    temporal = archivo + ".tmp"
+    if EXTENSION_CACHE == "feather":
+        datos.to_feather(temporal)
+    else:
+        datos.to_pickle(temporal)
+    # Se reemplaza de forma atómica para no dejar un archivo a medio escribir.
+    os.replace(temporal, archivo)
+
+
+def _leer_cache(archivo):
+    if EXTENSION_CACHE == "feather":
+        return pd.read_feather(archivo)
+    return pd.read_pickle(archivo)
+
+
+def cargar_soya(ruta=RUTA_SOYA, usar_cache=True):
+    """
+    Carga el dataset de soya con tipos compactos y la columna "Year" ya calculada.
+
+    Parámetros:
+        ruta: ruta del CSV.
+        usar_cache: si es True se usa una copia binaria en la cache local, que
+            se invalida sola cuando cambia la fecha o el tamaño del CSV.
+
+    Retorna:
+        DataFrame con las columnas del CSV más "Year" (int16). Dentro de un
+        mismo proceso se retorna siempre el mismo objeto: no se debe modificar
+        (usar .copy() si hace falta).
+
+    Lanza FileNotFoundError si el CSV no existe.
+    """
+    firma = _firma(ruta)
+    clave = (os.path.abspath(ruta), firma)
+    if clave in _cargados:
+        return _cargados[clave]
+
+    if not usar_cache:
+        datos = _leer_csv(ruta)
+    else:
+        archivo = _archivo_cache(ruta, firma)
+        try:
+            datos = _leer_cache(archivo)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            # No hay copia para esta versión del CSV (o está dañada).
+            datos = _leer_csv(ruta)
+            # Se borran las copias de versiones anteriores del CSV.
+            patron = _archivo_cache(ruta, "*")
+            for viejo in glob.glob(patron):
+                os.remove(viejo)
+            _guardar_cache(datos, archivo)
+
+    _cargados[clave] = datos
+    return datos
+
+
+if __name__ == "__main__":
+    import time
+
+    original = pd.read_csv(RUTA_SOYA, encoding="utf-8-sig")
+    print(f"CSV sin tipos: {original.memory_usage(deep=True).sum() / 1e6:.2f} MB")
+
+    inicio = time.perf_counter()
+    datos = cargar_soya()
+    print(f"Primera carga: {time.perf_counter() - inicio:.3f} s")
+
+    _cargados.clear()
+    inicio = time.perf_counter()
+    datos = cargar_soya()
+    print(f"Carga desde la cache ({EXTENSION_CACHE}): {time.perf_counter() - inicio:.3f} s")
+    print(f"Con tipos explícitos: {datos.memory_usage(deep=True).sum() / 1e6:.2f} MB")
@@ -0,0 +1,146 @@
+import numpy as np
+from geopy.distance import geodesic
+
+# Radio medio de la Tierra (IUGG) usado por la fórmula de haversine.
+RADIO_TIERRA_M = 6371008.8
+
+# Elipsoide WGS-84, el mismo que usa geopy.geodesic.
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = (1 - WGS84_F) * WGS84_A
+
+# Modos de precisión disponibles:
+# - "haversine": esfera, error < 0.5 %, el más rápido (opcional, para cálculos aproximados).
+# - "vincenty": elipsoide WGS-84 vectorizado, precisión submilimétrica.
+# - "karney": geopy.geodesic punto a punto (referencia exacta, el más lento).
+# Por defecto se usa "vincenty": da los mismos totales que geopy.geodesic
+# (el cálculo original de los grafos) y vectorizado sigue siendo rápido.
+MODOS = ("haversine", "vincenty", "karney")
+MODO_POR_DEFECTO = "vincenty"
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """
+    Distancia de gran círculo en metros entre dos conjuntos de puntos (en grados).
+
+    Acepta números o arreglos de NumPy y aplica broadcasting, así que sirve
+    tanto para pares de puntos como para matrices completas.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIO_TIERRA_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def a_cartesianas(puntos):
+    """
+    Convierte puntos (lat, lon) en grados a coordenadas 3D sobre la esfera, en metros.
+
+    La distancia euclídea entre dos de estos puntos es la cuerda del gran
+    círculo, que crece igual que la distancia haversine: un KD-tree sobre
+    estas coordenadas responde consultas de vecinos geodésicos exactas.
+    """
+    puntos = np.asarray(puntos, dtype=np.float64).reshape(-1, 2)
+    lat, lon = np.radians(puntos[:, 0]), np.radians(puntos[:, 1])
+    return RADIO_TIERRA_M * np.column_stack(
+        (np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat))
+    )
+
+
+def cuerda_a_arco(cuerda_m):
+    """Distancia de gran círculo (m) que corresponde a una cuerda de a_cartesianas()."""
+    return 2 * RADIO_TIERRA_M * np.arcsin(np.clip(np.asarray(cuerda_m) / (2 * RADIO_TIERRA_M), 0.0, 1.0))
+
+
+def arco_a_cuerda(arco_m):
+    """Inversa de cuerda_a_arco(): cuerda equivalente a una distancia de gran círculo."""
+    return 2 * RADIO_TIERRA_M * np.sin(np.minimum(np.asarray(arco_m) / (2 * RADIO_TIERRA_M), np.pi / 2))
+
+
+def vincenty_m(lat1, lon1, lat2, lon2, tolerancia=1e-12, max_iteraciones=200):
+    """
+    Distancia sobre el elipsoide WGS-84 (fórmula inversa de Vincenty), vectorizada.
+
+    Todas las parejas se iteran a la vez; las pocas que no convergen
+    (puntos casi antípodas) se calculan con geopy.geodesic.
+    """
+    # Se trabaja con arreglos planos y al final se recupera la forma original.
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (lat1, lon1, lat2, lon2))
+    )
+    forma = lat1.shape
+    lat1, lon1, lat2, lon2 = (v.ravel() for v in (lat1, lon1, lat2, lon2))
+    f = WGS84_F
+    L = np.radians(lon2 - lon1)
+    U1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+    U2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+
+    lam = L.copy()
+    convergido = np.zeros(L.shape, dtype=bool)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(max_iteraciones):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(cosU2 * sin_lam, cosU1 * sinU2 - sinU1 * cosU2 * cos_lam)
+            cos_sigma = sinU1 * sinU2 + cosU1 * cosU2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cosU1 * cosU2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha ** 2
+            # En líneas ecuatoriales cos2_alpha = 0 y el término se anula.
+            cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sinU1 * sinU2 / cos2_alpha)
+            C = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+            lam_anterior = lam
+            lam = L + (1 - C) * f * sin_alpha * (
+                sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2))
+            )
+            convergido = np.abs(lam - lam_anterior) < tolerancia
+            if convergido.all():
+                break
+
+        u2 = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+        A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+        B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+        delta_sigma = B * sin_sigma * (
+            cos_2sigma_m + B / 4 * (
+                cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+                - B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)
+            )
+        )
+        distancia = WGS84_B * A * (sigma - delta_sigma)
+
+    # Puntos idénticos: distancia cero.
+    distancia = np.where(sin_sigma == 0, 0.0, distancia)
+
+    pendientes = ~convergido | ~np.isfinite(distancia)
+    for i in np.flatnonzero(pendientes):
+        distancia[i] = geodesic((lat1[i], lon1[i]), (lat2[i], lon2[i])).meters
+
+    return distancia.reshape(forma)
+
+
+def longitudes_segmentos(route_points, modo=MODO_POR_DEFECTO):
+    """
+    Calcula en una sola pasada la longitud (m) de cada tramo consecutivo de una ruta.
+
+    Parámetros:
+        route_points: lista de tuplas (lat, lon) o arreglo (n, 2).
+        modo: "haversine", "vincenty" o "karney" (ver MODOS).
+
+    Retorna:
+        Arreglo float64 de n - 1 longitudes; el elemento i es la distancia
+        entre route_points[i] y route_points[i + 1].
+    """
+    puntos = np.asarray(route_points, dtype=np.float64).reshape(-1, 2)
+    if len(puntos) < 2:
+        return np.empty(0)
+
+    lat1, lon1 = puntos[:-1, 0], puntos[:-1, 1]
+    lat2, lon2 = puntos[1:, 0], puntos[1:, 1]
+
+    if modo == "haversine":
+        return haversine_m(lat1, lon1, lat2, lon2)
+    if modo == "vincenty":
+        return vincenty_m(lat1, lon1, lat2, lon2)
+    if modo == "karney":
+        return np.array([geodesic(p1, p2).meters for p1, p2 in zip(puntos[:-1], puntos[1:])])
+    raise ValueError(f"Modo de distancia desconocido: {modo}. Opciones: {', '.join(MODOS)}")
@@ -0,0 +1,365 @@
+# Enrutadores intercambiables detrás de rutas_osrm.get_osrm_route().
+#
+# - "osrm": servidor HTTP de OSRM (por defecto el público, OSRM_URL).
+# - "local": servidor compatible con OSRM en esta máquina: un osrm-routed propio
+#   o ServidorLocal de este módulo, en AGROPATH_OSRM_LOCAL.
+# - "grafo": sin red ni servidor; A* sobre una RedVial guardada en un .npz.
+#
+# El enrutador se elige con la variable de entorno AGROPATH_ENRUTADOR o con
+# configurar_enrutador(). Así las rutas se pueden generar en máquinas sin
+# acceso a internet y las pruebas pueden usar una red fija y reproducible.
+#
+# Uso:
+#   python src/enrutadores.py construir [--desde-html docs/rutas_unificadas.html] [--archivo cache/red_vial.npz]
+#   python src/enrutadores.py servir [--puerto 5000] [--archivo cache/red_vial.npz]
+#   python src/enrutadores.py ruta 40.92,-89.53 39.481427,-88.303999
+
+import argparse
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+import rutas_osrm
+from cache_rutas import DIRECTORIO_CACHE, cache_por_defecto
+from matriz_distancias import VELOCIDAD_PROMEDIO_KMH
+from red_vial import RedVial
+
+ENRUTADORES = ("osrm", "local", "grafo")
+
+# Servidor compatible con OSRM para el enrutador "local".
+URL_LOCAL = os.environ.get("AGROPATH_OSRM_LOCAL", "http://127.0.0.1:5000")
+
+# Red vial para el enrutador "grafo" (se crea con: python src/enrutadores.py construir).
+ARCHIVO_GRAFO = os.environ.get("AGROPATH_GRAFO", os.path.join(DIRECTORIO_CACHE, "red_vial.npz"))
+
+# Distancia máxima (m) entre un punto pedido y el nodo de la red más cercano.
+# Más lejos se considera que el punto está fuera de la red (OSRM responde "NoRoute").
+DISTANCIA_MAX_AJUSTE_M = 2000.0
+
+_enrutador = None
+_lock_enrutador = threading.Lock()
+
+
+class EnrutadorOSRM:
+    """Rutas desde un servidor HTTP de OSRM (el público o uno local)."""
+
+    def __init__(self, url=rutas_osrm.OSRM_URL, reintentos=2, espera_inicial=0.5):
+        self.nombre = "osrm" if url == rutas_osrm.OSRM_URL else "local"
+        self.url = url
+        self.reintentos = reintentos
+        self.espera_inicial = espera_inicial
+
+    def clave_cache(self, profile):
+        # Las rutas del servidor público conservan las claves de cache de siempre;
+        # las de otro servidor se guardan aparte.
+        return profile if self.url == rutas_osrm.OSRM_URL else f"{self.url}|{profile}"
+
+    def ruta(self, origen, destino, profile="driving", reintentos=None, espera_inicial=None):
+        """Retorna (route_points, distance_m) entre dos puntos (lat, lon)."""
+        return rutas_osrm._consultar_osrm(
+            origen, destino, profile, self.url,
+            self.reintentos if reintentos is None else reintentos,
+            self.espera_inicial if espera_inicial is None else espera_inicial,
+        )
+
+
+class EnrutadorGrafo:
+    """
+    Rutas calculadas en el propio proceso sobre una red vial guardada.
+
+    Los puntos pedidos se ajustan al nodo más cercano de la red (como hace
+    OSRM) y el camino se busca con A* (RedVial.camino_astar). No usa la cache
+    en disco: calcular la ruta en memoria es tan rápido como leerla.
+    """
+
+    nombre = "grafo"
+
+    def __init__(self, red, distancia_max_ajuste_m=DISTANCIA_MAX_AJUSTE_M):
+        self.red = red
+        self.distancia_max_ajuste_m = distancia_max_ajuste_m
+
+    @classmethod
+    def cargar(cls, archivo=ARCHIVO_GRAFO, **opciones):
+        if not os.path.exists(archivo):
+            raise FileNotFoundError(
+                f"No existe la red vial {archivo}. Créala con: python src/enrutadores.py construir"
+            )
+        return cls(RedVial.cargar(archivo), **opciones)
+
+    def clave_cache(self, profile):
+        return None
+
+    def _nodo(self, punto):
+        i, distancia = self.red.nodo_mas_cercano(punto)
+        if distancia > self.distancia_max_ajuste_m:
+            raise ValueError(
+                f"El punto {tuple(punto)} está a {distancia:.0f} m de la red vial "
+                f"(máximo {self.distancia_max_ajuste_m:.0f} m)."
+            )
+        return i
+
+    def ruta(self, origen, destino, profile="driving", **_):
+        """Retorna (route_points, distance_m) entre dos puntos (lat, lon)."""
+        # El ajuste a la red se hace una sola vez y se busca entre esos nodos.
+        return self.red.camino_entre_nodos(self._nodo(origen), self._nodo(destino))
+
+    def tabla(self, origenes, destinos):
+        """
+        Matrices de distancia (m) y duración (s) por la red, como /table de OSRM.
+
+        Un Dijkstra por origen distinto; las celdas sin camino quedan en NaN.
+        """
+        ids_o = np.array([self._nodo(p) for p in origenes], dtype=np.int64)
+        ids_d = np.array([self._nodo(p) for p in destinos], dtype=np.int64)
+        distancias = np.full((len(ids_o), len(ids_d)), np.nan)
+        if len(ids_o) and len(ids_d):
+            unicos, inverso = np.unique(ids_o, return_inverse=True)
+            completas = dijkstra(self.red.matriz(), indices=unicos)[:, ids_d][inverso.ravel()]
+            distancias = np.where(np.isfinite(completas), completas, np.nan)
+        return distancias, distancias / (VELOCIDAD_PROMEDIO_KMH / 3.6)
+
+
+def crear_enrutador(nombre=None):
+    """
+    Crea el enrutador `nombre` ("osrm", "local" o "grafo").
+    Si `nombre` es None se usa AGROPATH_ENRUTADOR (por defecto "osrm").
+    """
+    nombre = nombre or os.environ.get("AGROPATH_ENRUTADOR", "osrm")
+    if nombre == "osrm":
+        return EnrutadorOSRM()
+    if nombre == "local":
+        return EnrutadorOSRM(URL_LOCAL)
+    if nombre == "grafo":
+        return EnrutadorGrafo.cargar()
+    raise ValueError(f"Enrutador desconocido: {nombre}. Opciones: {', '.join(ENRUTADORES)}")
+
+
+def configurar_enrutador(enrutador):
+    """
+    Fija el enrutador del proceso: un nombre de ENRUTADORES o un objeto con
+    los métodos ruta() y clave_cache(). None vuelve a leer AGROPATH_ENRUTADOR.
+    """
+    global _enrutador
+    with _lock_enrutador:
+        _enrutador = crear_enrutador(enrutador) if isinstance(enrutador, str) else enrutador
+    return _enrutador
+
+
+def enrutador_actual():
+    """Retorna el enrutador del proceso, creándolo la primera vez."""
+    global _enrutador
+    with _lock_enrutador:
+        if _enrutador is None:
+            _enrutador = crear_enrutador()
+        return _enrutador
+
+
+# ------------------------------------------------------
+# Red vial local
+# ------------------------------------------------------
+
+def construir_red(rutas=None, archivo=ARCHIVO_GRAFO):
+    """
+    Crea la red vial para el enrutador "grafo" y la guarda en `archivo`.
+
+    Parámetros:
+        rutas: listas de puntos (lat, lon). Si es None se usan todas las rutas
+            guardadas en la cache de OSRM (ver cache_rutas.py).
+        archivo: .npz de salida.
+
+    Retorna:
+        La RedVial construida.
+    """
+    if rutas is None:
+        rutas = list(cache_por_defecto().geometrias())
+    if not rutas:
+        raise ValueError("No hay rutas para construir la red vial.")
+    red = RedVial.desde_rutas(rutas)
+    os.makedirs(os.path.dirname(os.path.abspath(archivo)), exist_ok=True)
+    red.guardar(archivo)
+    return red
+
+
+# ------------------------------------------------------
+# Servidor compatible con OSRM
+# ------------------------------------------------------
+
+def _coordenadas(texto):
+    # "lon,lat;lon,lat" (formato de OSRM) → lista de (lat, lon).
+    return [(float(lat), float(lon)) for lon, lat in (par.split(",") for par in texto.split(";"))]
+
+
+def _indices(valor, total):
+    # "sources"/"destinations" de /table: "all" o posiciones separadas por ";".
+    if valor is None or valor == "all":
+        return list(range(total))
+    indices = [int(i) for i in valor.split(";")]
+    if not all(0 <= i < total for i in indices):
+        raise ValueError(f"índice fuera de rango (hay {total} coordenadas): {valor}")
+    return indices
+
+
+class ServidorLocal:
+    """
+    Servidor HTTP que responde /route/v1 y /table/v1 con el formato de OSRM,
+    usando un EnrutadorGrafo. Sirve como reemplazo local del servidor público
+    (enrutador "local") y como servidor de prueba reproducible.
+
+    Uso:
+        with ServidorLocal(EnrutadorGrafo.cargar(), puerto=0) as servidor:
+            configurar_enrutador(EnrutadorOSRM(servidor.url))
+    """
+
+    def __init__(self, enrutador, host="127.0.0.1", puerto=5000):
+        self.enrutador = enrutador
+        self.servidor = ThreadingHTTPServer((host, puerto), self._manejador())
+        self._hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self.servidor.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def _manejador(self):
+        enrutador = self.enrutador
+
+        class Manejador(BaseHTTPRequestHandler):
+            def _responder(self, estado, datos):
+                cuerpo = json.dumps(datos, separators=(",", ":")).encode("utf-8")
+                self.send_response(estado)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def do_GET(self):
+                partes = urlsplit(self.path)
+                segmentos = partes.path.strip("/").split("/")
+                if len(segmentos) != 4 or segmentos[0] not in ("route", "table"):
+                    return self._responder(400, {"code": "InvalidUrl", "message": partes.path})
+                # Errores de la consulta (coordenadas, índices) → InvalidQuery, como OSRM.
+                try:
+                    puntos = _coordenadas(segmentos[3])
+                    if segmentos[0] == "route":
+                        if len(puntos) < 2:
+                            raise ValueError("se necesitan al menos dos coordenadas")
+                    else:
+                        consulta = parse_qs(partes.query)
+                        fuentes = _indices(consulta.get("sources", [None])[0], len(puntos))
+                        destinos = _indices(consulta.get("destinations", [None])[0], len(puntos))
+                except ValueError as e:
+                    return self._responder(400, {"code": "InvalidQuery", "message": str(e)})
+
+                try:
+                    if segmentos[0] == "route":
+                        # Con más de dos coordenadas la ruta pasa por todas, un tramo por par.
+                        camino, tramos = [], []
+                        for origen, destino in zip(puntos[:-1], puntos[1:]):
+                            puntos_tramo, distancia_tramo = enrutador.ruta(origen, destino, segmentos[2])
+                            # El inicio de cada tramo repite el final del anterior.
+                            camino.extend(puntos_tramo[1:] if camino else puntos_tramo)
+                            tramos.append({"distance": distancia_tramo,
+                                           "duration": distancia_tramo / (VELOCIDAD_PROMEDIO_KMH / 3.6)})
+                        distancia = sum(t["distance"] for t in tramos)
+                        return self._responder(200, {"code": "Ok", "routes": [{
+                            "geometry": {"type": "LineString", "coordinates": [[lon, lat] for lat, lon in camino]},
+                            "distance": distancia,
+                            "duration": distancia / (VELOCIDAD_PROMEDIO_KMH / 3.6),
+                            "legs": tramos,
+                        }]})
+
+                    distancias, duraciones = enrutador.tabla([puntos[i] for i in fuentes], [puntos[j] for j in destinos])
+                    # Las celdas sin ruta van como null, igual que en OSRM.
+                    nulos = lambda m: [[None if np.isnan(v) else float(v) for v in fila] for fila in m]
+                    return self._responder(200, {"code": "Ok", "distances": nulos(distancias),
+                                                 "durations": nulos(duraciones)})
+                except ValueError as e:
+                    return self._responder(400, {"code": "NoRoute", "message": str(e)})
+                except Exception as e:
+                    # Cualquier otro fallo es del servidor: se responde en vez de cortar la conexión.
+                    return self._responder(500, {"code": "InternalError", "message": str(e)})
+
+            def log_message(self, *args):
+                pass
+
+        return Manejador
+
+    def iniciar(self):
+        """Atiende peticiones en un hilo de fondo."""
+        self._hilo = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+
+def _punto(texto):
+    lat, lon = texto.split(",")
+    return float(lat), float(lon)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Enrutamiento sin conexión sobre una red vial local.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    construir = sub.add_parser("construir", help="crea la red vial a partir de la cache de rutas o de un mapa HTML")
+    construir.add_argument("--desde-html", help="mapa HTML de folium del que se leen las rutas (L.polyline)")
+    construir.add_argument("--archivo", default=ARCHIVO_GRAFO)
+
+    servir = sub.add_parser("servir", help="servidor compatible con OSRM sobre la red vial")
+    servir.add_argument("--archivo", default=ARCHIVO_GRAFO)
+    servir.add_argument("--host", default="127.0.0.1")
+    servir.add_argument("--puerto", type=int, default=5000)
+
+    ruta = sub.add_parser("ruta", help="calcula una ruta con el enrutador configurado")
+    ruta.add_argument("origen", type=_punto, help="lat,lon")
+    ruta.add_argument("destino", type=_punto, help="lat,lon")
+    ruta.add_argument("--enrutador", choices=ENRUTADORES, default=None)
+
+    args = parser.parse_args(argv)
+    try:
+        if args.comando == "construir":
+            rutas = None
+            if args.desde_html:
+                from benchmark_distancias import cargar_rutas
+                rutas = cargar_rutas(args.desde_html)
+            red = construir_red(rutas, args.archivo)
+            print(f"Red vial guardada en {args.archivo}: {red.num_nodos} nodos, {red.num_aristas} aristas.")
+        elif args.comando == "servir":
+            servidor = ServidorLocal(EnrutadorGrafo.cargar(args.archivo), args.host, args.puerto)
+            print(f"Servidor compatible con OSRM en {servidor.url} (Ctrl+C para terminar).")
+            try:
+                servidor.servidor.serve_forever()
+            except KeyboardInterrupt:
+                servidor.servidor.server_close()
+        else:
+            # Al ejecutarse como script este archivo es __main__; get_osrm_route()
+            # lee el enrutador del módulo importado "enrutadores".
+            import enrutadores
+
+            if args.enrutador:
+                enrutadores.configurar_enrutador(args.enrutador)
+            puntos, distancia = rutas_osrm.get_osrm_route(args.origen, args.destino)
+            print(f"{distancia / 1000:.2f} km, {len(puntos)} puntos ({enrutadores.enrutador_actual().nombre}).")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
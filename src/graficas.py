@@ -0,0 +1,220 @@
+# Gráficas de las series de Soy.csv sin interfaz gráfica.
+#
+# Se usan objetos Figure de matplotlib directamente (lienzo Agg), sin pyplot:
+# no se abre ninguna ventana, no hay estado global compartido y el código
+# funciona igual en un servidor sin pantalla. Cada gráfica se identifica por
+# el hash de sus datos y parámetros; si no cambiaron, no se vuelve a dibujar.
+#
+# Uso: python src/graficas.py [--salida docs/graficas] [--formato svg] [--procesos N] [--forzar]
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from cache_rutas import DIRECTORIO_CACHE
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DIRECTORIO_GRAFICAS = os.path.join(RAIZ, "docs", "graficas")
+ARCHIVO_MANIFIESTO = os.path.join(DIRECTORIO_CACHE, "graficas.json")
+
+# Imágenes de la regresión que usa la página prediccion.html.
+ARCHIVOS_REGRESION = (
+    os.path.join(RAIZ, "docs", "regresion_soya.svg"),
+    os.path.join(RAIZ, "assets", "regresion_soya.svg"),
+    os.path.join(RAIZ, "assets", "regresion_soya.png"),
+)
+
+FORMATOS = ("svg", "png")
+
+
+def dibujar_regresion(ax, años, y, y_pred, etiqueta_y="Millions_bushels", inferior=None, superior=None, titulo=None):
+    """
+    Dibuja en `ax` los puntos reales y la recta de regresión (una sola vez,
+    por encima de los puntos). Si se pasan `inferior` y `superior` se
+    sombrea el intervalo de predicción.
+    """
+    ax.scatter(años, y)
+    if inferior is not None and superior is not None:
+        ax.fill_between(años, inferior, superior, color="red", alpha=0.12, linewidth=0)
+    ax.plot(años, y_pred, color="red")
+    ax.set_xlabel("Year")
+    ax.set_ylabel(etiqueta_y)
+    ax.grid(False)
+    if titulo:
+        ax.set_title(titulo)
+
+
+def guardar_grafica(archivo, años, y, y_pred, **opciones):
+    """
+    Crea la figura y la guarda en `archivo`; el formato (PNG o SVG) se toma
+    de la extensión. `opciones` se pasan a dibujar_regresion().
+    """
+    fig = Figure(figsize=(6.4, 4.8))
+    dibujar_regresion(fig.subplots(), años, y, y_pred, **opciones)
+    # Sin fecha en los metadatos del SVG: mismo dato → mismo archivo.
+    metadatos = {"Date": None} if archivo.endswith(".svg") else None
+    carpeta = os.path.dirname(os.path.abspath(archivo))
+    os.makedirs(carpeta, exist_ok=True)
+    fig.savefig(archivo, metadata=metadatos)
+    return archivo
+
+
+def _renderizar(tarea):
+    # Función de nivel de módulo para poder enviarla a otros procesos.
+    guardar_grafica(tarea["archivo"], tarea["años"], tarea["y"], tarea["y_pred"], **tarea["opciones"])
+    return tarea["archivo"]
+
+
+def hash_tarea(tarea):
+    """Hash de los datos y parámetros de una gráfica, más el código de este módulo."""
+    sha = hashlib.sha256()
+    for clave in ("años", "y", "y_pred"):
+        sha.update(np.ascontiguousarray(tarea[clave], dtype=np.float64).tobytes())
+    opciones = {
+        k: (np.asarray(v, dtype=np.float64).tolist() if isinstance(v, np.ndarray) else v)
+        for k, v in tarea["opciones"].items()
+    }
+    sha.update(json.dumps(opciones, sort_keys=True).encode("utf-8"))
+    with open(__file__, "rb") as archivo:
+        sha.update(archivo.read())
+    return sha.hexdigest()
+
+
+def _cargar_manifiesto():
+    try:
+        with open(ARCHIVO_MANIFIESTO, encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def renderizar_lote(tareas, procesos=None, forzar=False):
+    """
+    Dibuja varias gráficas en paralelo con un grupo de procesos.
+
+    Parámetros:
+        tareas: lista de diccionarios con "archivo", "años", "y", "y_pred" y
+            "opciones" (argumentos de dibujar_regresion).
+        procesos: número de procesos; None usa todos los núcleos.
+        forzar: si es True se dibujan todas aunque no hayan cambiado.
+
+    Retorna:
+        Diccionario {archivo: "renderizada" | "sin cambios"}.
+    """
+    manifiesto = _cargar_manifiesto()
+    estados, pendientes = {}, []
+    for tarea in tareas:
+        ruta = os.path.abspath(tarea["archivo"])
+        tarea["hash"] = hash_tarea(tarea)
+        if not forzar and manifiesto.get(ruta) == tarea["hash"] and os.path.exists(ruta):
+            estados[tarea["archivo"]] = "sin cambios"
+        else:
+            pendientes.append(tarea)
+
+    if len(pendientes) == 1 or procesos == 1:
+        # No vale la pena arrancar procesos para una sola gráfica.
+        terminados = [_renderizar(t) for t in pendientes]
+    elif pendientes:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            terminados = list(pool.map(_renderizar, pendientes, chunksize=4))
+    else:
+        terminados = []
+
+    for tarea, archivo in zip(pendientes, terminados):
+        manifiesto[os.path.abspath(archivo)] = tarea["hash"]
+        estados[archivo] = "renderizada"
+
+    os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+    with open(ARCHIVO_MANIFIESTO, "w", encoding="utf-8") as archivo:
+        json.dump(manifiesto, archivo, indent=2, sort_keys=True)
+    return estados
+
+
+def _nombre_archivo(tabla, atributo, formato):
+    limpio = re.sub(r"[^a-z0-9]+", "_", atributo.lower()).strip("_")
+    return f"tabla{tabla}_{limpio}.{formato}"
+
+
+def tareas_series(directorio=DIRECTORIO_GRAFICAS, formato="svg", claves=None, con_intervalo=True):
+    """
+    Prepara una tarea de gráfica por cada serie de Soy.csv (tendencia de pronosticos.py).
+
+    Parámetros:
+        directorio: carpeta de salida.
+        formato: "svg" o "png".
+        claves: lista de (tabla, atributo) a dibujar; None dibuja todas.
+        con_intervalo: sombrear el intervalo de predicción del 95 %.
+    """
+    from consultas_soya import indice_soya
+    from pronosticos import modelo_soya
+
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato}. Opciones: {', '.join(FORMATOS)}")
+
+    años, series, modelo = modelo_soya()
+    indice = indice_soya()
+    media, inferior, superior = modelo.predecir(años)
+
+    tareas = []
+    for clave in claves or modelo.claves:
+        i = modelo.indice(*clave)
+        con_datos = ~np.isnan(series[:, i]) & ~np.isnan(media[:, i])
+        if con_datos.sum() < 3:
+            continue
+        opciones = {
+            "etiqueta_y": indice.unidades[indice.bloques[clave][0]],
+            "titulo": f"{clave[1]} (tabla {clave[0]})",
+        }
+        if con_intervalo:
+            opciones["inferior"] = inferior[con_datos, i]
+            opciones["superior"] = superior[con_datos, i]
+        tareas.append({
+            "archivo": os.path.join(directorio, _nombre_archivo(clave[0], clave[1], formato)),
+            "años": años[con_datos],
+            "y": series[con_datos, i],
+            "y_pred": media[con_datos, i],
+            "opciones": opciones,
+        })
+    return tareas
+
+
+def tareas_regresion(archivos=ARCHIVOS_REGRESION):
+    """Tareas para las imágenes de prediccion.html (existencias totales en millones de bushels)."""
+    from consultas_soya import TABLA_EXISTENCIAS
+    from pronosticos import modelo_soya
+
+    años, series, modelo = modelo_soya()
+    i = modelo.indice(TABLA_EXISTENCIAS, "Total storage")
+    con_datos = ~np.isnan(series[:, i])
+    y_pred = modelo.predecir(años[con_datos])[0][:, i]
+    return [
+        {"archivo": archivo, "años": años[con_datos], "y": series[con_datos, i] / 1000,
+         "y_pred": y_pred / 1000, "opciones": {}}
+        for archivo in archivos
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera las gráficas de tendencia de Soy.csv.")
+    parser.add_argument("--salida", default=DIRECTORIO_GRAFICAS, help="carpeta para las gráficas por serie")
+    parser.add_argument("--formato", choices=FORMATOS, default="svg")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("--forzar", action="store_true", help="volver a dibujar aunque los datos no hayan cambiado")
+    args = parser.parse_args(argv)
+
+    tareas = tareas_regresion() + tareas_series(args.salida, args.formato)
+    estados = renderizar_lote(tareas, args.procesos, args.forzar)
+    nuevas = sum(1 for e in estados.values() if e == "renderizada")
+    print(f"{len(estados)} gráficas: {nuevas} renderizadas, {len(estados) - nuevas} sin cambios.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
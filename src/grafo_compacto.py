@@ -0,0 +1,188 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from distancias import MODO_POR_DEFECTO, longitudes_segmentos
+
+# Decimales con los que se "ajustan" (snap) las coordenadas para detectar
+# vértices compartidos entre rutas. 6 decimales ≈ 0.11 m, la precisión de OSRM.
+DECIMALES_AJUSTE = 6
+
+
+def claves_coordenadas(puntos, decimales=DECIMALES_AJUSTE):
+    """
+    Convierte puntos (lat, lon) en claves enteras int64.
+
+    Las coordenadas se redondean a `decimales` y se combinan en un solo entero,
+    así dos puntos que caen en la misma celda de la grilla tienen la misma clave.
+    """
+    escala = 10 ** decimales
+    lat = np.round(puntos[:, 0] * escala).astype(np.int64) + 90 * escala
+    lon = np.round(puntos[:, 1] * escala).astype(np.int64) + 180 * escala
+    return lat * (360 * escala + 1) + lon
+
+
+class GrafoCompacto:
+    """
+    Grafo dirigido de rutas guardado en arreglos de NumPy.
+
+    - coords: arreglo float64 (n, 2) con el (lat, lon) de cada nodo.
+    - indptr, indices: adyacencia en formato CSR (las aristas que salen del
+      nodo i están en indices[indptr[i]:indptr[i + 1]]).
+    - pesos: distancia en metros de cada arista, en float32.
+
+    Los nodos se identifican por su posición; las coordenadas ajustadas se
+    guardan ordenadas en `claves` para buscar un punto con búsqueda binaria.
+    """
+
+    def __init__(self, coords, claves, indptr, indices, pesos, decimales=DECIMALES_AJUSTE):
+        self.coords = coords
+        self.claves = claves
+        self.indptr = indptr
+        self.indices = indices
+        self.pesos = pesos
+        self.decimales = decimales
+        self._matriz = None
+
+    @classmethod
+    def desde_rutas(cls, rutas, decimales=DECIMALES_AJUSTE, modo=MODO_POR_DEFECTO):
+        """
+        Construye el grafo a partir de una o varias rutas.
+
+        Parámetros:
+            rutas: iterable de listas de puntos (lat, lon).
+            decimales: precisión del ajuste de coordenadas; los vértices que
+                coinciden a esa precisión se fusionan en un solo nodo.
+            modo: precisión de las distancias (ver distancias.py).
+
+        Si dos rutas recorren el mismo tramo, la arista se guarda una sola vez
+        con el menor de los pesos.
+        """
+        bloques, origenes, destinos, pesos = [], [], [], []
+        desplazamiento = 0
+        for route_points in rutas:
+            puntos = np.asarray(route_points, dtype=np.float64).reshape(-1, 2)
+            if len(puntos) == 0:
+                continue
+            bloques.append(puntos)
+            idx = np.arange(desplazamiento, desplazamiento + len(puntos))
+            origenes.append(idx[:-1])
+            destinos.append(idx[1:])
+            pesos.append(longitudes_segmentos(puntos, modo))
+            desplazamiento += len(puntos)
+
+        if not bloques:
+            vacio = np.empty(0, dtype=np.int32)
+            return cls(np.empty((0, 2)), np.empty(0, dtype=np.int64), np.zeros(1, dtype=np.int64),
+                       vacio, np.empty(0, dtype=np.float32), decimales)
+
+        puntos = np.concatenate(bloques)
+        # np.unique ordena las claves, de modo que `inverso` da el id de nodo de cada punto.
+        claves, primero, inverso = np.unique(
+            claves_coordenadas(puntos, decimales), return_index=True, return_inverse=True
+        )
+        coords = puntos[primero]
+
+        u = inverso[np.concatenate(origenes)]
+        v = inverso[np.concatenate(destinos)]
+        w = np.concatenate(pesos)
+
+        # Se eliminan los lazos (puntos consecutivos fusionados por el ajuste)
+        # y las aristas repetidas, conservando el menor peso.
+        validas = u != v
+        u, v, w = u[validas], v[validas], w[validas]
+        orden = np.lexsort((w, v, u))
+        u, v, w = u[orden], v[orden], w[orden]
+        unicas = np.ones(len(u), dtype=bool)
+        unicas[1:] = (u[1:] != u[:-1]) | (v[1:] != v[:-1])
+        u, v, w = u[unicas], v[unicas], w[unicas]
+
+        indptr = np.zeros(len(coords) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(u, minlength=len(coords)), out=indptr[1:])
+
+        return cls(coords, claves, indptr, v.astype(np.int32), w.astype(np.float32), decimales)
+
+    @property
+    def num_nodos(self):
+        return len(self.coords)
+
+    @property
+    def num_aristas(self):
+        return len(self.indices)
+
+    def peso_total(self):
+        """Suma de los pesos de todas las aristas en metros (acumulada en float64)."""
+        return float(self.pesos.sum(dtype=np.float64))
+
+    def indice_nodo(self, punto):
+        """
+        Retorna el id del nodo que corresponde a `punto` (lat, lon).
+        Lanza KeyError si el punto no está en el grafo.
+        """
+        clave = claves_coordenadas(np.asarray(punto, dtype=np.float64).reshape(1, 2), self.decimales)[0]
+        i = int(np.searchsorted(self.claves, clave))
+        if i == len(self.claves) or self.claves[i] != clave:
+            raise KeyError(f"El punto {tuple(punto)} no está en el grafo.")
+        return i
+
+    def matriz(self):
+        """Matriz dispersa (CSR) de adyacencia, creada una sola vez y reutilizada."""
+        if self._matriz is None:
+            self._matriz = csr_matrix(
+                (self.pesos, self.indices, self.indptr), shape=(self.num_nodos, self.num_nodos)
+            )
+        return self._matriz
+
+    def camino_mas_corto(self, origen, destino):
+        """
+        Camino más corto (Dijkstra) entre dos puntos del grafo.
+
+        Equivale a nx.shortest_path + nx.shortest_path_length con weight="weight".
+
+        Retorna:
+            camino: lista de puntos (lat, lon) del origen al destino.
+            longitud_m: longitud del camino en metros.
+        Lanza ValueError si no existe un camino.
+        """
+        i, j = self.indice_nodo(origen), self.indice_nodo(destino)
+        distancias, predecesores = dijkstra(self.matriz(), indices=i, return_predecessors=True)
+        if not np.isfinite(distancias[j]):
+            raise ValueError(f"No hay camino entre {tuple(origen)} y {tuple(destino)}.")
+
+        nodos = [j]
+        while nodos[-1] != i:
+            nodos.append(predecesores[nodos[-1]])
+        nodos.reverse()
+
+        return [tuple(p) for p in self.coords[nodos].tolist()], float(distancias[j])
+
+    def guardar(self, archivo):
+        """Guarda los arreglos del grafo en un archivo .npz (se lee con cargar())."""
+        np.savez_compressed(
+            archivo, coords=self.coords, claves=self.claves, indptr=self.indptr,
+            indices=self.indices, pesos=self.pesos, decimales=self.decimales,
+        )
+        return archivo
+
+    @classmethod
+    def cargar(cls, archivo):
+        """Lee un grafo guardado con guardar()."""
+        with np.load(archivo) as datos:
+            return cls(datos["coords"], datos["claves"], datos["indptr"], datos["indices"],
+                       datos["pesos"], int(datos["decimales"]))
+
+    def a_networkx(self):
+        """
+        Convierte el grafo a un nx.DiGraph con nodos (lat, lon) y atributo "weight".
+        Solo se usa cuando se necesita alguna función de NetworkX.
+        """
+        import networkx as nx
+
+        G = nx.DiGraph()
+        puntos = [tuple(p) for p in self.coords.tolist()]
+        G.add_nodes_from(puntos)
+        origenes = np.repeat(np.arange(self.num_nodos), np.diff(self.indptr))
+        G.add_weighted_edges_from(
+            (puntos[a], puntos[b], float(w)) for a, b, w in zip(origenes, self.indices, self.pesos)
+        )
+        return G
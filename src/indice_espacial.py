@@ -0,0 +1,174 @@
+import math
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from distancias import a_cartesianas, arco_a_cuerda, cuerda_a_arco
+
+
+def caja_envolvente(*conjuntos):
+    """
+    Esquinas [[lat_min, lon_min], [lat_max, lon_max]] de todos los puntos dados,
+    en el formato que espera folium.Map.fit_bounds().
+
+    Cada argumento es un conjunto de puntos (lista de (lat, lon) o arreglo (n, 2)),
+    por ejemplo una ruta; para varias rutas: caja_envolvente(*rutas).
+    Los puntos se unen en un solo arreglo y los cuatro extremos salen de un
+    min/max por columna, en vez de cuatro recorridos en Python.
+    Retorna None si no hay puntos.
+    """
+    bloques = [np.asarray(c, dtype=np.float64).reshape(-1, 2) for c in conjuntos]
+    bloques = [b for b in bloques if len(b)]
+    if not bloques:
+        return None
+    puntos = np.concatenate(bloques)
+    return [puntos.min(axis=0).tolist(), puntos.max(axis=0).tolist()]
+
+
+class CajaIncremental:
+    """
+    Caja envolvente que se actualiza ruta por ruta.
+
+    Igual que caja_envolvente(), pero sin juntar todos los puntos: cada
+    conjunto agregado solo actualiza los mínimos y máximos, así la memoria
+    no crece con el número de rutas (ver mapa_streaming.py).
+    """
+
+    __slots__ = ("minimo", "maximo")
+
+    def __init__(self):
+        self.minimo = None
+        self.maximo = None
+
+    def agregar(self, puntos):
+        """Extiende la caja con un conjunto de puntos (lista de (lat, lon) o arreglo (n, 2))."""
+        puntos = np.asarray(puntos, dtype=np.float64).reshape(-1, 2)
+        if not len(puntos):
+            return
+        minimo, maximo = puntos.min(axis=0), puntos.max(axis=0)
+        if self.minimo is None:
+            self.minimo, self.maximo = minimo, maximo
+        else:
+            self.minimo = np.minimum(self.minimo, minimo)
+            self.maximo = np.maximum(self.maximo, maximo)
+
+    def limites(self):
+        """[[lat_min, lon_min], [lat_max, lon_max]] como caja_envolvente(), o None si está vacía."""
+        if self.minimo is None:
+            return None
+        return [self.minimo.tolist(), self.maximo.tolist()]
+
+
+class IndiceEspacial:
+    """
+    Índice de vecinos geodésicos sobre un conjunto de puntos (lat, lon).
+
+    Los puntos se pasan a coordenadas 3D sobre la esfera y se guardan en un
+    KD-tree de SciPy: como la cuerda crece igual que el arco, las consultas
+    de k vecinos y de radio son exactas para la distancia haversine y
+    cuestan O(log n) en vez de recorrer todos los puntos.
+
+    - puntos: arreglo float64 (n, 2) con (lat, lon).
+    - elementos: lista opcional con el objeto asociado a cada punto
+      (por ejemplo el diccionario de cada finca).
+    """
+
+    def __init__(self, puntos, elementos=None):
+        self.puntos = np.asarray(puntos, dtype=np.float64).reshape(-1, 2)
+        self.elementos = elementos
+        self.arbol = cKDTree(a_cartesianas(self.puntos))
+
+    @classmethod
+    def desde_lugares(cls, lugares):
+        """Índice sobre lugares con "lat" y "lon": lista de diccionarios o RegistroUbicaciones."""
+        # Un RegistroUbicaciones ya trae las coordenadas en un arreglo.
+        puntos = getattr(lugares, "coordenadas", None)
+        if puntos is None:
+            puntos = [(l["lat"], l["lon"]) for l in lugares]
+        return cls(puntos, list(lugares))
+
+    @classmethod
+    def desde_rutas(cls, rutas):
+        """
+        Índice sobre los vértices de varias rutas.
+
+        Cada elemento es (indice_ruta, indice_vertice), para saber de qué
+        ruta y de qué punto de ella proviene cada vértice.
+        """
+        bloques = [np.asarray(r, dtype=np.float64).reshape(-1, 2) for r in rutas]
+        elementos = [(i, j) for i, b in enumerate(bloques) for j in range(len(b))]
+        puntos = np.concatenate(bloques) if bloques else np.empty((0, 2))
+        return cls(puntos, elementos)
+
+    def __len__(self):
+        return len(self.puntos)
+
+    def vecinos(self, puntos, k=1):
+        """
+        Los k puntos del índice más cercanos a cada consulta.
+
+        Parámetros:
+            puntos: un punto (lat, lon) o un arreglo (m, 2) de consultas.
+            k: cantidad de vecinos.
+
+        Retorna:
+            distancias_m: arreglo (m, k) de distancias de gran círculo.
+            indices: arreglo (m, k) de posiciones en el índice (len(self) si faltan vecinos).
+        """
+        consultas = a_cartesianas(puntos)
+        cuerdas, indices = self.arbol.query(consultas, k=k)
+        cuerdas = np.asarray(cuerdas, dtype=np.float64).reshape(len(consultas), k)
+        indices = np.asarray(indices).reshape(len(consultas), k)
+        return cuerda_a_arco(np.where(np.isinf(cuerdas), np.nan, cuerdas)), indices
+
+    def mas_cercano(self, punto):
+        """
+        Retorna (elemento o índice, distancia_m) del punto más cercano a `punto`.
+
+        Con el índice vacío retorna (None, inf): no hay punto cercano, y una
+        comparación con una distancia máxima lo descarta sin caso especial.
+        """
+        if len(self) == 0:
+            return None, math.inf
+        distancias, indices = self.vecinos(punto, k=1)
+        i = int(indices[0, 0])
+        return (self.elementos[i] if self.elementos is not None else i), float(distancias[0, 0])
+
+    def en_radio(self, punto, radio_m):
+        """
+        Puntos del índice a menos de `radio_m` metros de `punto`, del más cercano al más lejano.
+
+        Retorna:
+            indices: arreglo de posiciones en el índice.
+            distancias_m: arreglo con la distancia de cada uno.
+        """
+        consulta = a_cartesianas(punto)[0]
+        indices = np.asarray(self.arbol.query_ball_point(consulta, float(arco_a_cuerda(radio_m))), dtype=np.int64)
+        distancias = cuerda_a_arco(np.linalg.norm(self.arbol.data[indices] - consulta, axis=1))
+        orden = np.argsort(distancias)
+        return indices[orden], distancias[orden]
+
+    def elementos_en_radio(self, punto, radio_m):
+        """Como en_radio(), pero retorna los elementos asociados (por ejemplo, las fincas)."""
+        indices, _ = self.en_radio(punto, radio_m)
+        return [self.elementos[i] for i in indices]
+
+    def caja(self):
+        """Caja envolvente de todos los puntos del índice (ver caja_envolvente())."""
+        return caja_envolvente(self.puntos)
+
+
+if __name__ == "__main__":
+    from registro_ubicaciones import cargar_ubicaciones
+
+    registro = cargar_ubicaciones()
+    fincas, centro_acopio, puerto = registro.fincas, registro.acopio.punto, registro.puerto
+    indice = IndiceEspacial.desde_lugares(fincas)
+    finca, distancia = indice.mas_cercano(centro_acopio)
+    print(f"Finca más cercana al centro de acopio: {finca['nombre']} ({distancia/1000:.1f} km en línea recta)")
+
+    cercanas = indice.elementos_en_radio((40.91, -89.53), 1500)
+    print(f"Fincas a menos de 1.5 km de (40.91, -89.53): {', '.join(f['nombre'] for f in cercanas)}")
+
+    print(f"Caja envolvente de fincas, acopio y puerto: "
+          f"{caja_envolvente(indice.puntos, [centro_acopio], [(puerto['lat'], puerto['lon'])])}")
@@ -0,0 +1,317 @@
+# Mapa de rutas por flujo, sin tener toda la geometría en memoria.
+#
+# build_unified_map() recibe un diccionario con todos los puntos de todas las
+# rutas y folium arma el HTML completo en memoria antes de guardarlo: con
+# miles de rutas (todo el estado) eso son varias copias de millones de
+# puntos. Aquí las rutas se leen de un generador, una a la vez: cada ruta se
+# simplifica, se escribe en un archivo binario aparte y se descarta; solo
+# queda la caja envolvente (que se actualiza en cada ruta) y una fila de
+# índice. El HTML es solo el mapa base con los marcadores, y el navegador
+# descarga las líneas después de abrir la página.
+#
+# Archivos generados junto al HTML (por ejemplo rutas_unificadas.html):
+#   rutas_unificadas.rutas.bin   coordenadas int32 little-endian (lat, lon) × ESCALA, ruta tras ruta
+#   rutas_unificadas.rutas.json  {"geometria", "escala", "rutas": [[nombre, distancia_m, color, peso, inicio, puntos]...]}
+#
+# Como la página descarga esos archivos con fetch(), hay que abrirla desde un
+# servidor (GitHub Pages, o "python -m http.server" en docs/): los
+# navegadores no permiten fetch() sobre file://.
+#
+# Uso: python src/mapa_streaming.py [--salida docs/rutas_unificadas_streaming.html] [--bloque N] [--enrutador grafo]
+#      python src/mapa_streaming.py --benchmark 200 [--benchmark 1000 ...]
+
+import argparse
+import json
+import os
+import random
+import sys
+
+import folium
+import numpy as np
+from branca.element import Template
+from folium.map import Layer
+
+from indice_espacial import CajaIncremental
+from marcadores import agregar_marcadores, marcador_lugar
+from simplificacion import ZOOM_DETALLE, resumen, simplificar_ruta, sumar_estadisticas
+
+# Coordenadas enteras: grados × ESCALA (1e5 ≈ 1 m, igual que marcadores.DECIMALES).
+ESCALA = 100_000
+
+# Rutas que se piden juntas a OSRM en rutas_en_bloques().
+TAMAÑO_BLOQUE = 64
+
+
+class CapaRutasExternas(Layer):
+    """
+    Capa de Folium que dibuja las rutas guardadas por escribir_rutas().
+
+    Al abrir la página descarga el índice y el binario, y crea las líneas
+    sobre un lienzo (L.canvas) compartido, sin un elemento del DOM por ruta.
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function () {
+                var capa = L.featureGroup();
+                var lienzo = L.canvas({padding: 0.5});
+                fetch({{ this.indice|tojson }})
+                    .then(function (respuesta) { return respuesta.json(); })
+                    .then(function (indice) {
+                        return fetch(indice.geometria)
+                            .then(function (respuesta) { return respuesta.arrayBuffer(); })
+                            .then(function (buffer) {
+                                var c = new Int32Array(buffer);
+                                indice.rutas.forEach(function (r) {
+                                    var puntos = new Array(r[5]);
+                                    for (var k = 0, j = 2 * r[4]; k < r[5]; k++, j += 2) {
+                                        puntos[k] = [c[j] / indice.escala, c[j + 1] / indice.escala];
+                                    }
+                                    L.polyline(puntos, {renderer: lienzo, color: r[2], weight: r[3], opacity: 0.8})
+                                        .bindTooltip(r[0] + ": " + (r[1] / 1000).toFixed(2) + " km")
+                                        .addTo(capa);
+                                });
+                            });
+                    })
+                    .catch(function (error) { console.error("No se pudieron cargar las rutas:", error); });
+                return capa;
+            })();
+        {% endmacro %}
+        """
+    )
+
+    def __init__(self, indice, name=None, **opciones):
+        opciones.setdefault("overlay", True)
+        opciones.setdefault("control", name is not None)
+        super().__init__(name=name, **opciones)
+        self._name = "CapaRutasExternas"
+        self.indice = indice
+
+
+def escribir_rutas(rutas, base, zoom_detalle=ZOOM_DETALLE):
+    """
+    Escribe las rutas en base + ".rutas.bin" y base + ".rutas.json", una a la vez.
+
+    Parámetros:
+        rutas: iterable (por ejemplo un generador) de (nombre, route_points,
+            distance_m) o (nombre, route_points, distance_m, estilo), donde
+            estilo es un diccionario con "color" y "peso".
+        base: ruta de los archivos sin extensión (por ejemplo "docs/rutas_unificadas").
+        zoom_detalle: zoom hasta el cual la ruta simplificada se ve igual que
+            la original (ver simplificacion.py). None guarda las rutas completas.
+
+    Retorna:
+        caja, cantidad, estadisticas: CajaIncremental con todos los puntos,
+        número de rutas escritas y estadísticas de simplificación (None si
+        zoom_detalle es None).
+    """
+    caja = CajaIncremental()
+    totales = None if zoom_detalle is None else sumar_estadisticas([])
+    cantidad = inicio = 0
+    nombre_bin = os.path.basename(base) + ".rutas.bin"
+
+    with open(base + ".rutas.bin", "wb") as binario, open(base + ".rutas.json", "w", encoding="utf-8") as indice:
+        # El índice también se escribe fila por fila.
+        indice.write(f'{{"geometria":{json.dumps(nombre_bin)},"escala":{ESCALA},"rutas":[')
+        for ruta in rutas:
+            nombre, route_points, distance_m = ruta[:3]
+            estilo = ruta[3] if len(ruta) > 3 else {}
+            # La caja se calcula con la ruta original, como en build_unified_map().
+            caja.agregar(route_points)
+
+            linea = route_points
+            if zoom_detalle is not None:
+                linea, est = simplificar_ruta(route_points, zoom_detalle)
+                for clave in totales:
+                    totales[clave] += est[clave]
+
+            enteros = np.rint(np.asarray(linea, dtype=np.float64).reshape(-1, 2) * ESCALA).astype("<i4")
+            binario.write(enteros.tobytes())
+
+            fila = [str(nombre), float(distance_m), estilo.get("color") or "#%06x" % random.randint(0, 0xFFFFFF),
+                    estilo.get("peso", 4), inicio, len(enteros)]
+            indice.write(("," if cantidad else "") + json.dumps(fila, ensure_ascii=False, separators=(",", ":")))
+            inicio += len(enteros)
+            cantidad += 1
+        indice.write("]}")
+    return caja, cantidad, totales
+
+
+def rutas_en_bloques(pares, tamaño_bloque=TAMAÑO_BLOQUE, **opciones):
+    """
+    Generador de rutas: pide a OSRM `tamaño_bloque` rutas a la vez
+    (obtener_rutas_lote) y las entrega una por una, así solo hay un bloque en memoria.
+
+    Parámetros:
+        pares: iterable de (nombre, origen, destino), con origen y destino (lat, lon).
+        opciones: se pasan a obtener_rutas_lote (usar_cache, reintentos...).
+
+    Produce:
+        (nombre, route_points, distance_m). Las rutas que fallan se reportan y se omiten.
+    """
+    from rutas_osrm import obtener_rutas_lote
+
+    pares = iter(pares)
+    while True:
+        bloque = [par for _, par in zip(range(tamaño_bloque), pares)]
+        if not bloque:
+            return
+        resultados = obtener_rutas_lote([(origen, destino) for _, origen, destino in bloque], **opciones)
+        for (nombre, _, _), (resultado, error) in zip(bloque, resultados):
+            if error is not None:
+                print(f"Error con {nombre}: {error}")
+                continue
+            yield (nombre, *resultado)
+
+
+def build_streaming_map(fincas, centro_acopio, puerto, rutas, ruta_extra=None, map_filename="rutas_unificadas.html",
+                        zoom_detalle=ZOOM_DETALLE, modo_marcadores="auto"):
+    """
+    Igual que ruta_finales.build_unified_map(), pero consumiendo las rutas de
+    un generador y guardando su geometría fuera del HTML.
+
+    Parámetros:
+        fincas: lista de diccionarios o RegistroUbicaciones con las fincas.
+        centro_acopio: registro del centro de acopio (Ubicacion, con nombre e
+            info para el marcador) o solo sus coordenadas (lat, lon).
+        puerto: lugar del puerto (nombre, lat, lon, info).
+        rutas: iterable de (nombre_finca, route_points, distance_m), por
+            ejemplo rutas_en_bloques(); se recorre una sola vez.
+        ruta_extra: (route_points, distance_m) de la ruta centro → puerto, o None.
+        map_filename: HTML de salida; los datos se escriben a su lado.
+        zoom_detalle, modo_marcadores: como en build_unified_map().
+
+    Retorna:
+        Número de rutas escritas (sin contar la ruta extra).
+
+    Flujo:
+        1. Se escriben las rutas en el binario mientras se leen, actualizando la caja.
+        2. Se agrega la ruta extra (más gruesa, en azul).
+        3. Se arma el mapa base: marcadores y la capa que descarga las rutas.
+        4. Se ajusta el zoom con la caja y se guarda el HTML (pequeño).
+    """
+    base = os.path.splitext(map_filename)[0]
+
+    def todas():
+        yield from rutas
+        if ruta_extra:
+            yield ("Centro → Puerto", *ruta_extra, {"color": "blue", "peso": 6})
+
+    caja, cantidad, estadisticas = escribir_rutas(todas(), base, zoom_detalle)
+    if ruta_extra:
+        cantidad -= 1
+
+    # Punto medio aproximado para inicializar el mapa
+    mid_lat = sum(f["lat"] for f in fincas) / len(fincas)
+    mid_lon = sum(f["lon"] for f in fincas) / len(fincas)
+    m = folium.Map(location=[mid_lat, mid_lon], zoom_start=7)
+
+    agregar_marcadores(m, fincas, color="green", icono="leaf", modo=modo_marcadores, popup_con_nombre=False)
+    marcador_lugar(centro_acopio, "Centro de Acopio", color="red", icono="home").add_to(m)
+    folium.Marker(
+        location=(puerto["lat"], puerto["lon"]),
+        tooltip=puerto["nombre"],
+        popup=f"<b>{puerto['nombre']}</b><br>{puerto['info'].replace(chr(10), '<br>')}",
+        icon=folium.Icon(color="blue", icon="anchor"),
+    ).add_to(m)
+
+    CapaRutasExternas(os.path.basename(base) + ".rutas.json").add_to(m)
+
+    limites = caja.limites()
+    if limites is not None:
+        m.fit_bounds(limites)
+
+    m.save(map_filename)
+    if estadisticas and estadisticas["puntos_antes"]:
+        print(f"Simplificación de rutas: {resumen(estadisticas)}")
+    return cantidad
+
+
+def rutas_sinteticas(cantidad, semilla=0):
+    """
+    Generador de `cantidad` rutas de prueba: copias desplazadas (hasta ±1°) de
+    las rutas reales de docs/rutas_unificadas.html, generadas de a una.
+    """
+    from benchmark_distancias import cargar_rutas
+
+    directorio = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docs")
+    reales = [np.asarray(r) for r in cargar_rutas(os.path.join(directorio, "rutas_unificadas.html"))]
+    generador = np.random.default_rng(semilla)
+    for i in range(cantidad):
+        ruta = reales[i % len(reales)] + generador.uniform(-1.0, 1.0, 2)
+        yield f"Finca {i + 1}", [tuple(p) for p in ruta.tolist()], 1000.0 * len(ruta)
+
+
+def benchmark(cantidades, directorio):
+    """Memoria pico (tracemalloc) y tamaño del HTML: build_unified_map() contra build_streaming_map()."""
+    import time
+    import tracemalloc
+
+    from registro_ubicaciones import cargar_ubicaciones
+    from ruta_finales import build_unified_map
+
+    registro = cargar_ubicaciones()
+    os.makedirs(directorio, exist_ok=True)
+    for cantidad in cantidades:
+        for metodo in ("diccionario", "streaming"):
+            archivo = os.path.join(directorio, f"benchmark_{metodo}_{cantidad}.html")
+            tracemalloc.start()
+            inicio = time.perf_counter()
+            if metodo == "diccionario":
+                rutas = {nombre: (puntos, d) for nombre, puntos, d in rutas_sinteticas(cantidad)}
+                build_unified_map(registro.fincas, registro.acopio, registro.puerto, rutas, None, archivo)
+                del rutas
+            else:
+                build_streaming_map(registro.fincas, registro.acopio, registro.puerto,
+                                    rutas_sinteticas(cantidad), None, archivo)
+            segundos = time.perf_counter() - inicio
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            base = os.path.splitext(archivo)[0]
+            datos = sum(os.path.getsize(base + ext) for ext in (".rutas.bin", ".rutas.json")
+                        if os.path.exists(base + ext))
+            print(f"{cantidad} rutas, {metodo}: pico {pico / 2**20:,.1f} MB, HTML "
+                  f"{os.path.getsize(archivo) / 1024:,.0f} KB + datos {datos / 1024:,.0f} KB en {segundos:.2f} s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mapa unificado de rutas con la geometría en un archivo aparte.")
+    parser.add_argument("--salida", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docs",
+                                                         "rutas_unificadas_streaming.html"))
+    parser.add_argument("--bloque", type=int, default=TAMAÑO_BLOQUE, help="rutas pedidas a OSRM a la vez")
+    parser.add_argument("--enrutador", choices=("osrm", "local", "grafo"), help="ver enrutadores.py")
+    parser.add_argument("--benchmark", type=int, action="append", metavar="N",
+                        help="comparar memoria con N rutas sintéticas (se puede repetir)")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark(args.benchmark, os.path.dirname(os.path.abspath(args.salida)))
+        return 0
+
+    from registro_ubicaciones import cargar_ubicaciones
+    from rutas_osrm import get_osrm_route
+
+    if args.enrutador:
+        from enrutadores import configurar_enrutador, crear_enrutador
+
+        configurar_enrutador(crear_enrutador(args.enrutador))
+
+    registro = cargar_ubicaciones()
+    acopio, puerto = registro.acopio.punto, registro.puerto
+    ruta_extra = None
+    try:
+        ruta_extra = get_osrm_route(acopio, puerto.punto)
+    except Exception as e:
+        print(f"Error en ruta adicional: {e}")
+
+    pares = ((f["nombre"], f.punto, acopio) for f in registro.fincas)
+    cantidad = build_streaming_map(registro.fincas, registro.acopio, puerto, rutas_en_bloques(pares, args.bloque),
+                                   ruta_extra, args.salida)
+    print(f"{cantidad} rutas escritas; mapa guardado como {args.salida}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+# Marcadores de muchos lugares en un mapa de Folium.
+#
+# Un folium.Marker con su folium.Icon genera un bloque de JavaScript y un
+# elemento del DOM por finca: está bien para unas pocas, pero con miles el
+# HTML crece sin medida y el navegador se vuelve lento. Por encima de un
+# umbral, los lugares se escriben una sola vez como un arreglo JSON compacto
+# y un único bucle en el navegador crea los puntos, ya sea agrupados
+# (Leaflet.markercluster) o dibujados sobre un lienzo (canvas) sin DOM.
+
+import json
+
+import folium
+from branca.element import Template
+from folium.elements import JSCSSMixin
+from folium.map import Layer
+from folium.plugins import MarkerCluster
+
+# Hasta este número de lugares se dibuja un folium.Marker por lugar.
+UMBRAL_AGRUPADO = 100
+
+# Desde este número se usa el lienzo: agrupar tantos puntos también es lento.
+UMBRAL_CANVAS = 20_000
+
+MODOS = ("auto", "marcadores", "agrupado", "canvas")
+
+# Decimales de las coordenadas en el JSON (5 decimales ≈ 1 m).
+DECIMALES = 5
+
+# Colores de folium.Icon traducidos a CSS para los puntos del lienzo.
+COLORES_CSS = {
+    "red": "#d63e2a", "green": "#72b026", "blue": "#38aadd", "orange": "#f69730",
+    "purple": "#d252b9", "darkred": "#a23336", "darkgreen": "#728224", "darkblue": "#0067a3",
+    "cadetblue": "#436978", "gray": "#575757", "black": "#303030",
+}
+
+
+def elegir_modo(cantidad, modo="auto"):
+    """Modo de dibujo para `cantidad` lugares: el pedido, o según los umbrales si es "auto"."""
+    if modo not in MODOS:
+        raise ValueError(f"Modo de marcadores desconocido: {modo}. Opciones: {', '.join(MODOS)}")
+    if modo != "auto":
+        return modo
+    if cantidad <= UMBRAL_AGRUPADO:
+        return "marcadores"
+    return "agrupado" if cantidad < UMBRAL_CANVAS else "canvas"
+
+
+def datos_compactos(lugares, decimales=DECIMALES):
+    """
+    Empaqueta los lugares para el navegador.
+
+    Retorna:
+        datos: lista plana [lat, lon, nombre, info, lat, lon, ...] donde nombre
+            e info son posiciones en `textos`.
+        textos: cada texto distinto una sola vez (por ejemplo, la misma
+            descripción "Parcela de producción" de miles de fincas).
+    """
+    textos, posicion = [], {}
+
+    def codigo(texto):
+        if texto not in posicion:
+            posicion[texto] = len(textos)
+            textos.append(texto)
+        return posicion[texto]
+
+    datos = []
+    for lugar in lugares:
+        datos.extend((
+            round(float(lugar["lat"]), decimales), round(float(lugar["lon"]), decimales),
+            codigo(lugar["nombre"]), codigo(lugar.get("info", "")),
+        ))
+    return datos, textos
+
+
+def json_para_script(valor):
+    """
+    JSON compacto que se puede pegar dentro de un bloque <script>.
+
+    Se escapan "<", ">" y "&" (como hace el filtro tojson de Jinja): un texto
+    con "</script>" en los datos cerraría el bloque y lo que siga se
+    ejecutaría como HTML.
+    """
+    texto = json.dumps(valor, separators=(",", ":"), ensure_ascii=False)
+    return texto.replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+
+
+def texto_popup(nombre, info, con_nombre=True):
+    """Popup de un lugar: nombre en negrita (opcional) y la info con los saltos de línea como <br>."""
+    info = str(info).replace("\n", "<br>")
+    return f"<b>{nombre}</b><br>{info}" if con_nombre else info
+
+
+def marcador_lugar(lugar, nombre_por_defecto, color, icono):
+    """
+    folium.Marker de un solo lugar, por ejemplo el centro de acopio.
+
+    `lugar` puede ser un registro (Ubicacion, con nombre e info para el
+    tooltip y el popup) o solo sus coordenadas (lat, lon); en ese caso el
+    tooltip es `nombre_por_defecto` y no hay popup.
+    """
+    nombre = getattr(lugar, "nombre", None) or nombre_por_defecto
+    info = getattr(lugar, "info", None)
+    return folium.Marker(
+        getattr(lugar, "punto", lugar),
+        tooltip=nombre,
+        popup=texto_popup(nombre, info) if info else None,
+        icon=folium.Icon(color=color, icon=icono),
+    )
+
+
+class CapaPuntos(JSCSSMixin, Layer):
+    """
+    Capa de Folium con todos los lugares en un solo arreglo JSON.
+
+    - agrupado=True: marcadores con un ícono compartido dentro de un
+      L.markerClusterGroup (se agregan todos de una vez con addLayers).
+    - agrupado=False: círculos sobre un lienzo L.canvas, sin elementos del DOM.
+
+    El tooltip y el popup se generan al pasar el mouse o hacer clic, con una
+    sola función para todos los puntos.
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function () {
+                var textos = {{ this.textos }};
+                var datos = {{ this.datos }};
+                var tooltip = function (capa) { return textos[capa.options.textos[0]]; };
+                var popup = function (capa) {
+                    var t = capa.options.textos;
+                    return {{ "'<b>' + textos[t[0]] + '</b><br>' + " if this.popup_con_nombre else "" }}textos[t[1]].replace(/\\n/g, "<br>");
+                };
+                {%- if this.agrupado %}
+                var icono = L.AwesomeMarkers.icon({{ this.icono|tojson }});
+                {%- else %}
+                var lienzo = L.canvas({padding: 0.5});
+                {%- endif %}
+                var puntos = new Array(datos.length / 4);
+                for (var i = 0, j = 0; i < datos.length; i += 4, j++) {
+                    {%- if this.agrupado %}
+                    puntos[j] = L.marker([datos[i], datos[i + 1]], {icon: icono, textos: [datos[i + 2], datos[i + 3]]});
+                    {%- else %}
+                    puntos[j] = L.circleMarker([datos[i], datos[i + 1]], {
+                        renderer: lienzo, radius: {{ this.radio }}, color: {{ this.color|tojson }},
+                        weight: 1, fillOpacity: 0.8, textos: [datos[i + 2], datos[i + 3]]
+                    });
+                    {%- endif %}
+                    puntos[j].bindTooltip(tooltip).bindPopup(popup);
+                }
+                {%- if this.agrupado %}
+                var capa = L.markerClusterGroup({chunkedLoading: true});
+                capa.addLayers(puntos);
+                {%- else %}
+                var capa = L.featureGroup(puntos);
+                {%- endif %}
+                return capa;
+            })();
+        {% endmacro %}
+        """
+    )
+
+    def __init__(self, lugares, agrupado=True, color="green", icono="leaf", radio=5,
+                 popup_con_nombre=True, name=None, **opciones):
+        # Sin nombre no aparece en el control de capas; con nombre, como capa superpuesta.
+        opciones.setdefault("overlay", True)
+        opciones.setdefault("control", name is not None)
+        super().__init__(name=name, **opciones)
+        self._name = "CapaPuntos"
+        self.agrupado = agrupado
+        # Los enlaces de markercluster solo hacen falta en el modo agrupado.
+        self.default_js = MarkerCluster.default_js if agrupado else []
+        self.default_css = MarkerCluster.default_css if agrupado else []
+        self.icono = {"icon": icono, "markerColor": color, "prefix": "glyphicon"}
+        self.color = COLORES_CSS.get(color, color)
+        self.radio = radio
+        self.popup_con_nombre = popup_con_nombre
+        datos, textos = datos_compactos(lugares)
+        self.cantidad = len(datos) // 4
+        # JSON sin espacios: es la mayor parte del HTML cuando hay miles de lugares.
+        self.datos = json.dumps(datos, separators=(",", ":"))
+        self.textos = json_para_script(textos)
+
+
+def agregar_marcadores(m, lugares, color="green", icono="leaf", modo="auto", popup_con_nombre=True, nombre_capa=None):
+    """
+    Agrega al mapa un marcador por lugar, eligiendo la forma de dibujarlos.
+
+    Parámetros:
+        m: folium.Map (o grupo) donde se agregan.
+        lugares: lista de diccionarios o RegistroUbicaciones con nombre, lat, lon e info.
+        color, icono: color e ícono de folium.Icon.
+        modo: "auto" (según UMBRAL_AGRUPADO y UMBRAL_CANVAS), "marcadores",
+            "agrupado" o "canvas".
+        popup_con_nombre: si el popup muestra el nombre en negrita antes de la info.
+        nombre_capa: nombre en el control de capas (solo en agrupado y canvas).
+
+    Retorna:
+        El modo usado.
+    """
+    modo = elegir_modo(len(lugares), modo)
+    if modo == "marcadores":
+        for lugar in lugares:
+            folium.Marker(
+                location=(lugar["lat"], lugar["lon"]),
+                tooltip=lugar["nombre"],
+                popup=texto_popup(lugar["nombre"], lugar.get("info", ""), popup_con_nombre),
+                icon=folium.Icon(color=color, icon=icono),
+            ).add_to(m)
+    else:
+        CapaPuntos(lugares, agrupado=(modo == "agrupado"), color=color, icono=icono,
+                   popup_con_nombre=popup_con_nombre, name=nombre_capa).add_to(m)
+    return modo
+
+
+if __name__ == "__main__":
+    import os
+    import time
+
+    import numpy as np
+
+    from registro_ubicaciones import RegistroUbicaciones
+
+    # Comparación del tamaño del HTML con fincas sintéticas en Illinois.
+    generador = np.random.default_rng(0)
+    for cantidad in (1_000, 10_000):
+        fincas = RegistroUbicaciones(
+            np.zeros(cantidad), [f"Finca {i + 1}" for i in range(cantidad)],
+            generador.uniform(37.5, 42.0, cantidad), generador.uniform(-91.0, -88.0, cantidad),
+            np.full(cantidad, "Parcela de producción", dtype=object),
+        )
+        for modo in ("marcadores", "agrupado", "canvas"):
+            archivo = f"marcadores_{modo}_{cantidad}.html"
+            inicio = time.perf_counter()
+            m = folium.Map(location=[40.0, -89.0], zoom_start=7)
+            agregar_marcadores(m, fincas, modo=modo)
+            m.save(archivo)
+            print(f"{cantidad} fincas, {modo}: {os.path.getsize(archivo) / 1024:,.0f} KB "
+                  f"en {time.perf_counter() - inicio:.2f} s")
+            os.remove(archivo)
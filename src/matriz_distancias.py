@@ -0,0 +1,207 @@
+import inspect
+
+import numpy as np
+import requests
+
+import rutas_osrm
+from distancias import haversine_m
+
+# Máximo de coordenadas por consulta /table. El servidor público de OSRM
+# rechaza tablas de más de 100 coordenadas (origenes + destinos).
+MAX_COORDENADAS_TABLA = 100
+
+# Parámetros del cálculo sin conexión.
+# FACTOR_DESVIO: relación típica entre la distancia por carretera y la distancia en línea recta.
+# VELOCIDAD_PROMEDIO_KMH: velocidad media supuesta de un camión de carga.
+FACTOR_DESVIO = 1.3
+VELOCIDAD_PROMEDIO_KMH = 60.0
+
+
+def _como_arreglo(puntos):
+    # Acepta listas de (lat, lon) o arreglos (n, 2) y retorna un arreglo float64 (n, 2).
+    return np.asarray(puntos, dtype=np.float64).reshape(-1, 2)
+
+
+def _enrutador():
+    # Import diferido: enrutadores.py importa este módulo.
+    from enrutadores import enrutador_actual
+
+    return enrutador_actual()
+
+
+def _opciones_de(funcion, opciones):
+    # Solo las opciones que `funcion` acepta por nombre.
+    parametros = inspect.signature(funcion).parameters
+    return {k: v for k, v in opciones.items() if k in parametros}
+
+
+def _osrm_no_disponible(error):
+    # Solo la falta de servicio (red, tiempo de espera, 5xx) justifica usar el
+    # cálculo geodésico; un 4xx es una consulta mal formada y se propaga.
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    respuesta = getattr(error, "response", None)
+    return respuesta is not None and respuesta.status_code >= 500
+
+
+def _bloques(n, tam):
+    return [(i, min(i + tam, n)) for i in range(0, n, tam)]
+
+
+def matriz_osrm(origenes, destinos, profile="driving", max_coordenadas=MAX_COORDENADAS_TABLA,
+                osrm_url=None, reintentos=2):
+    """
+    Calcula las matrices de distancia y duración por carretera con el
+    servicio /table de OSRM.
+
+    Si origenes + destinos supera `max_coordenadas`, la matriz se divide en
+    bloques y se hace una consulta por bloque.
+
+    Parámetros:
+        origenes: lista de (lat, lon) o arreglo (n, 2).
+        destinos: lista de (lat, lon) o arreglo (m, 2).
+        profile: modo de transporte de OSRM.
+        max_coordenadas: límite de coordenadas por consulta del servidor.
+
+    Retorna:
+        distancias_m: arreglo (n, m) con distancias en metros (NaN si no hay ruta).
+        duraciones_s: arreglo (n, m) con duraciones en segundos (NaN si no hay ruta).
+    """
+    origenes = _como_arreglo(origenes)
+    destinos = _como_arreglo(destinos)
+    n, m = len(origenes), len(destinos)
+
+    distancias = np.full((n, m), np.nan)
+    duraciones = np.full((n, m), np.nan)
+    if n == 0 or m == 0:
+        return distancias, duraciones
+
+    # Se reparte el límite entre orígenes y destinos; si uno de los dos es
+    # pequeño, el otro aprovecha el espacio sobrante.
+    mitad = max_coordenadas // 2
+    tam_o = min(n, max(mitad, max_coordenadas - m))
+    tam_d = max_coordenadas - tam_o
+
+    base = osrm_url or getattr(_enrutador(), "url", rutas_osrm.OSRM_URL)
+    for o_ini, o_fin in _bloques(n, tam_o):
+        for d_ini, d_fin in _bloques(m, tam_d):
+            bloque_o = origenes[o_ini:o_fin]
+            bloque_d = destinos[d_ini:d_fin]
+
+            # OSRM requiere lon,lat; los orígenes van primero y luego los destinos.
+            coords = ";".join(f"{lon},{lat}" for lat, lon in np.vstack([bloque_o, bloque_d]))
+            fuentes = ";".join(str(i) for i in range(len(bloque_o)))
+            objetivos = ";".join(str(len(bloque_o) + j) for j in range(len(bloque_d)))
+            url = (
+                f"{base}/table/v1/{profile}/{coords}"
+                f"?sources={fuentes}&destinations={objetivos}&annotations=distance,duration"
+            )
+
+            data = rutas_osrm.get_con_reintentos(url, reintentos).json()
+            if data.get("code") != "Ok":
+                raise ValueError(f"OSRM /table respondió {data.get('code')}: {data.get('message')}")
+
+            # Las celdas sin ruta vienen como null; se convierten a NaN.
+            distancias[o_ini:o_fin, d_ini:d_fin] = np.array(data["distances"], dtype=np.float64)
+            duraciones[o_ini:o_fin, d_ini:d_fin] = np.array(data["durations"], dtype=np.float64)
+
+    return distancias, duraciones
+
+
+def matriz_geodesica(origenes, destinos, factor_desvio=FACTOR_DESVIO, velocidad_kmh=VELOCIDAD_PROMEDIO_KMH):
+    """
+    Calcula una aproximación sin conexión de las matrices de distancia y duración.
+
+    La distancia es la de gran círculo (haversine) multiplicada por `factor_desvio`
+    para aproximar el recorrido por carretera; la duración supone `velocidad_kmh`.
+
+    Retorna:
+        distancias_m, duraciones_s: arreglos (n, m), igual que matriz_osrm().
+    """
+    origenes = _como_arreglo(origenes)
+    destinos = _como_arreglo(destinos)
+
+    # Broadcasting: (n, 1) contra (1, m) produce directamente la matriz (n, m).
+    distancias = haversine_m(
+        origenes[:, 0:1], origenes[:, 1:2], destinos[:, 0][None, :], destinos[:, 1][None, :]
+    ) * factor_desvio
+    duraciones = distancias / (velocidad_kmh / 3.6)
+
+    return distancias, duraciones
+
+
+def matriz_distancias(origenes, destinos, fuente="auto", **opciones):
+    """
+    Retorna las matrices de distancia (m) y duración (s) entre orígenes y destinos.
+
+    Parámetros:
+        fuente:
+            - "osrm": solo OSRM; los errores de red se propagan.
+            - "geodesica": cálculo local, sin conexión.
+            - "grafo": por la red vial local del enrutador "grafo" (ver enrutadores.py).
+            - "auto": la red vial local si ese es el enrutador configurado (y su
+              archivo existe); si no, intenta OSRM y, si no hay conexión, el
+              servidor no responde a tiempo o falla (5xx), usa el cálculo
+              geodésico. Los errores 4xx (consulta inválida) se propagan.
+        opciones: se pasan a matriz_osrm() o matriz_geodesica(). Con "auto"
+            cada una recibe solo las suyas (por ejemplo osrm_url a OSRM y
+            factor_desvio al cálculo geodésico); una opción que ninguna acepta
+            lanza TypeError.
+    """
+    if fuente == "geodesica":
+        return matriz_geodesica(origenes, destinos, **opciones)
+    if fuente == "grafo":
+        enrutador = _enrutador()
+        if not hasattr(enrutador, "tabla"):
+            from enrutadores import EnrutadorGrafo
+            enrutador = EnrutadorGrafo.cargar()
+        return enrutador.tabla(_como_arreglo(origenes), _como_arreglo(destinos))
+    if fuente == "osrm":
+        return matriz_osrm(origenes, destinos, **opciones)
+    if fuente != "auto":
+        raise ValueError(f"Fuente de distancias desconocida: {fuente}")
+
+    de_osrm = _opciones_de(matriz_osrm, opciones)
+    de_geodesica = _opciones_de(matriz_geodesica, opciones)
+    desconocidas = opciones.keys() - de_osrm.keys() - de_geodesica.keys()
+    if desconocidas:
+        raise TypeError(f"matriz_distancias() recibió opciones desconocidas: {', '.join(sorted(desconocidas))}")
+
+    try:
+        enrutador = _enrutador()
+    except FileNotFoundError as e:
+        # Enrutador "grafo" configurado pero sin red vial: se sigue con OSRM público.
+        print(f"Red vial local no disponible ({e}); se intenta OSRM.")
+        enrutador = None
+        de_osrm.setdefault("osrm_url", rutas_osrm.OSRM_URL)
+    if hasattr(enrutador, "tabla"):
+        return enrutador.tabla(_como_arreglo(origenes), _como_arreglo(destinos))
+
+    try:
+        return matriz_osrm(origenes, destinos, **de_osrm)
+    except requests.RequestException as e:
+        if not _osrm_no_disponible(e):
+            raise
+        print(f"OSRM no disponible ({e}); se usan distancias geodésicas.")
+        return matriz_geodesica(origenes, destinos, **de_geodesica)
+
+
+if __name__ == "__main__":
+    from calculadora import calcular_costo_total_soya
+    from registro_ubicaciones import cargar_ubicaciones
+
+    registro = cargar_ubicaciones()
+    fincas = registro.fincas
+    origenes = [(f["lat"], f["lon"]) for f in fincas]
+    destinos = [registro.acopio.punto, registro.puerto.punto]
+    distancias, duraciones = matriz_distancias(origenes, destinos)
+
+    # calcular_costo_total_soya solo usa aritmética, así que acepta la matriz
+    # completa y devuelve el costo de cada par finca-destino en una sola llamada.
+    costo_total, costo_logistico = calcular_costo_total_soya(distancias / 1000)
+
+    for finca, fila_d, fila_c in zip(fincas, distancias, costo_total):
+        print(
+            f"{finca['nombre']}: acopio {fila_d[0]/1000:.1f} km (${fila_c[0]:.2f}/ton), "
+            f"puerto {fila_d[1]/1000:.1f} km (${fila_c[1]:.2f}/ton)"
+        )
@@ -1,13 +1,202 @@
+import importlib
 import os
+import pathlib
+import sys
+import threading
+import time
 import webbrowser
-from fincas_de_produccion import fincas_de_produccion
-from centro_de_acopio import centros_de_acopio
-from puerto import puerto
-from ruta_fincas_centro import generar_rutas
-from ruta_centro_puerto import generar_ruta_cent
-from analisis_produccion import regresion_produccion
-from repositorio_abrir import abrir_repositorio
-from calculadora import calcular_costos
+
+from trabajos import GestorTrabajos
+
+# Carpeta con las páginas y mapas ya generados (docs/ en la raíz del repositorio).
+DIRECTORIO_DOCS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docs")
+
+# Si es "0", no se precargan los módulos pesados en segundo plano.
+PRECALENTAR = os.environ.get("AGROPATH_PRECALENTAR", "1") != "0"
+
+
+class Comando:
+    """
+    Una opción del menú.
+
+    El módulo de la opción (que importa folium, pandas, matplotlib...) se
+    importa recién cuando se elige la opción, así el menú aparece de inmediato.
+
+    - texto: lo que se muestra en el menú.
+    - modulo, funcion: función a ejecutar, como nombres ("ruta_fincas_centro", "generar_rutas").
+    - archivo: página de docs/ que se abre; si no existe, se genera con la función.
+    - con_archivo: si la función recibe la ruta del archivo a generar.
+    - en_segundo_plano: la generación se envía al gestor de trabajos
+      (trabajos.py) y el menú sigue disponible mientras tanto; la función
+      recibe `progreso` para informar su avance.
+    - regenerar: generar el archivo aunque ya exista (por ejemplo, la gráfica
+      de producción, que depende de los datos del momento).
+    """
+
+    __slots__ = ("texto", "modulo", "funcion", "archivo", "con_archivo", "en_segundo_plano", "regenerar")
+
+    def __init__(self, texto, modulo=None, funcion=None, archivo=None, con_archivo=False,
+                 en_segundo_plano=False, regenerar=False):
+        self.texto = texto
+        self.modulo = modulo
+        self.funcion = funcion
+        self.archivo = archivo
+        self.con_archivo = con_archivo
+        self.en_segundo_plano = en_segundo_plano
+        self.regenerar = regenerar
+
+    def cargar(self):
+        """Importa el módulo de la opción y retorna su función."""
+        return getattr(importlib.import_module(self.modulo), self.funcion)
+
+    def ejecutar(self, gestor=None):
+        """
+        Ejecuta la opción.
+
+        Si la opción genera su archivo en segundo plano y hay `gestor`, envía
+        el trabajo y retorna de inmediato (el archivo se abre cuando el trabajo
+        termina, ver entregar_resultados); si ya había un trabajo en curso para
+        el mismo archivo, se reutiliza ese.
+        """
+        if self.archivo is None:
+            return self.cargar()()
+
+        ruta = os.path.abspath(os.path.join(DIRECTORIO_DOCS, self.archivo))
+        if self.regenerar or not os.path.exists(ruta):
+            if self.modulo is None:
+                raise FileNotFoundError(f"No existe {ruta}")
+            argumentos = (ruta,) if self.con_archivo else ()
+            if self.en_segundo_plano and gestor is not None:
+                trabajo, nuevo = gestor.enviar(ruta, self.cargar(), *argumentos, descripcion=self.texto)
+                if nuevo:
+                    print("Generando archivo en segundo plano; se abrirá cuando esté listo.")
+                else:
+                    print("Ese archivo ya se está generando; se abrirá cuando esté listo.")
+                return trabajo
+            print("Generando archivo")
+            self.cargar()(*argumentos)
+        abrir(ruta)
+
+
+def abrir(ruta):
+    """Abre un archivo generado en el navegador."""
+    # Se abre como URI file:// para que funcione igual en Windows, Linux y Mac.
+    if os.path.exists(ruta):
+        webbrowser.open_new(pathlib.Path(ruta).as_uri())
+
+
+# Registro de opciones del menú: número → Comando.
+COMANDOS = {
+    1: Comando("Ver fincas de producción.", "fincas_de_produccion", "fincas_de_produccion",
+               "mapa_fincas_illinois.html", con_archivo=True),
+    2: Comando("Ver centros de acopio.", "centro_de_acopio", "centros_de_acopio",
+               "centro_de_acopio.html", con_archivo=True),
+    3: Comando("Ver puertos.", "puerto", "puerto", "puerto_st_louis.html", con_archivo=True),
+    4: Comando("Ver ruta mas cercana de las fincas al centro de acopio.", "ruta_fincas_centro", "generar_rutas",
+               "rutas_fincas_centro.html", con_archivo=True, en_segundo_plano=True),
+    5: Comando("Ver ruta mas cercana del centro de acopio al puerto", "ruta_centro_puerto", "generar_ruta_cent",
+               "ruta_centro_puerto.html", con_archivo=True, en_segundo_plano=True),
+    6: Comando("Analisis de producción anual.", "analisis_produccion", "regresion_produccion",
+               "regresion_produccion.svg", con_archivo=True, en_segundo_plano=True, regenerar=True),
+    7: Comando("Ver pagina de analisis.", archivo="analisis.html"),
+    8: Comando("Calcular costos de logistica.", "calculadora", "calcular_costos"),
+    9: Comando("Ver repositorio de código.", "repositorio_abrir", "abrir_repositorio"),
+}
+
+# Módulos que se precargan después de mostrar el menú, del más usado al menos usado.
+MODULOS_PRECALENTAR = ("folium", "fincas_de_produccion", "ruta_fincas_centro", "ruta_centro_puerto",
+                       "analisis_produccion")
+
+_precalentado = None
+
+
+def precalentar(modulos=MODULOS_PRECALENTAR):
+    """
+    Importa `modulos` en un hilo de fondo mientras el usuario elige una opción.
+
+    Si el usuario elige una opción cuyo módulo se está importando, Python
+    espera a que termine esa importación (no se importa dos veces).
+    Los errores se ignoran aquí: aparecerán al ejecutar la opción.
+    """
+    global _precalentado
+    if _precalentado is not None:
+        return _precalentado
+
+    def tarea():
+        for nombre in modulos:
+            try:
+                importlib.import_module(nombre)
+            except Exception:
+                pass
+
+    _precalentado = threading.Thread(target=tarea, name="precalentar", daemon=True)
+    _precalentado.start()
+    return _precalentado
+
+
+def mostrar_trabajos(gestor):
+    """Lista numerada de los trabajos (en curso y terminados) con su avance."""
+    trabajos = gestor.trabajos()
+    if trabajos:
+        print("\n--- Trabajos ---")
+        for numero, trabajo in enumerate(trabajos, start=1):
+            print(f"[{numero}] {trabajo.linea()}")
+    return trabajos
+
+
+def entregar_resultados(gestor):
+    """
+    Muestra el resultado de los trabajos que terminaron desde la última vez:
+    abre el archivo generado, imprime los números ajustados o el error.
+    """
+    for trabajo in gestor.por_entregar():
+        estado = trabajo.estado
+        if estado != "terminado":
+            print(f"{trabajo.descripcion}: {estado}"
+                  + (f" ({trabajo.futuro.exception()})" if estado == "error" else ""))
+            continue
+
+        resultado = trabajo.resultado()
+        if isinstance(resultado, dict):
+            # Números ajustados (por ejemplo, regresion_produccion) y su gráfica.
+            numeros = ", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}"
+                                for k, v in resultado.items() if k != "archivo")
+            print(f"{trabajo.descripcion}: {numeros}")
+            resultado = resultado.get("archivo")
+        else:
+            print(f"{trabajo.descripcion}: listo ({resultado})")
+        if isinstance(resultado, str):
+            abrir(resultado)
+
+
+def ver_avance(gestor, intervalo=0.5):
+    """Muestra el avance de los trabajos en vivo hasta que terminen (Ctrl+C vuelve al menú)."""
+    try:
+        while True:
+            limpiar_consola()
+            mostrar_trabajos(gestor)
+            if not gestor.en_curso():
+                break
+            print("\nCtrl+C para volver al menú (los trabajos siguen).")
+            time.sleep(intervalo)
+    except KeyboardInterrupt:
+        pass
+
+
+def cancelar_trabajo(gestor):
+    """Pide el número de un trabajo en curso y lo cancela."""
+    trabajos = mostrar_trabajos(gestor)
+    if not any(not t.terminado for t in trabajos):
+        print("No hay trabajos en curso.")
+        return
+    try:
+        trabajo = trabajos[int(input("Número del trabajo a cancelar: ")) - 1]
+    except (ValueError, IndexError):
+        print("Error: Ingrese un número de trabajo valido.")
+        return
+    trabajo.cancelar()
+    print(f"Cancelando: {trabajo.descripcion}")
+
 
 # Función para limpiar la consola dependiendo del sistema operativo.
 # En Windows usa 'cls', en Linux/Mac usa 'clear'.
@@ -18,27 +207,37 @@ def limpiar_consola():
 # Se separa en una función para mantener el código organizado y reutilizable.
 def menu_principal():
     print("=== Agropath - Menú Principal ===")
-    print("1. Ver fincas de producción.")
-    print("2. Ver centros de acopio.")
-    print("3. Ver puertos.")
-    print("4. Ver ruta mas cercana de las fincas al centro de acopio.")
-    print("5. Ver ruta mas cercana del centro de acopio al puerto")
-    print("6. Analisis de producción anual.")
-    print("7. Ver pagina de analisis.")
-    print("8. Calcular costos de logistica.")
-    print("9. Ver repositorio de código.")
+    for numero, comando in COMANDOS.items():
+        print(f"{numero}. {comando.texto}")
+    print("t. Ver avance de los trabajos en segundo plano.")
+    print("c. Cancelar un trabajo.")
     print("0. Salir.")
 
 # Punto de entrada del programa.
 # Se ejecuta solo si el archivo es ejecutado directamente (no importado).
 if __name__ == "__main__":
+    precargar = PRECALENTAR and "--sin-precalentar" not in sys.argv[1:]
+    gestor = GestorTrabajos()
+
     while True:  # Ciclo principal del menú
         limpiar_consola()  # Limpia la pantalla en cada iteración
         menu_principal()   # Muestra las opciones disponibles
+        mostrar_trabajos(gestor)     # Avance de lo que se genera en segundo plano
+        entregar_resultados(gestor)  # Abre lo que terminó desde la última vez
+        if precargar:
+            precalentar()  # Solo la primera vez: el menú ya está en pantalla
 
         try:
+            entrada = input("Ingrese su opción: ").strip().lower()
+            if entrada == "t":
+                ver_avance(gestor)
+                continue
+            if entrada == "c":
+                cancelar_trabajo(gestor)
+                input("Presione Enter para continuar")
+                continue
             # Se intenta convertir la entrada del usuario a entero
-            entrada_usuario = int(input("Ingrese su opción: "))
+            entrada_usuario = int(entrada)
 
         # Manejo de errores comunes:
         except ValueError:
@@ -47,73 +246,24 @@ if __name__ == "__main__":
             print("Presione enter para continuar")
             continue
 
-        except IndexError:
-            # No aplicaría normalmente aquí, pero se incluye como ejemplo de manejo
-            print("Error: Entrada fuera del rango.")
-            print("Presione enter para continuar")
-            continue
-
         except KeyboardInterrupt:
             # Permite capturar Ctrl+C y salir de forma controlada
             print("Error: Interrupcion del teclado.")
             break
 
         else:
-            # match-case (Python 3.10+) para evaluar la opción seleccionada
-            match entrada_usuario:
-
-                # Cada caso abre un archivo HTML o ejecuta una función específica.
-                case 1:
-                    try:
-                        webbrowser.open_new(r'docs\mapa_fincas_illinois.html')
-                    except Exception as error:
-                        print(f'Error: {error}')
-                        print("Generando archivo")
-                        fincas_de_produccion()
-                case 2:
-                    try:
-                        webbrowser.open_new(r'docs\centro_de_acopio.html')
-                    except Exception as error:
-                        print(f'Error: {error}')
-                        print("Generando archivo")
-                        centros_de_acopio()
-                case 3:
-                    try:
-                        webbrowser.open_new(r'docs\puerto_st_louis.html')
-                    except Exception as error:
-                        print(f'Error: {error}')
-                        print("Generando archivo")
-                        puerto()
-                case 4:
-                    try:
-                        webbrowser.open_new(r'docs\rutas_fincas_centro.html')
-                    except Exception as error:
-                        print(f'Error: {error}')
-                        print("Generando archivo")
-                        generar_rutas()
-                case 5:
-                    try:
-                        webbrowser.open_new(r'docs\ruta_centro_puerto.html')
-                    except Exception as error:
-                        print(f'Error: {error}')
-                        print("Generando archivo")
-                        generar_ruta_cent()
-                case 6:
-                    # Llama a la función importada que realiza regresiones de producción
-                    regresion_produccion()
-
-                case 7:
-                    # Abre documentación en HTML
-                    webbrowser.open_new(r'docs\analisis.html')
-                case 8:
-                    calcular_costos()
-                case 9:
-                    # Abre el repositorio de código desde la función importada
-                    abrir_repositorio()
-                case 0:
-                    # Opción para salir del programa
-                    break
-                case _:
-                    # Cualquier valor fuera de las opciones válidas
-                    print("Error: Ingrese una opción valida.")
+            if entrada_usuario == 0:
+                # Opción para salir del programa
+                break
+            if entrada_usuario not in COMANDOS:
+                # Cualquier valor fuera de las opciones válidas
+                print("Error: Ingrese una opción valida.")
+            else:
+                try:
+                    COMANDOS[entrada_usuario].ejecutar(gestor)
+                except Exception as error:
+                    print(f'Error: {error}')
             input("Presione Enter para continuar")
+
+    # Al salir se cancelan los trabajos pendientes.
+    gestor.cerrar()
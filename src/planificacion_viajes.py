@@ -0,0 +1,224 @@
+import numpy as np
+
+from calculadora import calcular_costo_total_soya
+from matriz_distancias import matriz_distancias
+from rutas_osrm import obtener_rutas_lote
+
+# Carga máxima de un camión granelero (toneladas).
+CAPACIDAD_CAMION_TON = 25.0
+
+# Carga de una finca cuando la lista no trae "toneladas".
+TONELADAS_POR_DEFECTO = 1.0
+
+# Mejora mínima (km) para aceptar un cambio de 2-opt; evita ciclos por redondeo.
+EPSILON_KM = 1e-9
+
+
+def _longitud(viaje, D):
+    # viaje no incluye el centro (nodo 0): se agrega al inicio y al final.
+    nodos = np.concatenate(([0], viaje, [0]))
+    return float(D[nodos[:-1], nodos[1:]].sum())
+
+
+def ahorros(D, demandas, capacidad):
+    """
+    Heurística de ahorros de Clarke–Wright.
+
+    Parámetros:
+        D: matriz (n + 1, n + 1) de distancias; el nodo 0 es el centro de acopio.
+        demandas: toneladas de los nodos 1..n.
+        capacidad: carga máxima por camión.
+
+    Unir el viaje que termina en i con el que empieza en j ahorra
+    D[i, 0] + D[0, j] - D[i, j]. Todos los ahorros se calculan de una vez
+    (matriz n × n) y se recorren de mayor a menor.
+
+    Retorna:
+        Lista de viajes; cada viaje es una lista de nodos (1..n) en orden de visita.
+    """
+    n = len(D) - 1
+    demandas = np.asarray(demandas, dtype=np.float64)
+    if np.any(demandas > capacidad):
+        raise ValueError("Hay fincas con más carga que la capacidad de un camión.")
+
+    S = D[1:, 0][:, None] + D[0, 1:][None, :] - D[1:, 1:]
+    np.fill_diagonal(S, -np.inf)
+    S = np.where(np.isnan(S), -np.inf, S)
+    orden = np.argsort(S, axis=None)[::-1]
+    orden = orden[S.ravel()[orden] > 0]
+
+    viaje_de = list(range(n))                 # viaje al que pertenece cada nodo
+    viajes = {v: [v + 1] for v in range(n)}  # id de viaje -> nodos
+    carga = {v: demandas[v] for v in range(n)}
+
+    for i, j in zip(*np.divmod(orden, n)):
+        vi, vj = viaje_de[i], viaje_de[j]
+        if vi == vj or viajes[vi][-1] != i + 1 or viajes[vj][0] != j + 1:
+            continue
+        if carga[vi] + carga[vj] > capacidad:
+            continue
+        viajes[vi].extend(viajes[vj])
+        carga[vi] += carga.pop(vj)
+        for nodo in viajes.pop(vj):
+            viaje_de[nodo - 1] = vi
+
+    return list(viajes.values())
+
+
+def dos_opt(viaje, D):
+    """
+    Mejora un viaje con 2-opt: invierte tramos mientras acorte el recorrido.
+
+    Para cada i, la ganancia de todos los cortes (i, j) se calcula a la vez
+    con NumPy; como las distancias por carretera pueden no ser simétricas,
+    cada candidato se confirma con la longitud real antes de aceptarlo.
+    """
+    nodos = np.concatenate(([0], viaje, [0]))
+    mejor = _longitud(viaje, D)
+    mejorado = True
+    while mejorado:
+        mejorado = False
+        for i in range(1, len(nodos) - 2):
+            j = np.arange(i + 1, len(nodos) - 1)
+            a, b = nodos[i - 1], nodos[i]
+            c, d = nodos[j], nodos[j + 1]
+            ganancia = D[a, b] + D[c, d] - D[a, c] - D[b, d]
+            for k in np.argsort(-ganancia):
+                if not ganancia[k] > EPSILON_KM:
+                    break
+                candidato = nodos.copy()
+                candidato[i:j[k] + 1] = candidato[i:j[k] + 1][::-1]
+                longitud = _longitud(candidato[1:-1], D)
+                if longitud < mejor - EPSILON_KM:
+                    nodos, mejor, mejorado = candidato, longitud, True
+                    break
+    return nodos[1:-1].tolist()
+
+
+def planificar(D, demandas, capacidad=CAPACIDAD_CAMION_TON):
+    """
+    Planifica los viajes de recolección sobre una matriz de distancias ya calculada.
+
+    Parámetros:
+        D: matriz (n + 1, n + 1) en km; nodo 0 = centro de acopio, nodos 1..n = fincas.
+            NaN indica que no hay ruta (como en matriz_distancias()).
+        demandas: toneladas de cada finca (n valores).
+        capacidad: carga máxima por camión.
+
+    Las fincas sin ruta de ida o de vuelta al centro (NaN en D[0, i] o D[i, 0])
+    no entran en ningún viaje y se reportan en "sin_asignar". Un NaN entre dos
+    fincas solo impide que vayan seguidas en el mismo viaje.
+
+    Retorna:
+        Diccionario con:
+            viajes: lista de viajes, cada uno con los índices de finca (0..n-1) en orden.
+            km: longitud de cada viaje (ida y vuelta al centro).
+            carga: toneladas de cada viaje.
+            km_total: suma de todos los viajes.
+            km_individual: km si cada finca asignada tuviera su propio camión (ida y vuelta).
+            distancia_a_bordo_km: km que recorre la carga de cada finca hasta el
+                centro (NaN en las fincas sin asignar).
+            sin_asignar: índices de finca (0..n-1) sin ruta con el centro.
+    """
+    D = np.asarray(D, dtype=np.float64)
+    demandas = np.asarray(demandas, dtype=np.float64)
+
+    # Se planifica sobre la submatriz de las fincas que pueden ir y volver del centro.
+    alcanzables = np.isfinite(D[0, 1:]) & np.isfinite(D[1:, 0])
+    nodos = np.concatenate(([0], np.flatnonzero(alcanzables) + 1))
+    sub = D[np.ix_(nodos, nodos)]
+    viajes = [nodos[dos_opt(v, sub)] for v in ahorros(sub, demandas[alcanzables], capacidad)]
+
+    a_bordo = np.full(len(demandas), np.nan)
+    for viaje in viajes:
+        recorrido = np.concatenate((viaje, [0]))
+        tramos = D[recorrido[:-1], recorrido[1:]]
+        # Lo que falta del recorrido desde cada finca hasta el centro.
+        a_bordo[viaje - 1] = np.cumsum(tramos[::-1])[::-1]
+
+    km = [_longitud(v, D) for v in viajes]
+    return {
+        "viajes": [[int(nodo) - 1 for nodo in v] for v in viajes],
+        "km": km,
+        "carga": [float(demandas[v - 1].sum()) for v in viajes],
+        "km_total": float(sum(km)),
+        "km_individual": float((D[0, 1:] + D[1:, 0])[alcanzables].sum()),
+        "distancia_a_bordo_km": a_bordo,
+        "sin_asignar": np.flatnonzero(~alcanzables).tolist(),
+    }
+
+
+def planificar_viajes(fincas, centro, capacidad=CAPACIDAD_CAMION_TON, fuente="auto"):
+    """
+    Planifica viajes de recolección con varias fincas por camión.
+
+    Parámetros:
+        fincas: lista de diccionarios con "lat", "lon" y opcionalmente "toneladas".
+        centro: tupla (lat, lon) del centro de acopio.
+        capacidad: carga máxima por camión (toneladas).
+        fuente: origen de las distancias (ver matriz_distancias.py).
+
+    Retorna:
+        El diccionario de planificar(), más "costo_logistico_ton" y
+        "costo_total_ton" por finca (calculadora.py, según la distancia a bordo).
+    """
+    puntos = [tuple(centro)] + [(f["lat"], f["lon"]) for f in fincas]
+    D = matriz_distancias(puntos, puntos, fuente=fuente)[0] / 1000
+    demandas = [f.get("toneladas", TONELADAS_POR_DEFECTO) for f in fincas]
+
+    plan = planificar(D, demandas, capacidad)
+    plan["costo_total_ton"], plan["costo_logistico_ton"] = calcular_costo_total_soya(plan["distancia_a_bordo_km"])
+    return plan
+
+
+def rutas_para_mapa(plan, fincas, centro):
+    """
+    Geometría de cada viaje en el formato de build_map():
+    {nombre_viaje: (lista_puntos, distancia_m)}.
+
+    Cada tramo (centro → finca, finca → finca, finca → centro) se pide a OSRM
+    en un solo lote (y queda en la cache); los tramos se unen en una línea.
+    """
+    paradas = [tuple(centro)] + [(f["lat"], f["lon"]) for f in fincas]
+    secuencias = [[0] + [i + 1 for i in viaje] + [0] for viaje in plan["viajes"]]
+    tramos = [(paradas[a], paradas[b]) for s in secuencias for a, b in zip(s[:-1], s[1:])]
+    resultados = iter(obtener_rutas_lote(tramos))
+
+    rutas = {}
+    for numero, (viaje, secuencia) in enumerate(zip(plan["viajes"], secuencias), start=1):
+        puntos, distancia, error = [], 0.0, None
+        for _ in range(len(secuencia) - 1):
+            resultado, e = next(resultados)
+            if e is not None:
+                error = e
+                continue
+            tramo, metros = resultado
+            puntos.extend(tramo if not puntos else tramo[1:])
+            distancia += metros
+        nombre = f"Viaje {numero} ({', '.join(fincas[i]['nombre'] for i in viaje)})"
+        if error is not None:
+            print(f"Error con {nombre}: {error}")
+            continue
+        rutas[nombre] = (puntos, distancia)
+    return rutas
+
+
+if __name__ == "__main__":
+    from registro_ubicaciones import cargar_ubicaciones
+    from ruta_fincas_centro import build_map
+
+    registro = cargar_ubicaciones()
+    fincas, destination = registro.fincas, registro.acopio.punto
+
+    plan = planificar_viajes(fincas, destination)
+    for numero, (viaje, km, carga) in enumerate(zip(plan["viajes"], plan["km"], plan["carga"]), start=1):
+        print(f"Viaje {numero}: {' → '.join(fincas[i]['nombre'] for i in viaje)} "
+              f"({km:.1f} km, {carga:.1f} t)")
+    print(f"Total: {plan['km_total']:.1f} km (un camión por finca: {plan['km_individual']:.1f} km)")
+    if plan["sin_asignar"]:
+        print(f"Sin ruta con el centro: {', '.join(fincas[i]['nombre'] for i in plan['sin_asignar'])}")
+
+    rutas = rutas_para_mapa(plan, fincas, destination)
+    if rutas:
+        build_map(fincas, destination, rutas, "viajes_fincas_centro.html")
+        print("Mapa guardado como viajes_fincas_centro.html.")
@@ -0,0 +1,260 @@
+import hashlib
+import os
+import warnings
+
+import numpy as np
+from scipy import stats
+
+from cache_rutas import DIRECTORIO_CACHE
+from consultas_soya import TOTAL_ANUAL, indice_soya
+
+# Grado del polinomio de tendencia (1 = recta, como la regresión original).
+GRADO_POR_DEFECTO = 1
+
+# Nivel de confianza de los intervalos de predicción.
+NIVEL_POR_DEFECTO = 0.95
+
+# Años mínimos con datos para ajustar en cada origen del backtest.
+VENTANA_MINIMA = 10
+
+
+def matriz_series(indice=None):
+    """
+    Reúne todas las series de Soy.csv en una matriz año × serie.
+
+    El valor anual de cada serie es su "MY Total" cuando la tabla lo publica
+    y, si no (existencias por trimestre, tabla 1), el promedio de los periodos
+    del año, igual que hacía regresion_produccion().
+
+    Retorna:
+        años: arreglo int con todos los años comerciales, ordenados.
+        claves: lista de tuplas (tabla, atributo), una por columna.
+        Y: matriz float64 (len(años), len(claves)) con NaN donde no hay dato.
+    """
+    indice = indice or indice_soya()
+    años = np.unique(indice.años).astype(np.int64)
+    claves = sorted(indice.bloques)
+    Y = np.full((len(años), len(claves)), np.nan)
+
+    for columna, clave in enumerate(claves):
+        inicio, fin = indice.bloques[clave]
+        años_b = indice.años[inicio:fin]
+        montos = indice.montos[inicio:fin]
+        totales = indice.periodos[inicio:fin] == TOTAL_ANUAL
+        if totales.any():
+            años_b, montos = años_b[totales], montos[totales]
+
+        # Promedio por año ignorando NaN (bincount sobre la posición del año).
+        validos = ~np.isnan(montos)
+        fila = np.searchsorted(años, años_b[validos])
+        suma = np.bincount(fila, weights=montos[validos], minlength=len(años))
+        cuenta = np.bincount(fila, minlength=len(años))
+        con_datos = cuenta > 0
+        Y[con_datos, columna] = suma[con_datos] / cuenta[con_datos]
+
+    return años, claves, Y
+
+
+def _diseño(años, año_ref, grado):
+    # Columnas 1, t, t², ... con t centrado para que el sistema esté bien condicionado.
+    t = np.asarray(años, dtype=np.float64) - año_ref
+    return np.vander(t, grado + 1, increasing=True)
+
+
+class ModeloTendencias:
+    """
+    Tendencias polinómicas de muchas series ajustadas a la vez.
+
+    - claves: lista de (tabla, atributo), una por serie.
+    - coeficientes: matriz (grado + 1, series).
+    - varianza: varianza residual de cada serie.
+    - observaciones: años con dato usados en cada ajuste.
+    - xtx_inv: (X'X)⁻¹ de cada serie, para los intervalos de predicción.
+
+    Una serie con menos observaciones que coeficientes queda con NaN.
+    """
+
+    def __init__(self, claves, año_ref, grado, coeficientes, varianza, observaciones, xtx_inv):
+        self.claves = list(claves)
+        self.año_ref = año_ref
+        self.grado = grado
+        self.coeficientes = coeficientes
+        self.varianza = varianza
+        self.observaciones = observaciones
+        self.xtx_inv = xtx_inv
+        self._posicion = {clave: i for i, clave in enumerate(self.claves)}
+
+    @classmethod
+    def ajustar(cls, años, Y, claves, grado=GRADO_POR_DEFECTO, año_ref=None):
+        """
+        Ajusta todas las columnas de Y por mínimos cuadrados.
+
+        Las series con los mismos años faltantes comparten la matriz de
+        diseño, así que se resuelven juntas con un único lstsq de varios
+        lados derechos; en Soy.csv hay pocos patrones distintos de faltantes,
+        de modo que las 78 series se ajustan con un puñado de llamadas.
+        """
+        años = np.asarray(años)
+        if año_ref is None:
+            año_ref = float(años.mean())
+        X = _diseño(años, año_ref, grado)
+        p = grado + 1
+        series = Y.shape[1]
+
+        coeficientes = np.full((p, series), np.nan)
+        varianza = np.full(series, np.nan)
+        observaciones = np.zeros(series, dtype=np.int64)
+        xtx_inv = np.full((series, p, p), np.nan)
+
+        presentes = ~np.isnan(Y)
+        patrones, grupo = np.unique(presentes.T, axis=0, return_inverse=True)
+        for k, filas in enumerate(patrones):
+            columnas = np.flatnonzero(grupo.ravel() == k)
+            n = int(filas.sum())
+            observaciones[columnas] = n
+            if n < p:
+                continue
+            Xk = X[filas]
+            beta, _, _, _ = np.linalg.lstsq(Xk, Y[filas][:, columnas], rcond=None)
+            coeficientes[:, columnas] = beta
+            residuos = Y[filas][:, columnas] - Xk @ beta
+            if n > p:
+                varianza[columnas] = (residuos ** 2).sum(axis=0) / (n - p)
+            xtx_inv[columnas] = np.linalg.pinv(Xk.T @ Xk)
+
+        return cls(claves, año_ref, grado, coeficientes, varianza, observaciones, xtx_inv)
+
+    def indice(self, tabla, atributo):
+        """Posición de la serie (tabla, atributo) en el modelo."""
+        return self._posicion[(tabla, atributo)]
+
+    def predecir(self, años, nivel=NIVEL_POR_DEFECTO):
+        """
+        Predicción e intervalo de predicción para todas las series.
+
+        Parámetros:
+            años: años en los que se evalúa la tendencia (pasados o futuros).
+            nivel: confianza del intervalo (0.95 = 95 %).
+
+        Retorna:
+            media, inferior, superior: matrices (len(años), series).
+        """
+        X0 = _diseño(np.atleast_1d(años), self.año_ref, self.grado)
+        media = X0 @ self.coeficientes
+        # Var(y0 - ŷ0) = s² (1 + x0' (X'X)⁻¹ x0), con t de Student de n - p grados de libertad.
+        apalancamiento = np.einsum("mp,spq,mq->ms", X0, self.xtx_inv, X0)
+        libertad = self.observaciones - (self.grado + 1)
+        with np.errstate(invalid="ignore"):
+            t = stats.t.ppf((1 + nivel) / 2, np.where(libertad > 0, libertad, np.nan))
+            margen = t * np.sqrt(self.varianza * (1 + apalancamiento))
+        return media, media - margen, media + margen
+
+    def guardar(self, archivo):
+        tablas = np.array([c[0] for c in self.claves], dtype=np.int64)
+        atributos = np.array([c[1] for c in self.claves], dtype=str)
+        temporal = archivo + ".tmp.npz"
+        np.savez(temporal, tablas=tablas, atributos=atributos, año_ref=self.año_ref, grado=self.grado,
+                 coeficientes=self.coeficientes, varianza=self.varianza,
+                 observaciones=self.observaciones, xtx_inv=self.xtx_inv)
+        os.replace(temporal, archivo)
+
+    @classmethod
+    def cargar(cls, archivo):
+        with np.load(archivo, allow_pickle=False) as datos:
+            claves = list(zip(datos["tablas"].tolist(), datos["atributos"].tolist()))
+            return cls(claves, float(datos["año_ref"]), int(datos["grado"]), datos["coeficientes"],
+                       datos["varianza"], datos["observaciones"], datos["xtx_inv"])
+
+
+def backtest(años, Y, claves, grado=GRADO_POR_DEFECTO, ventana_minima=VENTANA_MINIMA,
+             horizonte=1, nivel=NIVEL_POR_DEFECTO):
+    """
+    Validación con origen móvil: para cada año de corte se ajustan todas las
+    series con los años anteriores y se predice `horizonte` años adelante.
+
+    Retorna:
+        Diccionario con arreglos por serie: "mae", "rmse", "mape" (en %),
+        "cobertura" (fracción de valores reales dentro del intervalo) y
+        "pronosticos" (cantidad de predicciones evaluadas).
+    """
+    años = np.asarray(años)
+    errores, dentro = [], []
+    for corte in range(ventana_minima, len(años) - horizonte + 1):
+        modelo = ModeloTendencias.ajustar(años[:corte], Y[:corte], claves, grado)
+        objetivo = corte + horizonte - 1
+        media, inferior, superior = modelo.predecir(años[objetivo:objetivo + 1], nivel)
+        real = Y[objetivo]
+        errores.append(real - media[0])
+        dentro.append(np.where(np.isnan(real) | np.isnan(inferior[0]), np.nan,
+                               (real >= inferior[0]) & (real <= superior[0])))
+
+    errores = np.array(errores).reshape(-1, Y.shape[1])
+    dentro = np.array(dentro).reshape(-1, Y.shape[1])
+    reales = Y[ventana_minima + horizonte - 1:][:len(errores)]
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        # Las series sin ningún pronóstico evaluable quedan en NaN.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return {
+            "mae": np.nanmean(np.abs(errores), axis=0),
+            "rmse": np.sqrt(np.nanmean(errores ** 2, axis=0)),
+            "mape": 100 * np.nanmean(np.abs(errores / reales), axis=0),
+            "cobertura": np.nanmean(dentro, axis=0),
+            "pronosticos": (~np.isnan(errores)).sum(axis=0),
+        }
+
+
+def hash_series(años, claves, Y, grado):
+    """Hash de los datos de entrada del ajuste; cambia si cambia el dataset."""
+    sha = hashlib.sha256()
+    sha.update(np.ascontiguousarray(años, dtype=np.int64).tobytes())
+    sha.update(repr(claves).encode("utf-8"))
+    sha.update(np.ascontiguousarray(Y).tobytes())
+    sha.update(str(grado).encode("utf-8"))
+    return sha.hexdigest()
+
+
+def modelo_soya(grado=GRADO_POR_DEFECTO, usar_cache=True):
+    """
+    Modelo de tendencias de todas las series de Soy.csv.
+
+    Los coeficientes se guardan en la cache local con el hash de los datos
+    en el nombre del archivo, así que solo se vuelve a ajustar si el dataset
+    (o el grado) cambia.
+
+    Retorna:
+        años: años comerciales del dataset.
+        Y: matriz año × serie con los valores reales.
+        modelo: ModeloTendencias ajustado.
+    """
+    años, claves, Y = matriz_series()
+    archivo = os.path.join(DIRECTORIO_CACHE, f"tendencias-{hash_series(años, claves, Y, grado)[:16]}.npz")
+    if usar_cache and os.path.exists(archivo):
+        return años, Y, ModeloTendencias.cargar(archivo)
+
+    modelo = ModeloTendencias.ajustar(años, Y, claves, grado)
+    if usar_cache:
+        os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+        modelo.guardar(archivo)
+    return años, Y, modelo
+
+
+if __name__ == "__main__":
+    import time
+
+    from consultas_soya import TABLA_BALANCE_SOYA
+
+    inicio = time.perf_counter()
+    años, Y, modelo = modelo_soya()
+    print(f"{len(modelo.claves)} series ajustadas en {time.perf_counter() - inicio:.3f} s")
+
+    i = modelo.indice(TABLA_BALANCE_SOYA, "Production")
+    futuros = np.arange(años[-1] + 1, años[-1] + 4)
+    media, inferior, superior = modelo.predecir(futuros)
+    print("Producción de soya (millones de bushels):")
+    for año, m, a, b in zip(futuros, media[:, i], inferior[:, i], superior[:, i]):
+        print(f"  {año}: {m:,.0f}  [{a:,.0f} – {b:,.0f}]")
+
+    inicio = time.perf_counter()
+    errores = backtest(años, Y, modelo.claves)
+    print(f"Backtest de todas las series en {time.perf_counter() - inicio:.3f} s: "
+          f"MAPE de producción {errores['mape'][i]:.1f} %, cobertura {errores['cobertura'][i]:.0%}")
@@ -0,0 +1,237 @@
+import heapq
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+
+from distancias import a_cartesianas, haversine_m
+from grafo_compacto import GrafoCompacto
+
+# Distancia máxima (m) para considerar que dos vértices de rutas distintas son
+# el mismo punto de la carretera. OSRM repite exactamente los vértices en los
+# tramos compartidos, así que basta con una tolerancia pequeña.
+TOLERANCIA_AJUSTE_M = 3.0
+
+
+def ajustar_vertices(rutas, tolerancia_m=TOLERANCIA_AJUSTE_M):
+    """
+    Une los vértices de varias rutas que están a menos de `tolerancia_m` metros.
+
+    Cada grupo de puntos cercanos se reemplaza por un único punto representativo
+    (el primero que aparece), de modo que las rutas que comparten carretera
+    terminan compartiendo nodos en el grafo.
+
+    Retorna:
+        Lista de rutas (arreglos (n, 2)) con las coordenadas ajustadas.
+    """
+    bloques = [np.asarray(r, dtype=np.float64).reshape(-1, 2) for r in rutas]
+    if not bloques or tolerancia_m <= 0:
+        return bloques
+
+    puntos = np.concatenate(bloques)
+    unicos, inverso = np.unique(puntos, axis=0, return_inverse=True)
+    inverso = inverso.ravel()
+
+    # Agrupamiento por "líder": cada punto libre toma a todos sus vecinos libres.
+    # A diferencia de unir pares transitivamente, ningún punto se mueve más de
+    # `tolerancia_m`, aunque la ruta tenga vértices muy seguidos.
+    arbol = cKDTree(a_cartesianas(unicos))
+    lider = np.full(len(unicos), -1, dtype=np.int64)
+    for i in range(len(unicos)):
+        if lider[i] >= 0:
+            continue
+        vecinos = np.asarray(arbol.query_ball_point(arbol.data[i], tolerancia_m), dtype=np.int64)
+        libres = vecinos[lider[vecinos] < 0]
+        lider[libres] = i
+
+    ajustados = unicos[lider][inverso]
+    cortes = np.cumsum([len(b) for b in bloques])[:-1]
+    return np.split(ajustados, cortes)
+
+
+class RedVial(GrafoCompacto):
+    """
+    Red de carreteras formada por la unión de todas las rutas obtenidas de OSRM.
+
+    A diferencia del grafo de una sola ruta, aquí las rutas de las fincas,
+    el centro de acopio y el puerto comparten nodos donde se superponen,
+    así que se pueden responder consultas nuevas (finca → puerto, caminos
+    alternativos, origen más cercano) sin volver a llamar a OSRM.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._arbol = None
+        self._listas = None
+
+    @classmethod
+    def desde_rutas(cls, rutas, tolerancia_m=TOLERANCIA_AJUSTE_M, bidireccional=True, **opciones):
+        """
+        Construye la red a partir de varias rutas.
+
+        Parámetros:
+            rutas: iterable de listas de puntos (lat, lon).
+            tolerancia_m: distancia para unir vértices de rutas distintas.
+            bidireccional: si es True cada tramo se puede recorrer en ambos
+                sentidos (las carreteras rurales suelen ser de doble sentido).
+            opciones: se pasan a GrafoCompacto.desde_rutas (decimales, modo).
+        """
+        ajustadas = ajustar_vertices(rutas, tolerancia_m)
+        if bidireccional:
+            ajustadas = ajustadas + [r[::-1] for r in ajustadas]
+        return super().desde_rutas(ajustadas, **opciones)
+
+    def _arbol_nodos(self):
+        if self._arbol is None:
+            self._arbol = cKDTree(a_cartesianas(self.coords))
+        return self._arbol
+
+    def nodo_mas_cercano(self, punto):
+        """
+        Retorna (id_nodo, distancia_m) del nodo de la red más cercano a `punto` (lat, lon).
+        Permite consultar la red con coordenadas que no son exactamente un vértice.
+        """
+        xyz = a_cartesianas(np.asarray(punto, dtype=np.float64).reshape(1, 2))[0]
+        distancia, i = self._arbol_nodos().query(xyz)
+        return int(i), float(distancia)
+
+    def uniones(self):
+        """
+        Retorna los ids de los nodos donde se cruzan o separan rutas,
+        es decir, los que tienen tres o más vecinos distintos.
+        """
+        matriz = self.matriz()
+        simetrica = (matriz + matriz.T).tocsr()
+        return np.flatnonzero(np.diff(simetrica.indptr) >= 3)
+
+    def _camino_desde_predecesores(self, predecesores, i, j):
+        nodos = [j]
+        while nodos[-1] != i:
+            nodos.append(predecesores[nodos[-1]])
+        nodos.reverse()
+        return nodos
+
+    def _longitud(self, nodos):
+        # Suma de los pesos originales de las aristas del camino.
+        total = 0.0
+        for a, b in zip(nodos[:-1], nodos[1:]):
+            inicio, fin = self.indptr[a], self.indptr[a + 1]
+            k = inicio + int(np.flatnonzero(self.indices[inicio:fin] == b)[0])
+            total += float(self.pesos[k])
+        return total
+
+    def camino_multiorigen(self, origenes, destino):
+        """
+        Dijkstra desde varios orígenes a la vez: encuentra cuál de los
+        `origenes` llega antes al `destino` por la red.
+
+        Parámetros:
+            origenes: lista de puntos (lat, lon), por ejemplo todas las fincas.
+            destino: punto (lat, lon), por ejemplo el puerto.
+
+        Retorna:
+            indice_origen: posición en `origenes` del origen elegido.
+            camino: lista de puntos (lat, lon).
+            longitud_m: longitud del camino en metros.
+        """
+        ids = [self.nodo_mas_cercano(p)[0] for p in origenes]
+        j = self.nodo_mas_cercano(destino)[0]
+        distancias, predecesores, fuentes = dijkstra(
+            self.matriz(), indices=ids, return_predecessors=True, min_only=True
+        )
+        if not np.isfinite(distancias[j]):
+            raise ValueError(f"Ningún origen tiene camino hasta {tuple(destino)}.")
+
+        i = int(fuentes[j])
+        nodos = self._camino_desde_predecesores(predecesores, i, j)
+        return ids.index(i), [tuple(p) for p in self.coords[nodos].tolist()], float(distancias[j])
+
+    def _astar(self, i, j, pesos):
+        # A* sobre la adyacencia CSR. Se trabaja con listas de Python porque
+        # el acceso elemento a elemento es mucho más rápido que con NumPy.
+        # La heurística se reduce un 1 % para que siga siendo admisible
+        # aunque los pesos se hayan calculado sobre el elipsoide.
+        heuristica = (0.99 * haversine_m(self.coords[:, 0], self.coords[:, 1], *self.coords[j])).tolist()
+        if self._listas is None:
+            # La adyacencia no cambia: se convierte a listas una sola vez por red.
+            self._listas = (self.indptr.tolist(), self.indices.tolist(), self.pesos.tolist())
+        indptr, indices, pesos_red = self._listas
+        pesos = pesos_red if pesos is self.pesos else pesos.tolist()
+
+        costo = {i: 0.0}
+        predecesores = {}
+        abiertos = [(heuristica[i], i)]
+        cerrados = set()
+
+        while abiertos:
+            _, actual = heapq.heappop(abiertos)
+            if actual == j:
+                return self._camino_desde_predecesores(predecesores, i, j)
+            if actual in cerrados:
+                continue
+            cerrados.add(actual)
+            for k in range(indptr[actual], indptr[actual + 1]):
+                vecino = indices[k]
+                nuevo = costo[actual] + pesos[k]
+                if nuevo < costo.get(vecino, float("inf")):
+                    costo[vecino] = nuevo
+                    predecesores[vecino] = actual
+                    heapq.heappush(abiertos, (nuevo + heuristica[vecino], vecino))
+
+        return None
+
+    def camino_astar(self, origen, destino):
+        """
+        Camino más corto con A* usando la distancia geodésica al destino como heurística.
+
+        La heurística nunca supera la distancia real por carretera, por lo que el
+        resultado es el mismo que Dijkstra pero explorando muchos menos nodos.
+
+        Retorna:
+            camino: lista de puntos (lat, lon).
+            longitud_m: longitud del camino en metros.
+        """
+        i = self.nodo_mas_cercano(origen)[0]
+        j = self.nodo_mas_cercano(destino)[0]
+        return self.camino_entre_nodos(i, j)
+
+    def camino_entre_nodos(self, i, j):
+        """
+        Igual que camino_astar(), pero entre dos ids de nodo ya ajustados
+        (por ejemplo con nodo_mas_cercano()).
+        """
+        nodos = self._astar(i, j, self.pesos)
+        if nodos is None:
+            raise ValueError(f"No hay camino entre {tuple(self.coords[i])} y {tuple(self.coords[j])}.")
+        return [tuple(p) for p in self.coords[nodos].tolist()], self._longitud(nodos)
+
+    def caminos_alternativos(self, origen, destino, k=3, penalizacion=2.0):
+        """
+        Hasta `k` caminos distintos entre origen y destino (método de penalización).
+
+        Después de cada camino encontrado, los pesos de sus aristas se multiplican
+        por `penalizacion` y se vuelve a buscar, lo que favorece caminos que
+        usan otras carreteras. Las longitudes retornadas son las reales.
+
+        Retorna:
+            Lista de tuplas (camino, longitud_m) ordenada por longitud.
+        """
+        i = self.nodo_mas_cercano(origen)[0]
+        j = self.nodo_mas_cercano(destino)[0]
+        pesos = self.pesos.astype(np.float64)
+        caminos, vistos = [], set()
+        for _ in range(k * 2):
+            nodos = self._astar(i, j, pesos)
+            if nodos is None:
+                break
+            if tuple(nodos) not in vistos:
+                vistos.add(tuple(nodos))
+                caminos.append(([tuple(p) for p in self.coords[nodos].tolist()], self._longitud(nodos)))
+                if len(caminos) == k:
+                    break
+            # Se penalizan las aristas usadas para buscar otra alternativa.
+            for a, b in zip(nodos[:-1], nodos[1:]):
+                inicio, fin = self.indptr[a], self.indptr[a + 1]
+                pesos[inicio + np.flatnonzero(self.indices[inicio:fin] == b)] *= penalizacion
+
+        return sorted(caminos, key=lambda c: c[1])
@@ -0,0 +1,356 @@
+# Registro de fincas, centros de acopio y puertos.
+#
+# Los lugares se leen de un archivo de datos (CSV, GeoJSON o Parquet) en vez
+# de repetir las mismas listas en cada módulo. El registro guarda cada columna
+# en un arreglo NumPy (una fila por lugar): con miles de parcelas ocupa mucho
+# menos que una lista de diccionarios y las coordenadas ya están listas para
+# los cálculos vectorizados (distancias.py, indice_espacial.py).
+#
+# Uso: python src/registro_ubicaciones.py [archivo]
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Archivo por defecto; AGROPATH_UBICACIONES permite usar el de otra instalación.
+RUTA_UBICACIONES = os.environ.get(
+    "AGROPATH_UBICACIONES",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dataset", "ubicaciones.csv"),
+)
+
+# Tipos de lugar; en el registro cada uno se guarda como su posición (int8).
+TIPOS_UBICACION = ("finca", "acopio", "puerto")
+
+COLUMNAS_OBLIGATORIAS = ("tipo", "nombre", "lat", "lon")
+COLUMNAS_OPCIONALES = ("info", "toneladas", "capacidad")
+
+# Filas por bloque al leer archivos grandes.
+TAMAÑO_BLOQUE = 50_000
+
+# Filas con error que se muestran en el mensaje de validación.
+MAX_ERRORES_MOSTRADOS = 5
+
+_cargados = {}
+
+
+class Ubicacion:
+    """
+    Un lugar del registro.
+
+    Se lee como atributo (u.lat) o como diccionario (u["lat"], u.get("toneladas", 1)),
+    igual que los diccionarios que usaban antes los mapas y las rutas.
+    """
+
+    __slots__ = ("tipo", "nombre", "lat", "lon", "info", "toneladas", "capacidad")
+
+    def __init__(self, tipo, nombre, lat, lon, info="", toneladas=None, capacidad=None):
+        self.tipo = tipo
+        self.nombre = nombre
+        self.lat = lat
+        self.lon = lon
+        self.info = info
+        self.toneladas = toneladas
+        self.capacidad = capacidad
+
+    def __getitem__(self, clave):
+        if clave not in self.__slots__:
+            raise KeyError(clave)
+        return getattr(self, clave)
+
+    def __contains__(self, clave):
+        return clave in self.__slots__ and getattr(self, clave) is not None
+
+    def get(self, clave, por_defecto=None):
+        valor = getattr(self, clave) if clave in self.__slots__ else None
+        return por_defecto if valor is None else valor
+
+    @property
+    def punto(self):
+        """Tupla (lat, lon)."""
+        return (self.lat, self.lon)
+
+    def __repr__(self):
+        return f"Ubicacion({self.tipo!r}, {self.nombre!r}, {self.lat}, {self.lon})"
+
+
+def _opcional(valor):
+    # NaN en las columnas numéricas opcionales significa "sin dato".
+    return None if np.isnan(valor) else float(valor)
+
+
+def _filas_con_error(mascara, fila_inicial):
+    filas = (np.flatnonzero(mascara) + fila_inicial + 1).tolist()
+    texto = ", ".join(map(str, filas[:MAX_ERRORES_MOSTRADOS]))
+    return texto + (f" y {len(filas) - MAX_ERRORES_MOSTRADOS} más" if len(filas) > MAX_ERRORES_MOSTRADOS else "")
+
+
+def validar_tabla(tabla, origen="", fila_inicial=0):
+    """
+    Revisa un bloque de filas y lo devuelve con los tipos normalizados.
+
+    Parámetros:
+        tabla: DataFrame con al menos las columnas tipo, nombre, lat y lon.
+        origen: nombre del archivo (para los mensajes de error).
+        fila_inicial: filas leídas antes de este bloque (para numerar los errores).
+
+    Flujo:
+        1. Comprueba que estén las columnas obligatorias.
+        2. Convierte lat, lon, toneladas y capacidad a números.
+        3. Rechaza tipos desconocidos, nombres vacíos, coordenadas fuera de
+           rango o faltantes y cantidades negativas.
+
+    Lanza ValueError con las filas (contadas desde 1, sin el encabezado) que fallan.
+    """
+    faltan = [c for c in COLUMNAS_OBLIGATORIAS if c not in tabla.columns]
+    if faltan:
+        raise ValueError(f"{origen}: faltan columnas obligatorias: {', '.join(faltan)}")
+
+    limpia = pd.DataFrame(index=tabla.index)
+    limpia["tipo"] = tabla["tipo"].fillna("").astype(str).str.strip().str.lower()
+    limpia["nombre"] = tabla["nombre"].fillna("").astype(str).str.strip()
+    limpia["info"] = tabla["info"].fillna("").astype(str) if "info" in tabla.columns else ""
+    for columna in ("lat", "lon", "toneladas", "capacidad"):
+        if columna in tabla.columns:
+            limpia[columna] = pd.to_numeric(tabla[columna], errors="coerce").astype(np.float64)
+        else:
+            limpia[columna] = np.nan
+
+    lat, lon = limpia["lat"].to_numpy(), limpia["lon"].to_numpy()
+    revisiones = (
+        (~limpia["tipo"].isin(TIPOS_UBICACION).to_numpy(), f"tipo desconocido (opciones: {', '.join(TIPOS_UBICACION)})"),
+        (limpia["nombre"].to_numpy() == "", "nombre vacío"),
+        (~(np.abs(lat) <= 90), "latitud faltante o fuera de [-90, 90]"),
+        (~(np.abs(lon) <= 180), "longitud faltante o fuera de [-180, 180]"),
+        (limpia["toneladas"].to_numpy() < 0, "toneladas negativas"),
+        (limpia["capacidad"].to_numpy() < 0, "capacidad negativa"),
+    )
+    errores = [f"{motivo} en filas {_filas_con_error(m, fila_inicial)}" for m, motivo in revisiones if m.any()]
+    if errores:
+        raise ValueError(f"{origen}: " + "; ".join(errores))
+    return limpia
+
+
+class RegistroUbicaciones:
+    """
+    Lugares guardados por columnas (un arreglo por campo).
+
+    Se usa como una lista de lugares: len(r), r[i] (una Ubicacion), for u in r.
+    Un índice por tramo o por máscara (r[2:5], r[mascara]) devuelve otro registro.
+
+    - tipo: int8, posición en TIPOS_UBICACION.
+    - nombre, info: arreglos de texto (object).
+    - lat, lon, toneladas, capacidad: float64; NaN en toneladas/capacidad = sin dato.
+    """
+
+    __slots__ = ("tipo", "nombre", "lat", "lon", "info", "toneladas", "capacidad")
+
+    def __init__(self, tipo, nombre, lat, lon, info=None, toneladas=None, capacidad=None):
+        self.tipo = np.asarray(tipo, dtype=np.int8)
+        self.nombre = np.asarray(nombre, dtype=object)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        n = len(self.lat)
+        self.info = np.asarray(info, dtype=object) if info is not None else np.full(n, "", dtype=object)
+        self.toneladas = np.asarray(toneladas, dtype=np.float64) if toneladas is not None else np.full(n, np.nan)
+        self.capacidad = np.asarray(capacidad, dtype=np.float64) if capacidad is not None else np.full(n, np.nan)
+
+    @classmethod
+    def desde_tabla(cls, tabla, origen="", fila_inicial=0):
+        """Registro a partir de un DataFrame, validado con validar_tabla()."""
+        limpia = validar_tabla(tabla, origen, fila_inicial)
+        codigos = pd.Categorical(limpia["tipo"], categories=TIPOS_UBICACION).codes
+        return cls(
+            codigos, limpia["nombre"].to_numpy(dtype=object), limpia["lat"].to_numpy(), limpia["lon"].to_numpy(),
+            limpia["info"].to_numpy(dtype=object), limpia["toneladas"].to_numpy(), limpia["capacidad"].to_numpy(),
+        )
+
+    @classmethod
+    def concatenar(cls, registros):
+        """Une varios registros (por ejemplo, los bloques de iterar_ubicaciones())."""
+        registros = list(registros)
+        if not registros:
+            return cls([], [], [], [])
+        return cls(*(np.concatenate([getattr(r, c) for r in registros]) for c in cls.__slots__))
+
+    def __len__(self):
+        return len(self.lat)
+
+    def __getitem__(self, i):
+        if isinstance(i, (int, np.integer)):
+            return Ubicacion(
+                TIPOS_UBICACION[self.tipo[i]], self.nombre[i], float(self.lat[i]), float(self.lon[i]),
+                self.info[i], _opcional(self.toneladas[i]), _opcional(self.capacidad[i]),
+            )
+        return RegistroUbicaciones(*(getattr(self, c)[i] for c in self.__slots__))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self):
+        conteo = ", ".join(f"{t}={int((self.tipo == k).sum())}" for k, t in enumerate(TIPOS_UBICACION))
+        return f"RegistroUbicaciones({conteo})"
+
+    @property
+    def coordenadas(self):
+        """Arreglo (n, 2) con (lat, lon)."""
+        return np.column_stack((self.lat, self.lon))
+
+    def de_tipo(self, *tipos):
+        """Registro solo con los lugares de los tipos dados ("finca", "acopio", "puerto")."""
+        codigos = [TIPOS_UBICACION.index(t) for t in tipos]
+        return self[np.isin(self.tipo, codigos)]
+
+    def primero(self, tipo):
+        """Primer lugar del tipo dado; KeyError si no hay ninguno."""
+        posiciones = np.flatnonzero(self.tipo == TIPOS_UBICACION.index(tipo))
+        if not len(posiciones):
+            raise KeyError(f"El registro no tiene ningún lugar de tipo '{tipo}'.")
+        return self[int(posiciones[0])]
+
+    def buscar(self, nombre):
+        """Lugar con ese nombre; KeyError si no existe."""
+        posiciones = np.flatnonzero(self.nombre == nombre)
+        if not len(posiciones):
+            raise KeyError(nombre)
+        return self[int(posiciones[0])]
+
+    @property
+    def fincas(self):
+        return self.de_tipo("finca")
+
+    @property
+    def acopios(self):
+        return self.de_tipo("acopio")
+
+    @property
+    def puertos(self):
+        return self.de_tipo("puerto")
+
+    @property
+    def acopio(self):
+        """Centro de acopio principal (el primero del archivo)."""
+        return self.primero("acopio")
+
+    @property
+    def puerto(self):
+        """Puerto principal (el primero del archivo)."""
+        return self.primero("puerto")
+
+
+# ------------------------------------------------------
+# Lectura por bloques
+# ------------------------------------------------------
+
+def _bloques_csv(ruta, tamaño_bloque):
+    texto = {"tipo": "str", "nombre": "str", "info": "str"}
+    yield from pd.read_csv(ruta, dtype=texto, chunksize=tamaño_bloque, encoding="utf-8-sig")
+
+
+def _tabla_features(features):
+    # Features de tipo Point: las coordenadas GeoJSON vienen como [lon, lat].
+    filas = []
+    for feature in features:
+        geometria = feature.get("geometry") or {}
+        lon, lat = (geometria.get("coordinates") or [None, None])[:2] if geometria.get("type") == "Point" else (None, None)
+        filas.append({**(feature.get("properties") or {}), "lat": lat, "lon": lon})
+    return pd.DataFrame(filas)
+
+
+def _bloques_geojson(ruta, tamaño_bloque):
+    # Un FeatureCollection es un solo objeto JSON: se lee completo y se entrega
+    # por bloques. Para archivos que no caben en memoria, usar GeoJSON por líneas.
+    with open(ruta, encoding="utf-8") as archivo:
+        features = json.load(archivo).get("features", [])
+    for inicio in range(0, len(features), tamaño_bloque):
+        yield _tabla_features(features[inicio:inicio + tamaño_bloque])
+
+
+def _bloques_geojson_lineas(ruta, tamaño_bloque):
+    # GeoJSON por líneas (una Feature por línea, RFC 8142): se lee de a un bloque.
+    features = []
+    with open(ruta, encoding="utf-8") as archivo:
+        for linea in archivo:
+            linea = linea.strip().lstrip("\x1e")
+            if not linea:
+                continue
+            features.append(json.loads(linea))
+            if len(features) == tamaño_bloque:
+                yield _tabla_features(features)
+                features = []
+    if features:
+        yield _tabla_features(features)
+
+
+def _bloques_parquet(ruta, tamaño_bloque):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Leer archivos Parquet requiere pyarrow (pip install pyarrow).") from e
+    for lote in pq.ParquetFile(ruta).iter_batches(batch_size=tamaño_bloque):
+        yield lote.to_pandas()
+
+
+LECTORES = {
+    ".csv": _bloques_csv,
+    ".geojson": _bloques_geojson,
+    ".json": _bloques_geojson,
+    ".geojsonl": _bloques_geojson_lineas,
+    ".geojsons": _bloques_geojson_lineas,
+    ".ndjson": _bloques_geojson_lineas,
+    ".parquet": _bloques_parquet,
+}
+
+
+def iterar_ubicaciones(ruta=RUTA_UBICACIONES, tamaño_bloque=TAMAÑO_BLOQUE, tipos=None):
+    """
+    Lee un archivo de lugares por bloques, sin cargarlo completo.
+
+    Parámetros:
+        ruta: archivo CSV, GeoJSON (.geojson/.json), GeoJSON por líneas
+            (.geojsonl/.geojsons/.ndjson) o Parquet.
+        tamaño_bloque: filas por bloque.
+        tipos: tupla de tipos a conservar (por ejemplo ("finca",)); None conserva todos.
+
+    Retorna:
+        Un generador de RegistroUbicaciones, uno por bloque, ya validados.
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension not in LECTORES:
+        raise ValueError(f"Formato de archivo no soportado: {extension}. Opciones: {', '.join(LECTORES)}")
+
+    leidas = 0
+    for tabla in LECTORES[extension](ruta, tamaño_bloque):
+        bloque = RegistroUbicaciones.desde_tabla(tabla.reset_index(drop=True), ruta, leidas)
+        leidas += len(tabla)
+        yield bloque.de_tipo(*tipos) if tipos else bloque
+
+
+def cargar_ubicaciones(ruta=RUTA_UBICACIONES, tamaño_bloque=TAMAÑO_BLOQUE):
+    """
+    Carga todo el archivo en un solo registro.
+
+    El resultado se guarda por proceso y se reutiliza mientras el archivo no
+    cambie (misma fecha de modificación y tamaño), así todos los módulos que
+    importan las fincas comparten la misma copia.
+    """
+    info = os.stat(ruta)
+    clave = (os.path.abspath(ruta), info.st_mtime_ns, info.st_size)
+    if clave not in _cargados:
+        _cargados[clave] = RegistroUbicaciones.concatenar(iterar_ubicaciones(ruta, tamaño_bloque))
+    return _cargados[clave]
+
+
+if __name__ == "__main__":
+    ruta = sys.argv[1] if len(sys.argv) > 1 else RUTA_UBICACIONES
+    total = 0
+    for bloque in iterar_ubicaciones(ruta):
+        total += len(bloque)
+        print(f"Bloque de {len(bloque)} lugares: {bloque}")
+    registro = cargar_ubicaciones(ruta)
+    print(f"{total} lugares en {ruta}.")
+    print(f"Centro de acopio: {registro.acopio.nombre} {registro.acopio.punto}")
+    print(f"Puerto: {registro.puerto.nombre} {registro.puerto.punto}")
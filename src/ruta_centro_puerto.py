@@ -1,63 +1,24 @@
 # ruta_folium_osrm_networkx.py
-# Requisitos: pip install folium requests networkx geopy
+# Requisitos: pip install folium requests numpy scipy geopy
 #
 # Este script:
-# 1. Consulta OSRM para obtener una ruta entre dos coordenadas.
-# 2. Convierte los puntos de la ruta en un grafo dirigido usando NetworkX.
-# 3. Calcula distancias con geodesic.
+# 1. Consulta OSRM para obtener una ruta entre dos coordenadas (con cache en disco).
+# 2. Convierte los puntos de la ruta en un grafo dirigido compacto (ver grafo_compacto.py).
+# 3. Calcula distancias geodésicas vectorizadas (ver distancias.py).
 # 4. Visualiza la ruta en un mapa interactivo con Folium.
 # 5. Calcula la ruta más corta dentro del propio grafo reconstruido.
 
-import requests
 import folium
-import networkx as nx
-from geopy.distance import geodesic
 
-# Coordenadas iniciales (latitud, longitud)
-# Estas representan el origen y destino para solicitar la ruta a OSRM.
-origin = (39.481427, -88.303999)
-destination = (38.61, -90.20)
+from cache_rutas import cache_por_defecto
+from distancias import MODO_POR_DEFECTO
+from grafo_compacto import GrafoCompacto
+from indice_espacial import caja_envolvente
+from registro_ubicaciones import cargar_ubicaciones
+from rutas_osrm import get_osrm_route
+from simplificacion import ZOOM_DETALLE, resumen, simplificar_ruta
 
-def get_osrm_route(origin_latlon, dest_latlon, profile="driving"):
-    """
-    Consulta la API pública de OSRM para obtener la geometría completa
-    de la ruta entre dos puntos.
-
-    Parámetros:
-        origin_latlon: (lat, lon) del origen.
-        dest_latlon: (lat, lon) del destino.
-        profile: modo de transporte ("driving", "walking", "cycling").
-
-    Retorna:
-        route_points: lista de tuplas (lat, lon) con cada punto de la ruta.
-        distance_m: distancia total en metros según OSRM.
-    """
-
-    # OSRM requiere formato lon,lat (invertido respecto a folium/geopy)
-    o_lon, o_lat = origin_latlon[1], origin_latlon[0]
-    d_lon, d_lat = dest_latlon[1], dest_latlon[0]
-
-    # URL hacia el servidor público OSRM con parámetros para obtener la geometría en GeoJSON
-    url = (
-        f"http://router.project-osrm.org/route/v1/{profile}/"
-        f"{o_lon},{o_lat};{d_lon},{d_lat}?overview=full&geometries=geojson"
-    )
-
-    # Petición HTTP con timeout para evitar cuelgues
-    resp = requests.get(url, timeout=20)
-    resp.raise_for_status()  # Lanza error si falla
-
-    data = resp.json()
-
-    # La geometría viene como una lista de [lon, lat]
-    coords = data["routes"][0]["geometry"]["coordinates"]
-
-    # Convertimos cada punto a (lat, lon) para usar en geopy/folium
-    route_points = [(pt[1], pt[0]) for pt in coords]
-
-    return route_points, data["routes"][0]["distance"]
-
-def build_graph(route_points):
+def build_graph(route_points, modo=MODO_POR_DEFECTO):
     """
     Crea un grafo dirigido donde cada punto de la ruta es un nodo
     y cada tramo consecutivo es una arista con peso igual a la
@@ -65,26 +26,21 @@ def build_graph(route_points):
 
     Esto permite usar algoritmos de rutas como Dijkstra o A* directamente
     sobre la ruta obtenida de OSRM.
-    """
-    G = nx.DiGraph()
-
-    # Recorre cada par consecutivo de puntos y calcula distancia geodésica.
-    for i in range(len(route_points) - 1):
-        p1, p2 = route_points[i], route_points[i + 1]
 
-        # Distancia en metros entre p1 y p2
-        dist_m = geodesic(p1, p2).meters
+    modo: precisión de las distancias ("haversine", "vincenty" o "karney"),
+    ver distancias.py.
 
-        # El grafo es dirigido porque la ruta tiene dirección implícita.
-        G.add_edge(p1, p2, weight=dist_m)
-
-    return G
+    El grafo es dirigido porque la ruta tiene dirección implícita. Se guarda
+    en arreglos (GrafoCompacto); G.a_networkx() lo convierte si hace falta.
+    """
+    return GrafoCompacto.desde_rutas([route_points], modo=modo)
 
-def build_map(origin, destination, route_points, map_filename="ruta_osrm.html"):
+def build_map(origin, destination, route_points, map_filename="ruta_osrm.html", zoom_detalle=ZOOM_DETALLE):
     """
     Construye un mapa interactivo con Folium:
     - Marca origen y destino.
-    - Dibuja la línea de la ruta.
+    - Dibuja la línea de la ruta, simplificada para que se vea igual
+      hasta el zoom `zoom_detalle` (None la dibuja completa).
     - Ajusta el mapa a los límites de la ruta.
     - Guarda el archivo HTML.
 
@@ -102,46 +58,67 @@ def build_map(origin, destination, route_points, map_filename="ruta_osrm.html"):
     folium.Marker(origin, tooltip="Origen").add_to(m)
     folium.Marker(destination, tooltip="Destino").add_to(m)
 
-    # Línea de la ruta
-    folium.PolyLine(route_points, weight=6, opacity=0.8, color="blue").add_to(m)
+    # Línea de la ruta (simplificada para reducir el tamaño del HTML)
+    linea = route_points
+    if zoom_detalle is not None:
+        linea, estadisticas = simplificar_ruta(route_points, zoom_detalle)
+        print(f"Simplificación de la ruta: {resumen(estadisticas)}")
+    folium.PolyLine(linea, weight=6, opacity=0.8, color="blue").add_to(m)
 
     # Calcular límites del recorrido para ajustar vista automáticamente
-    sw = [min(p[0] for p in route_points), min(p[1] for p in route_points)]
-    ne = [max(p[0] for p in route_points), max(p[1] for p in route_points)]
-    m.fit_bounds([sw, ne])
+    m.fit_bounds(caja_envolvente(route_points))
 
     m.save(map_filename)
     return m
 
-def generar_ruta_cent():
+def generar_ruta_cent(map_filename="ruta_osrm.html", progreso=None):
+    """
+    Consulta la ruta del centro de acopio al puerto, la analiza como grafo y guarda el mapa.
+
+    Parámetros:
+        map_filename: archivo HTML de salida.
+        progreso: Trabajo de trabajos.py cuando se ejecuta en segundo plano
+            (recibe el avance y los mensajes, y permite cancelar).
+
+    Retorna:
+        La ruta del mapa generado.
+    """
+    avisar = print if progreso is None else progreso.anotar
+    if progreso is not None:
+        progreso(0, 3, "Consultando ruta")
+
+    # Coordenadas (latitud, longitud) del centro de acopio y del puerto, del
+    # registro de ubicaciones: son el origen y destino para solicitar la ruta a OSRM.
+    registro = cargar_ubicaciones()
+    origin, destination = registro.acopio.punto, registro.puerto.punto
+
     # Obtener la ruta desde OSRM
     route_points, distance_m = get_osrm_route(origin, destination)
-    print(f"Ruta total: {distance_m/1000:.2f} km con {len(route_points)} puntos.")
+    avisar(f"Ruta total: {distance_m/1000:.2f} km con {len(route_points)} puntos.")
+    if progreso is not None:
+        progreso(1, 3, "Construyendo grafo")
 
     # Construir grafo con la ruta
     G = build_graph(route_points)
-    print(f"Grafo construido con {G.number_of_nodes()} nodos y {G.number_of_edges()} aristas.")
+    avisar(f"Grafo construido con {G.num_nodos} nodos y {G.num_aristas} aristas.")
 
     # Calcular la suma de pesos (debería ser muy similar a la distancia OSRM)
-    total_weight = sum(nx.get_edge_attributes(G, "weight").values())
-    print(f"Peso total del grafo (suma de distancias): {total_weight/1000:.2f} km")
+    total_weight = G.peso_total()
+    avisar(f"Peso total del grafo (suma de distancias): {total_weight/1000:.2f} km")
 
     # Ejemplo: ruta más corta usando Dijkstra sobre el grafo construido
-    shortest_path = nx.shortest_path(
-        G,
-        source=route_points[0],
-        target=route_points[-1],
-        weight="weight"
-    )
-    path_len = nx.shortest_path_length(
-        G,
-        source=route_points[0],
-        target=route_points[-1],
-        weight="weight"
-    )
-
-    print(f"Ruta más corta en el grafo: {len(shortest_path)} nodos, {path_len/1000:.2f} km")
+    shortest_path, path_len = G.camino_mas_corto(route_points[0], route_points[-1])
+
+    avisar(f"Ruta más corta en el grafo: {len(shortest_path)} nodos, {path_len/1000:.2f} km")
+    if progreso is not None:
+        progreso(2, 3, "Dibujando mapa")
 
     # Crear y guardar el mapa HTML
-    build_map(origin, destination, route_points)
-    print("Mapa guardado como ruta_osrm.html.")
+    build_map(origin, destination, route_points, map_filename)
+    avisar(f"Mapa guardado como {map_filename}.")
+
+    stats = cache_por_defecto().estadisticas()
+    avisar(f"Cache de rutas: {stats['aciertos']} aciertos, {stats['fallos']} fallos.")
+    if progreso is not None:
+        progreso(3, 3)
+    return map_filename
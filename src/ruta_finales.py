@@ -1,103 +1,37 @@
-import requests
 import folium
-import networkx as nx
-from geopy.distance import geodesic
 import random
 
-# ======================================================
-# 1. DATOS
-# ======================================================
-
-# Lista de fincas con sus coordenadas y un texto descriptivo.
-# Se usarán como puntos de origen para calcular rutas hacia el centro de acopio.
-fincas = [
-    {"nombre": "Finca 1", "lat": 40.92, "lon": -89.53, "info": "Parcela de producción"},
-    {"nombre": "Finca 2", "lat": 40.92, "lon": -89.54, "info": "Parcela de producción"},
-    {"nombre": "Finca 3", "lat": 40.91, "lon": -89.53, "info": "Parcela de producción"},
-    {"nombre": "Finca 4", "lat": 40.91, "lon": -89.52, "info": "Parcela de producción"},
-    {"nombre": "Finca 5", "lat": 40.91, "lon": -89.54, "info": "Parcela de producción"},
-    {"nombre": "Finca 6", "lat": 40.91, "lon": -89.55, "info": "Parcela de producción"},
-    {"nombre": "Finca 7", "lat": 40.91, "lon": -89.51, "info": "Parcela de producción"},
-]
-
-# Coordenadas del centro de acopio (destino principal).
-centro_acopio = (39.481427, -88.303999)
-
-# Información del puerto (destino adicional).
-puerto = {
-    "nombre": "Port of Metropolitan St. Louis",
-    "lat": 38.61,
-    "lon": -90.20,
-    "info": (
-        "Ubicación: Port of Metropolitan St. Louis\n"
-        "Latitud: 38.61° N\nLongitud: 90.20° W\n"
-        "Tipo: Puerto fluvial en el río Misisipi."
-    ),
-}
+from cache_rutas import cache_por_defecto
+from distancias import MODO_POR_DEFECTO
+from grafo_compacto import GrafoCompacto
+from indice_espacial import caja_envolvente
+from marcadores import agregar_marcadores, marcador_lugar
+from red_vial import RedVial
+from registro_ubicaciones import cargar_ubicaciones
+from simplificacion import ZOOM_DETALLE, resumen, simplificar_ruta, sumar_estadisticas
+from rutas_osrm import get_osrm_route, obtener_rutas_lote
 
 # ======================================================
-# 2. FUNCIONES
+# 1. FUNCIONES
 # ======================================================
 
-def get_osrm_route(origin_latlon, dest_latlon, profile="driving"):
-    """
-    Consulta OSRM (un servicio de rutas libre) para obtener la ruta entre dos puntos.
-
-    Parámetros:
-    - origin_latlon: (lat, lon) del punto de origen.
-    - dest_latlon: (lat, lon) del destino.
-    - profile: tipo de ruta (por defecto "driving").
-
-    Retorna:
-    - route_points: lista de coordenadas (lat, lon) de la ruta alineadas para folium.
-    - distance: distancia total en metros.
-
-    Por qué se usa OSRM:
-    - Permite obtener rutas reales de carretera sin necesidad de APIs privadas.
-    """
-    # OSRM requiere coordenadas como lon,lat
-    o_lon, o_lat = origin_latlon[1], origin_latlon[0]
-    d_lon, d_lat = dest_latlon[1], dest_latlon[0]
-
-    # Construcción del endpoint API de OSRM.
-    url = (
-        f"http://router.project-osrm.org/route/v1/{profile}/"
-        f"{o_lon},{o_lat};{d_lon},{d_lat}?overview=full&geometries=geojson"
-    )
-
-    # Petición a OSRM
-    resp = requests.get(url, timeout=20)
-    resp.raise_for_status()
-    data = resp.json()
-
-    # OSRM devuelve coordenadas (lon, lat), se convierten a (lat, lon)
-    coords = data["routes"][0]["geometry"]["coordinates"]
-    route_points = [(pt[1], pt[0]) for pt in coords]
-
-    return route_points, data["routes"][0]["distance"]
-
-
-def build_graph(route_points):
+def build_graph(route_points, modo=MODO_POR_DEFECTO):
     """
     Construye un grafo dirigido con pesos basados en la distancia geodésica entre puntos consecutivos.
+    `modo` elige la precisión de las distancias (ver distancias.py).
 
     Por qué se crea un grafo:
     - Permite representar rutas como una estructura de nodos y aristas.
     - Es útil para análisis posteriores: pesos totales, rutas alternativas, optimización, etc.
-    """
-    G = nx.DiGraph()
-
-    # Por cada par consecutivo de puntos de la ruta, se calcula la distancia real
-    # usando geodesic (más precisa en distancias sobre la Tierra).
-    for i in range(len(route_points) - 1):
-        p1, p2 = route_points[i], route_points[i + 1]
-        dist_m = geodesic(p1, p2).meters
-        G.add_edge(p1, p2, weight=dist_m)
 
-    return G
+    El grafo se guarda en arreglos compactos (ver grafo_compacto.py). Para
+    unir varias rutas en un solo grafo se usa GrafoCompacto.desde_rutas().
+    """
+    return GrafoCompacto.desde_rutas([route_points], modo=modo)
 
 
-def build_unified_map(fincas, centro_acopio, puerto, rutas, ruta_extra, map_filename="rutas_unificadas.html"):
+def build_unified_map(fincas, centro_acopio, puerto, rutas, ruta_extra, map_filename="rutas_unificadas.html",
+                      zoom_detalle=ZOOM_DETALLE, modo_marcadores="auto"):
     """
     Crea un mapa con:
     - Marcadores de fincas
@@ -107,34 +41,23 @@ def build_unified_map(fincas, centro_acopio, puerto, rutas, ruta_extra, map_file
     - Ruta adicional centro → puerto
 
     Se usa Folium porque permite generar mapas HTML interactivos fáciles de visualizar.
+    Las líneas se simplifican para que se vean igual hasta el zoom `zoom_detalle`
+    (ver simplificacion.py); con None se dibujan completas. Las fincas se dibujan
+    según `modo_marcadores` (ver marcadores.py).
+
+    `centro_acopio` puede ser el registro del centro (Ubicacion, con nombre e
+    info para el marcador) o solo sus coordenadas (lat, lon).
     """
     # Se calcula un punto medio aproximado para centrar el mapa inicialmente.
     mid_lat = sum(f["lat"] for f in fincas) / len(fincas)
     mid_lon = sum(f["lon"] for f in fincas) / len(fincas)
     m = folium.Map(location=[mid_lat, mid_lon], zoom_start=7)
 
-    # Marcadores de fincas
-    for finca in fincas:
-        folium.Marker(
-            location=(finca["lat"], finca["lon"]),
-            tooltip=finca["nombre"],
-            popup=finca["info"],
-            icon=folium.Icon(color="green", icon="leaf"),
-        ).add_to(m)
+    # Marcadores de fincas; con muchas fincas, agrupados o sobre lienzo (ver marcadores.py)
+    agregar_marcadores(m, fincas, color="green", icono="leaf", modo=modo_marcadores, popup_con_nombre=False)
 
-    # Centro de acopio
-    folium.Marker(
-        centro_acopio,
-        tooltip="Clarkson Grain Mattoon Plant",
-        popup=(
-            "<b>Clarkson Grain Mattoon Plant</b><br>"
-            "Ubicación: Mattoon, Illinois<br>"
-            "Latitud: 39.481427<br>"
-            "Longitud: -88.303999<br>"
-            "Tipo: Centro de acopio de granos."
-        ),
-        icon=folium.Icon(color="red", icon="home"),
-    ).add_to(m)
+    # Centro de acopio: nombre e info del registro que se recibió, si se recibió uno.
+    marcador_lugar(centro_acopio, "Centro de Acopio", color="red", icono="home").add_to(m)
 
     # Puerto
     folium.Marker(
@@ -144,12 +67,22 @@ def build_unified_map(fincas, centro_acopio, puerto, rutas, ruta_extra, map_file
         icon=folium.Icon(color="blue", icon="anchor"),
     ).add_to(m)
 
+    # Se simplifica cada línea antes de dibujarla para reducir el tamaño del HTML.
+    estadisticas = []
+
+    def linea(route_points):
+        if zoom_detalle is None:
+            return route_points
+        simplificada, est = simplificar_ruta(route_points, zoom_detalle)
+        estadisticas.append(est)
+        return simplificada
+
     # Líneas de las rutas finca → centro
     for finca, (route_points, distance_m) in rutas.items():
         # Se usa un color aleatorio para diferenciar visualmente cada ruta.
         color = "#%06x" % random.randint(0, 0xFFFFFF)
         folium.PolyLine(
-            route_points,
+            linea(route_points),
             weight=4,
             opacity=0.8,
             color=color,
@@ -160,7 +93,7 @@ def build_unified_map(fincas, centro_acopio, puerto, rutas, ruta_extra, map_file
     if ruta_extra:
         route_points, distance_m = ruta_extra
         folium.PolyLine(
-            route_points,
+            linea(route_points),
             weight=6,
             opacity=0.8,
             color="blue",
@@ -168,37 +101,53 @@ def build_unified_map(fincas, centro_acopio, puerto, rutas, ruta_extra, map_file
         ).add_to(m)
 
     # Cálculo automático del zoom usando todos los puntos del mapa
-    all_points = [p for ruta in rutas.values() for p in ruta[0]]
+    todas = [ruta[0] for ruta in rutas.values()]
     if ruta_extra:
-        all_points += ruta_extra[0]
+        todas.append(ruta_extra[0])
 
-    sw = [min(p[0] for p in all_points), min(p[1] for p in all_points)]
-    ne = [max(p[0] for p in all_points), max(p[1] for p in all_points)]
-    m.fit_bounds([sw, ne])
+    limites = caja_envolvente(*todas)
+    if limites is not None:
+        m.fit_bounds(limites)
 
     m.save(map_filename)
+    if estadisticas:
+        print(f"Simplificación de rutas: {resumen(sumar_estadisticas(estadisticas))}")
     return m
 
 
 # ======================================================
-# 3. PROCESO PRINCIPAL
+# 2. PROCESO PRINCIPAL
 # ======================================================
 
 if __name__ == "__main__":
+    # Fincas, centro de acopio y puerto del registro de ubicaciones
+    # (dataset/ubicaciones.csv, ver registro_ubicaciones.py).
+    registro = cargar_ubicaciones()
+
+    # Fincas con sus coordenadas y un texto descriptivo.
+    # Se usarán como puntos de origen para calcular rutas hacia el centro de acopio.
+    fincas = registro.fincas
+
+    # Coordenadas del centro de acopio (destino principal).
+    centro_acopio = registro.acopio.punto
+
+    # Información del puerto (destino adicional): nombre, lat, lon e info.
+    puerto = registro.puerto
+
     # Diccionario donde se guardan las rutas generadas para cada finca.
     rutas = {}
 
     print("\nGenerando rutas de fincas → centro de acopio...\n")
 
-    # Para cada finca, se solicita a OSRM la ruta hacia el centro de acopio.
-    for finca in fincas:
-        origen = (finca["lat"], finca["lon"])
-        try:
-            route_points, distance_m = get_osrm_route(origen, centro_acopio)
-            rutas[finca["nombre"]] = (route_points, distance_m)
-            print(f"{finca['nombre']}: {distance_m/1000:.2f} km ({len(route_points)} puntos)")
-        except Exception as e:
-            print(f"Error con {finca['nombre']}: {e}")
+    # Se solicitan a OSRM en paralelo las rutas de todas las fincas hacia el centro de acopio.
+    pares = [((finca["lat"], finca["lon"]), centro_acopio) for finca in fincas]
+    for finca, (resultado, error) in zip(fincas, obtener_rutas_lote(pares)):
+        if error is not None:
+            print(f"Error con {finca['nombre']}: {error}")
+            continue
+        route_points, distance_m = resultado
+        rutas[finca["nombre"]] = (route_points, distance_m)
+        print(f"{finca['nombre']}: {distance_m/1000:.2f} km ({len(route_points)} puntos)")
 
     # Ruta extra: centro → puerto
     print("\nGenerando ruta centro de acopio → puerto...\n")
@@ -210,20 +159,36 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"Error en ruta adicional: {e}")
 
-    # Construcción del grafo total sumando todas las rutas.
-    G_total = nx.DiGraph()
-    for finca, (ruta, _) in rutas.items():
-        G_total.update(build_graph(ruta))
-
+    # Construcción del grafo total con todas las rutas de una vez.
+    # Los vértices que comparten las rutas se fusionan en un solo nodo.
+    todas = [ruta for ruta, _ in rutas.values()]
     if ruta_extra:
-        G_total.update(build_graph(ruta_extra[0]))
+        todas.append(ruta_extra[0])
+    G_total = GrafoCompacto.desde_rutas(todas)
 
-    print(f"\nGrafo total: {G_total.number_of_nodes()} nodos, {G_total.number_of_edges()} aristas.")
+    print(f"\nGrafo total: {G_total.num_nodos} nodos, {G_total.num_aristas} aristas.")
 
     # Cálculo del peso total (suma de todas las distancias entre nodos).
-    total_weight = sum(nx.get_edge_attributes(G_total, "weight").values())
+    total_weight = G_total.peso_total()
     print(f"Peso total del grafo: {total_weight/1000:.2f} km")
 
+    # Red vial compartida: las rutas se unen donde se superponen, así que se
+    # pueden responder consultas nuevas (finca → puerto) sin llamar a OSRM.
+    red = RedVial.desde_rutas(todas)
+    print(f"Red vial: {red.num_nodos} nodos, {len(red.uniones())} uniones entre rutas.")
+    if rutas and ruta_extra:
+        con_ruta = [f for f in fincas if f["nombre"] in rutas]
+        origenes = [(f["lat"], f["lon"]) for f in con_ruta]
+        try:
+            i, _, longitud_m = red.camino_multiorigen(origenes, (puerto["lat"], puerto["lon"]))
+            print(f"Finca más cercana al puerto por la red: {con_ruta[i]['nombre']} ({longitud_m/1000:.2f} km)")
+        except ValueError as e:
+            # Ninguna finca llega al puerto por la red (por ejemplo, rutas sin puntos en común).
+            print(f"Sin camino finca → puerto por la red: {e}")
+
     # Creación del mapa unificado en HTML
-    build_unified_map(fincas, centro_acopio, puerto, rutas, ruta_extra)
+    build_unified_map(fincas, registro.acopio, puerto, rutas, ruta_extra)
     print("\nMapa guardado como rutas_unificadas.html.")
+
+    stats = cache_por_defecto().estadisticas()
+    print(f"Cache de rutas: {stats['aciertos']} aciertos, {stats['fallos']} fallos.")
@@ -1,87 +1,36 @@
-import requests
 import folium
-import networkx as nx
-from geopy.distance import geodesic
 import random
 
-# Lista de fincas con datos básicos.
-# Cada finca incluye nombre, coordenadas (lat, lon) e información adicional.
-fincas = [
-    {"nombre": "Finca 1", "lat": 40.92, "lon": -89.53, "info": "Parcela de producción"},
-    {"nombre": "Finca 2", "lat": 40.92, "lon": -89.54, "info": "Parcela de producción"},
-    {"nombre": "Finca 3", "lat": 40.91, "lon": -89.53, "info": "Parcela de producción"},
-    {"nombre": "Finca 4", "lat": 40.91, "lon": -89.52, "info": "Parcela de producción"},
-    {"nombre": "Finca 5", "lat": 40.91, "lon": -89.54, "info": "Parcela de producción"},
-    {"nombre": "Finca 6", "lat": 40.91, "lon": -89.55, "info": "Parcela de producción"},
-    {"nombre": "Finca 7", "lat": 40.91, "lon": -89.51, "info": "Parcela de producción"},
-]
-
-# Coordenadas del centro de acopio (destino final de todas las rutas)
-destination = (39.481427, -88.303999)
-
-def get_osrm_route(origin_latlon, dest_latlon, profile="driving"):
-    """
-    Consulta la API pública de OSRM para obtener una ruta entre dos puntos.
-
-    Parámetros:
-        origin_latlon: tupla (lat, lon) del punto de origen.
-        dest_latlon: tupla (lat, lon) del punto de destino.
-        profile: perfil de OSRM, por defecto "driving".
-
-    Flujo:
-        1. OSRM requiere el formato (lon, lat). Se reorganizan las coordenadas.
-        2. Se construye la URL con parámetros que piden:
-           - overview=full → ruta completa
-           - geometries=geojson → lista de puntos
-        3. Se hace la petición HTTP y se valida.
-        4. Se extraen los puntos (en GeoJSON vienen como [lon, lat]).
-        5. Se convierten a (lat, lon) para que Folium los entienda.
+from cache_rutas import cache_por_defecto
+from distancias import MODO_POR_DEFECTO
+from grafo_compacto import GrafoCompacto
+from indice_espacial import caja_envolvente
+from marcadores import agregar_marcadores
+from registro_ubicaciones import cargar_ubicaciones
+from rutas_osrm import obtener_rutas_lote
+from simplificacion import ZOOM_DETALLE, resumen, simplificar_ruta, sumar_estadisticas
 
-    Retorna:
-        route_points: lista de coordenadas (lat, lon)
-        distance: distancia total en metros
-    """
-    o_lon, o_lat = origin_latlon[1], origin_latlon[0]
-    d_lon, d_lat = dest_latlon[1], dest_latlon[0]
-
-    url = (
-        f"http://router.project-osrm.org/route/v1/{profile}/"
-        f"{o_lon},{o_lat};{d_lon},{d_lat}?overview=full&geometries=geojson"
-    )
-
-    resp = requests.get(url, timeout=20)
-    resp.raise_for_status()  # Levanta excepción si la respuesta no es válida
-
-    data = resp.json()
-
-    # GeoJSON trae coordenadas como [lon, lat]; se invierte a (lat, lon)
-    coords = data["routes"][0]["geometry"]["coordinates"]
-    route_points = [(pt[1], pt[0]) for pt in coords]
-
-    return route_points, data["routes"][0]["distance"]
-
-def build_graph(route_points):
+def build_graph(route_points, modo=MODO_POR_DEFECTO):
     """
     Construye un grafo dirigido que representa una ruta punto por punto.
 
     Cada nodo del grafo es un punto geográfico.
     Cada arista corresponde al segmento entre dos puntos consecutivos.
 
-    Se usa geodesic() para calcular distancias reales entre puntos GPS.
+    Las distancias entre puntos GPS se calculan todas a la vez con
+    longitudes_segmentos(); `modo` elige la precisión (ver distancias.py).
 
     Este grafo puede servir para análisis como:
         - rutas alternativas
         - algoritmos de camino mínimo
         - simulaciones de transporte
+
+    El grafo se guarda en arreglos compactos (ver grafo_compacto.py).
     """
-    G = nx.DiGraph()
-    for i in range(len(route_points) - 1):
-        p1, p2 = route_points[i], route_points[i + 1]
-        dist_m = geodesic(p1, p2).meters  # Distancia en metros
-        G.add_edge(p1, p2, weight=dist_m)
-    return G
-
-def build_map(fincas, destination, rutas, map_filename="rutas_fincas_centro.html"):
+    return GrafoCompacto.desde_rutas([route_points], modo=modo)
+
+def build_map(fincas, destination, rutas, map_filename="rutas_fincas_centro.html", zoom_detalle=ZOOM_DETALLE,
+              modo_marcadores="auto"):
     """
     Construye un mapa interactivo (Folium) con:
 
@@ -94,6 +43,10 @@ def build_map(fincas, destination, rutas, map_filename="rutas_fincas_centro.html
         destination: tupla (lat, lon) del centro de acopio.
         rutas: diccionario con {nombre_finca: (lista_puntos, distancia_m)}.
         map_filename: nombre del archivo HTML de salida.
+        zoom_detalle: zoom hasta el cual las rutas simplificadas se ven igual
+            que las originales (ver simplificacion.py). None las dibuja completas.
+        modo_marcadores: cómo dibujar las fincas ("auto", "marcadores",
+            "agrupado" o "canvas"; ver marcadores.py).
 
     Flujo:
         1. Se calcula un punto medio para centrar inicialmente el mapa.
@@ -101,6 +54,7 @@ def build_map(fincas, destination, rutas, map_filename="rutas_fincas_centro.html
         3. Se agrega marcador del centro de acopio.
         4. Para cada ruta:
             - Se genera un color aleatorio.
+            - Se simplifica la geometría.
             - Se dibuja un PolyLine con la ruta.
         5. Se ajusta el zoom automáticamente para ver todas las rutas.
         6. Se guarda el mapa.
@@ -112,14 +66,8 @@ def build_map(fincas, destination, rutas, map_filename="rutas_fincas_centro.html
 
     m = folium.Map(location=[mid_lat, mid_lon], zoom_start=7)
 
-    # Agregar marcadores de fincas
-    for finca in fincas:
-        folium.Marker(
-            location=(finca["lat"], finca["lon"]),
-            tooltip=finca["nombre"],
-            popup=finca["info"],
-            icon=folium.Icon(color="green", icon="leaf"),
-        ).add_to(m)
+    # Agregar marcadores de fincas (agrupados o sobre lienzo si son muchas)
+    agregar_marcadores(m, fincas, color="green", icono="leaf", modo=modo_marcadores, popup_con_nombre=False)
 
     # Agregar marcador del centro de acopio
     folium.Marker(
@@ -129,11 +77,19 @@ def build_map(fincas, destination, rutas, map_filename="rutas_fincas_centro.html
     ).add_to(m)
 
     # Dibujar las rutas al centro de acopio
+    estadisticas = []
     for finca, (route_points, distance_m) in rutas.items():
         # Color aleatorio para diferenciar rutas
         color = "#%06x" % random.randint(0, 0xFFFFFF)
+
+        # Se simplifica la línea para que el HTML pese menos
+        linea = route_points
+        if zoom_detalle is not None:
+            linea, est = simplificar_ruta(route_points, zoom_detalle)
+            estadisticas.append(est)
+
         folium.PolyLine(
-            route_points,
+            linea,
             weight=5,
             opacity=0.7,
             color=color,
@@ -141,36 +97,64 @@ def build_map(fincas, destination, rutas, map_filename="rutas_fincas_centro.html
         ).add_to(m)
 
     # Recalcular límites del mapa para incluir todos los puntos
-    all_points = [p for ruta in rutas.values() for p in ruta[0]]
-
-    sw = [min(p[0] for p in all_points), min(p[1] for p in all_points)]  # esquina inferior izquierda
-    ne = [max(p[0] for p in all_points), max(p[1] for p in all_points)]  # esquina superior derecha
-
-    m.fit_bounds([sw, ne])
+    # (esquina inferior izquierda y superior derecha en una sola pasada, ver indice_espacial.py)
+    limites = caja_envolvente(*(ruta[0] for ruta in rutas.values()))
+    if limites is not None:
+        m.fit_bounds(limites)
 
     m.save(map_filename)
+    if estadisticas:
+        print(f"Simplificación de rutas: {resumen(sumar_estadisticas(estadisticas))}")
     return m
 
 
 # Punto de entrada del script cuando se ejecuta directamente
-def generar_rutas():
+def generar_rutas(map_filename="rutas_fincas_centro.html", progreso=None):
+    """
+    Consulta las rutas de todas las fincas al centro de acopio y guarda el mapa.
+
+    Parámetros:
+        map_filename: archivo HTML de salida.
+        progreso: Trabajo de trabajos.py cuando se ejecuta en segundo plano;
+            recibe el avance ruta por ruta y los mensajes (en vez de print),
+            y permite cancelar.
+
+    Retorna:
+        La ruta del mapa generado.
+    """
+    avisar = print if progreso is None else progreso.anotar
     rutas = {}
 
-    print("Generando rutas desde las fincas hasta el centro de acopio...\n")
+    # Fincas del registro de ubicaciones (dataset/ubicaciones.csv), con nombre,
+    # coordenadas (lat, lon) e información adicional, y coordenadas del centro
+    # de acopio (destino final de todas las rutas).
+    registro = cargar_ubicaciones()
+    fincas, destination = registro.fincas, registro.acopio.punto
 
-    # Itera sobre cada finca y consulta la API OSRM
-    for finca in fincas:
-        origen = (finca["lat"], finca["lon"])
-        try:
-            # Obtiene los puntos y distancia de la ruta
-            route_points, distance_m = get_osrm_route(origen, destination)
-            rutas[finca["nombre"]] = (route_points, distance_m)
+    avisar("Generando rutas desde las fincas hasta el centro de acopio...\n")
 
-            print(f"{finca['nombre']}: {distance_m/1000:.2f} km ({len(route_points)} puntos)")
-        except Exception as e:
+    # Se consultan todas las rutas en paralelo con una sola sesión HTTP
+    pares = [((finca["lat"], finca["lon"]), destination) for finca in fincas]
+    resultados = obtener_rutas_lote(pares, progreso=progreso)
+
+    for finca, (resultado, error) in zip(fincas, resultados):
+        if error is not None:
             # Si la API falla, se reporta pero el script sigue con las demás fincas
-            print(f"Error con {finca['nombre']}: {e}")
+            avisar(f"Error con {finca['nombre']}: {error}")
+            continue
+
+        # Puntos y distancia de la ruta
+        route_points, distance_m = resultado
+        rutas[finca["nombre"]] = (route_points, distance_m)
+
+        avisar(f"{finca['nombre']}: {distance_m/1000:.2f} km ({len(route_points)} puntos)")
 
     # Construye y guarda el mapa final
-    build_map(fincas, destination, rutas)
-    print("\nMapa guardado como rutas_fincas_centro.html.")
+    if progreso is not None:
+        progreso.anotar("Dibujando mapa")
+    build_map(fincas, destination, rutas, map_filename)
+    avisar(f"\nMapa guardado como {map_filename}.")
+
+    stats = cache_por_defecto().estadisticas()
+    avisar(f"Cache de rutas: {stats['aciertos']} aciertos, {stats['fallos']} fallos.")
+    return map_filename
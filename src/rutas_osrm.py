@@ -0,0 +1,180 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache_rutas import cache_por_defecto, clave_ruta
+
+# Servidor público de OSRM usado por todos los módulos de rutas.
+OSRM_URL = "http://router.project-osrm.org"
+
+# Límite global de peticiones simultáneas a OSRM, compartido por todos los lotes
+# del proceso. El servidor público limita las peticiones por cliente.
+MAX_CONCURRENCIA = 4
+
+# Códigos HTTP que indican un error temporal y justifican reintentar.
+CODIGOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+_semaforo = threading.BoundedSemaphore(MAX_CONCURRENCIA)
+_sesion = None
+_lock_sesion = threading.Lock()
+
+
+def obtener_sesion():
+    """
+    Retorna la sesión HTTP compartida del proceso.
+
+    La sesión mantiene un pool de conexiones keep-alive, así que las
+    consultas sucesivas a OSRM no pagan de nuevo el handshake TCP/HTTP.
+    """
+    global _sesion
+    with _lock_sesion:
+        if _sesion is None:
+            _sesion = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENCIA)
+            _sesion.mount("http://", adaptador)
+            _sesion.mount("https://", adaptador)
+    return _sesion
+
+
+def get_con_reintentos(url, reintentos=2, espera_inicial=0.5):
+    """
+    Hace un GET a OSRM con la sesión compartida, reintentando ante errores
+    temporales (red, 429, 5xx) con espera exponencial.
+
+    Retorna la respuesta ya validada; lanza la excepción del último intento si todos fallan.
+    """
+    sesion = obtener_sesion()
+    espera = espera_inicial
+    for intento in range(reintentos + 1):
+        try:
+            # El semáforo limita cuántas peticiones hay en vuelo en todo el proceso.
+            with _semaforo:
+                resp = sesion.get(url, timeout=20)
+        except (requests.ConnectionError, requests.Timeout):
+            if intento == reintentos:
+                raise
+        else:
+            if resp.status_code not in CODIGOS_REINTENTABLES or intento == reintentos:
+                resp.raise_for_status()  # Lanza error si falla
+                return resp
+
+        # Error temporal: espera exponencial antes del siguiente intento.
+        time.sleep(espera)
+        espera *= 2
+
+
+def _consultar_osrm(origin_latlon, dest_latlon, profile, osrm_url, reintentos, espera_inicial):
+    # OSRM requiere el formato lon,lat
+    o_lon, o_lat = origin_latlon[1], origin_latlon[0]
+    d_lon, d_lat = dest_latlon[1], dest_latlon[0]
+
+    url = (
+        f"{osrm_url}/route/v1/{profile}/"
+        f"{o_lon},{o_lat};{d_lon},{d_lat}?overview=full&geometries=geojson"
+    )
+
+    resp = get_con_reintentos(url, reintentos, espera_inicial)
+    data = resp.json()
+
+    # La geometría viene como una lista de [lon, lat]; se invierte a (lat, lon)
+    coords = data["routes"][0]["geometry"]["coordinates"]
+    route_points = [(pt[1], pt[0]) for pt in coords]
+
+    return route_points, data["routes"][0]["distance"]
+
+
+def get_osrm_route(origin_latlon, dest_latlon, profile="driving", usar_cache=True,
+                   osrm_url=None, reintentos=2, espera_inicial=0.5):
+    """
+    Consulta OSRM para obtener la ruta entre dos puntos, usando primero
+    la cache de rutas en disco.
+
+    Parámetros:
+        origin_latlon: (lat, lon) del origen.
+        dest_latlon: (lat, lon) del destino.
+        profile: modo de transporte ("driving", "walking", "cycling").
+        usar_cache: si es False se consulta siempre el servidor.
+        osrm_url: servidor OSRM a usar; por defecto, el del enrutador configurado.
+        reintentos: reintentos ante errores temporales (red, 429, 5xx).
+        espera_inicial: segundos de espera antes del primer reintento; se duplica en cada uno.
+
+    Flujo:
+        1. Se busca la ruta en la cache compartida (ver cache_rutas.py).
+        2. Si no está, se pide al enrutador configurado (ver enrutadores.py):
+           OSRM público, un servidor OSRM local o la red vial en memoria.
+        3. Se convierten los puntos a (lat, lon) y se guardan en la cache.
+
+    Retorna:
+        route_points: lista de tuplas (lat, lon) con cada punto de la ruta.
+        distance_m: distancia total en metros según OSRM.
+    """
+    # Import diferido: enrutadores.py usa las funciones HTTP de este módulo.
+    from enrutadores import EnrutadorOSRM, enrutador_actual
+
+    enrutador = EnrutadorOSRM(osrm_url) if osrm_url else enrutador_actual()
+    perfil_cache = enrutador.clave_cache(profile)
+    cache = cache_por_defecto() if usar_cache and perfil_cache is not None else None
+
+    if cache is not None:
+        clave = clave_ruta(perfil_cache, origin_latlon, dest_latlon)
+        en_cache = cache.obtener(clave)
+        if en_cache is not None:
+            return en_cache
+
+    route_points, distance_m = enrutador.ruta(
+        origin_latlon, dest_latlon, profile, reintentos=reintentos, espera_inicial=espera_inicial
+    )
+
+    if cache is not None:
+        cache.guardar(clave, route_points, distance_m)
+
+    return route_points, distance_m
+
+
+def obtener_rutas_lote(pares, profile="driving", max_hilos=MAX_CONCURRENCIA, progreso=None, **opciones):
+    """
+    Obtiene varias rutas en paralelo.
+
+    Parámetros:
+        pares: lista de tuplas (origen, destino), cada una en formato (lat, lon).
+        profile: modo de transporte de OSRM.
+        max_hilos: tamaño del pool de hilos. El número de peticiones simultáneas
+            además está limitado globalmente por MAX_CONCURRENCIA.
+        progreso: función opcional progreso(hechos, total), llamada cada vez
+            que termina una ruta (ver trabajos.py). Si lanza una excepción (por
+            ejemplo, al cancelar), las rutas que no empezaron se descartan y la
+            excepción se propaga.
+        opciones: se pasan a get_osrm_route (usar_cache, osrm_url, reintentos...).
+
+    Retorna:
+        Lista en el mismo orden que `pares` con tuplas (resultado, error):
+        - resultado: (route_points, distance_m), o None si la ruta falló.
+        - error: la excepción producida, o None si la ruta se obtuvo.
+        Así quien llama puede reportar el error de cada finca por separado.
+    """
+    def tarea(par):
+        try:
+            return get_osrm_route(par[0], par[1], profile, **opciones), None
+        except Exception as e:
+            return None, e
+
+    if not pares:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_hilos, len(pares)))) as pool:
+        if progreso is None:
+            return list(pool.map(tarea, pares))
+
+        futuros = [pool.submit(tarea, par) for par in pares]
+        progreso(0, len(pares))
+        try:
+            for hechos, _ in enumerate(as_completed(futuros), start=1):
+                progreso(hechos, len(pares))
+        except BaseException:
+            for futuro in futuros:
+                futuro.cancel()
+            raise
+        return [futuro.result() for futuro in futuros]
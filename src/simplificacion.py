@@ -0,0 +1,204 @@
+import heapq
+import json
+import math
+
+import numpy as np
+
+from distancias import RADIO_TIERRA_M
+
+# Metros por píxel en el ecuador con zoom 0 (mosaicos web de 256 px).
+METROS_POR_PIXEL_Z0 = 2 * math.pi * 6378137.0 / 256
+
+# Zoom hasta el cual las líneas simplificadas se ven igual que las originales.
+# Con zoom 14 (calles) la tolerancia es de unos 4 m en Illinois.
+ZOOM_DETALLE = 14
+
+# Error máximo permitido, en píxeles de pantalla, al simplificar.
+PIXELES_TOLERANCIA = 0.5
+
+METODOS = ("douglas-peucker", "visvalingam")
+
+
+def tolerancia_para_zoom(zoom, latitud=40.0, pixeles=PIXELES_TOLERANCIA):
+    """Tolerancia en metros equivalente a `pixeles` de pantalla con el zoom dado."""
+    return METROS_POR_PIXEL_Z0 * math.cos(math.radians(latitud)) / 2 ** zoom * pixeles
+
+
+def decimales_para_tolerancia(tolerancia_m):
+    """
+    Decimales de coordenada suficientes para la tolerancia: cada decimal
+    divide por 10 los ~111 km que mide un grado de latitud.
+    """
+    return int(min(6, max(3, math.ceil(math.log10(111320 / max(tolerancia_m, 1e-3))))))
+
+
+def _proyectar(puntos):
+    # Proyección equirectangular local a metros; suficiente para medir
+    # distancias de pocos metros dentro de una ruta.
+    lat0 = np.radians(puntos[:, 0].mean())
+    y = np.radians(puntos[:, 0]) * RADIO_TIERRA_M
+    x = np.radians(puntos[:, 1]) * RADIO_TIERRA_M * np.cos(lat0)
+    return np.column_stack((x, y))
+
+
+def douglas_peucker(puntos, tolerancia_m):
+    """
+    Simplificación de Douglas–Peucker.
+
+    Retorna una máscara booleana con los puntos que se conservan. Cada tramo
+    se procesa de forma vectorizada: las distancias de todos sus puntos
+    interiores a la cuerda se calculan en una sola operación.
+    """
+    xy = _proyectar(puntos)
+    n = len(xy)
+    conservar = np.zeros(n, dtype=bool)
+    if n <= 2:
+        conservar[:] = True
+        return conservar
+    conservar[0] = conservar[-1] = True
+
+    pendientes = [(0, n - 1)]
+    while pendientes:
+        inicio, fin = pendientes.pop()
+        if fin - inicio < 2:
+            continue
+        a, b = xy[inicio], xy[fin]
+        interiores = xy[inicio + 1:fin]
+        ab = b - a
+        largo2 = ab @ ab
+        if largo2 == 0:
+            distancias = np.hypot(*(interiores - a).T)
+        else:
+            # Distancia de cada punto al segmento a-b (no a la recta infinita).
+            t = np.clip(((interiores - a) @ ab) / largo2, 0.0, 1.0)
+            distancias = np.hypot(*(interiores - (a + t[:, None] * ab)).T)
+        k = int(np.argmax(distancias))
+        if distancias[k] > tolerancia_m:
+            medio = inicio + 1 + k
+            conservar[medio] = True
+            pendientes.append((inicio, medio))
+            pendientes.append((medio, fin))
+
+    return conservar
+
+
+def visvalingam(puntos, tolerancia_m):
+    """
+    Simplificación de Visvalingam–Whyatt.
+
+    Elimina repetidamente el punto cuyo triángulo con sus vecinos tiene menor
+    área, mientras esa área sea menor que tolerancia_m². Las áreas iniciales
+    se calculan vectorizadas; luego solo se recalculan las de los vecinos.
+    Retorna una máscara booleana con los puntos que se conservan.
+    """
+    xy = _proyectar(puntos)
+    n = len(xy)
+    conservar = np.ones(n, dtype=bool)
+    if n <= 2:
+        return conservar
+
+    def area(i, j, k):
+        return abs((xy[j, 0] - xy[i, 0]) * (xy[k, 1] - xy[i, 1]) - (xy[k, 0] - xy[i, 0]) * (xy[j, 1] - xy[i, 1])) / 2
+
+    a, b, c = xy[:-2], xy[1:-1], xy[2:]
+    areas = np.abs((b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1])) / 2
+
+    anterior = list(range(-1, n - 1))
+    siguiente = list(range(1, n + 1))
+    actual = [0.0] + areas.tolist() + [0.0]
+    monticulo = [(actual[i], i) for i in range(1, n - 1)]
+    heapq.heapify(monticulo)
+    umbral = tolerancia_m ** 2
+    maximo = 0.0
+
+    while monticulo:
+        valor, i = heapq.heappop(monticulo)
+        if not conservar[i] or valor != actual[i]:
+            continue  # Entrada vieja del montículo
+        # El área efectiva nunca baja de la del último punto eliminado.
+        maximo = max(maximo, valor)
+        if maximo >= umbral:
+            break
+        conservar[i] = False
+        p, s = anterior[i], siguiente[i]
+        siguiente[p], anterior[s] = s, p
+        for vecino in (p, s):
+            if 0 < vecino < n - 1:
+                actual[vecino] = area(anterior[vecino], vecino, siguiente[vecino])
+                heapq.heappush(monticulo, (actual[vecino], vecino))
+
+    return conservar
+
+
+def cuantizar(puntos, decimales):
+    """
+    Redondea las coordenadas a `decimales` y elimina los puntos consecutivos
+    que quedan repetidos después de redondear.
+    """
+    redondeados = np.round(puntos, decimales)
+    if len(redondeados) < 2:
+        return redondeados
+    distintos = np.ones(len(redondeados), dtype=bool)
+    distintos[1:] = np.any(redondeados[1:] != redondeados[:-1], axis=1)
+    return redondeados[distintos]
+
+
+def _bytes_json(puntos):
+    # Tamaño aproximado que ocupan las coordenadas dentro del HTML de folium.
+    return len(json.dumps(puntos if isinstance(puntos, list) else puntos.tolist()))
+
+
+def simplificar_ruta(route_points, zoom=ZOOM_DETALLE, metodo="douglas-peucker", tolerancia_m=None):
+    """
+    Prepara una ruta para dibujarla: simplifica la geometría y reduce la
+    precisión de las coordenadas.
+
+    Parámetros:
+        route_points: lista de puntos (lat, lon).
+        zoom: zoom hasta el cual la línea debe verse igual que la original.
+        metodo: "douglas-peucker" o "visvalingam".
+        tolerancia_m: tolerancia en metros; si es None se calcula a partir de `zoom`.
+
+    Retorna:
+        puntos: lista de tuplas (lat, lon) simplificada.
+        estadisticas: diccionario con puntos y bytes antes y después.
+    """
+    puntos = np.asarray(route_points, dtype=np.float64).reshape(-1, 2)
+    if tolerancia_m is None:
+        latitud = float(puntos[:, 0].mean()) if len(puntos) else 40.0
+        tolerancia_m = tolerancia_para_zoom(zoom, latitud)
+
+    if metodo == "douglas-peucker":
+        conservar = douglas_peucker(puntos, tolerancia_m)
+    elif metodo == "visvalingam":
+        conservar = visvalingam(puntos, tolerancia_m)
+    else:
+        raise ValueError(f"Método de simplificación desconocido: {metodo}. Opciones: {', '.join(METODOS)}")
+
+    simplificados = cuantizar(puntos[conservar], decimales_para_tolerancia(tolerancia_m))
+    estadisticas = {
+        "puntos_antes": len(puntos),
+        "puntos_despues": len(simplificados),
+        "bytes_antes": _bytes_json(list(route_points)),
+        "bytes_despues": _bytes_json(simplificados),
+    }
+    return [tuple(p) for p in simplificados.tolist()], estadisticas
+
+
+def sumar_estadisticas(lista):
+    """Suma varias estadísticas de simplificar_ruta() en una sola."""
+    total = {"puntos_antes": 0, "puntos_despues": 0, "bytes_antes": 0, "bytes_despues": 0}
+    for estadisticas in lista:
+        for clave in total:
+            total[clave] += estadisticas[clave]
+    return total
+
+
+def resumen(estadisticas):
+    """Texto corto con el ahorro de puntos y bytes."""
+    ahorro = 1 - estadisticas["bytes_despues"] / estadisticas["bytes_antes"] if estadisticas["bytes_antes"] else 0.0
+    return (
+        f"{estadisticas['puntos_antes']} → {estadisticas['puntos_despues']} puntos, "
+        f"{estadisticas['bytes_antes']/1024:.1f} KB → {estadisticas['bytes_despues']/1024:.1f} KB "
+        f"({ahorro:.0%} menos)"
+    )
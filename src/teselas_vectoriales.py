@@ -0,0 +1,400 @@
+# Teselas vectoriales estáticas para conjuntos muy grandes de rutas.
+#
+# Aunque se simplifiquen, poner todas las rutas en una sola página de
+# Leaflet no escala más allá de unos miles de líneas. Aquí las rutas y las
+# fincas se cortan en teselas z/x/y (el mismo esquema que los mosaicos del
+# mapa base) y se guardan como GeoJSON en una carpeta estática:
+#
+#   teselas/rutas.rutas.bin, rutas.rutas.json  geometría de entrada (ver mapa_streaming.py)
+#   teselas/{z}/{x}/{y}.geojson                líneas y fincas de cada tesela
+#   teselas/teselas.json                       zooms, límites y número de teselas
+#
+# Cada zoom se construye en un proceso aparte (multiprocessing): el proceso
+# lee la geometría del binario compartido (np.memmap, sin copiarla), la
+# simplifica para ese zoom y escribe sus teselas. Solo se escriben las
+# teselas que tienen algo.
+#
+# La página HTML es solo el mapa base: una capa L.GridLayer descarga las
+# teselas que están a la vista y las dibuja sobre un lienzo; las que salen
+# de la vista se quitan. Igual que en mapa_streaming.py, hay que abrirla
+# desde un servidor (GitHub Pages o "python -m http.server" en docs/).
+#
+# Uso: python src/teselas_vectoriales.py [--salida docs/teselas] [--mapa docs/rutas_teselas.html]
+#                                        [--zoom 5 12] [--procesos N] [--enrutador grafo] [--sinteticas N]
+
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import folium
+import numpy as np
+from branca.element import Template
+from folium.map import Layer
+
+from mapa_streaming import escribir_rutas
+from simplificacion import simplificar_ruta
+
+DIRECTORIO_DOCS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "docs")
+
+# Zooms con teselas propias; por encima de ZOOM_MAXIMO Leaflet amplía las de ese zoom.
+ZOOM_MINIMO = 5
+ZOOM_MAXIMO = 12
+
+# Base (sin extensión) de la geometría de entrada dentro de la carpeta de teselas.
+NOMBRE_GEOMETRIA = "rutas"
+
+
+def a_teselas(puntos, zoom):
+    """
+    Coordenadas de tesela (fraccionarias) de puntos (lat, lon) en Web Mercator.
+
+    Retorna:
+        Arreglo (n, 2) con (x, y): la parte entera es la tesela z/x/y que
+        contiene al punto.
+    """
+    puntos = np.asarray(puntos, dtype=np.float64).reshape(-1, 2)
+    n = 2.0 ** zoom
+    lat = np.radians(np.clip(puntos[:, 0], -85.05112878, 85.05112878))
+    x = (puntos[:, 1] + 180.0) / 360.0 * n
+    y = (1.0 - np.arcsinh(np.tan(lat)) / math.pi) / 2.0 * n
+    return np.column_stack((x, y))
+
+
+def _teselas_segmento(x0, y0, x1, y1):
+    """
+    Teselas que cruza el segmento (x0, y0) → (x1, y1), en coordenadas de
+    tesela fraccionarias, en el orden en que las recorre.
+
+    Se avanza de borde en borde (Amanatides y Woo): en cada paso se cruza el
+    borde vertical u horizontal más cercano. Si el segmento pasa justo por una
+    esquina también se cuentan las dos teselas que la comparten, porque el
+    trazo tiene ancho.
+    """
+    cx, cy = math.floor(x0), math.floor(y0)
+    fx, fy = math.floor(x1), math.floor(y1)
+    dx, dy = x1 - x0, y1 - y0
+    paso_x = 1 if dx > 0 else -1
+    paso_y = 1 if dy > 0 else -1
+    # Fracción del segmento en la que se cruza el próximo borde, y cuánto avanza entre bordes.
+    t_x = ((cx + (paso_x > 0)) - x0) / dx if dx else math.inf
+    t_y = ((cy + (paso_y > 0)) - y0) / dy if dy else math.inf
+    delta_x = abs(1.0 / dx) if dx else math.inf
+    delta_y = abs(1.0 / dy) if dy else math.inf
+
+    teselas = [(cx, cy)]
+    # Cada paso acerca una coordenada a la tesela final, así que el bucle termina
+    # aunque el redondeo de t_x y t_y no sea exacto.
+    while (cx, cy) != (fx, fy):
+        if cx != fx and cy != fy and math.isclose(t_x, t_y, rel_tol=1e-12, abs_tol=1e-12):
+            teselas.extend(((cx + paso_x, cy), (cx, cy + paso_y)))
+            cx, cy, t_x, t_y = cx + paso_x, cy + paso_y, t_x + delta_x, t_y + delta_y
+        elif cy == fy or (cx != fx and t_x < t_y):
+            cx, t_x = cx + paso_x, t_x + delta_x
+        else:
+            cy, t_y = cy + paso_y, t_y + delta_y
+        teselas.append((cx, cy))
+    return teselas
+
+
+def cortar_linea(puntos, zoom):
+    """
+    Reparte una línea entre las teselas que toca.
+
+    Cada segmento va solo a las teselas que cruza (ver _teselas_segmento),
+    no a todas las de su rectángulo; en cada tesela, los segmentos
+    consecutivos se unen en un solo tramo.
+
+    Retorna:
+        Diccionario {(x, y): [(inicio, fin), ...]} con los tramos como
+        índices de vértices (puntos[inicio:fin + 1]).
+    """
+    if len(puntos) < 2:
+        return {}
+    posiciones = a_teselas(puntos, zoom).tolist()
+
+    tramos = {}
+    for i, ((x0, y0), (x1, y1)) in enumerate(zip(posiciones[:-1], posiciones[1:])):
+        for clave in _teselas_segmento(x0, y0, x1, y1):
+            lista = tramos.setdefault(clave, [])
+            if lista and lista[-1][1] == i:
+                lista[-1] = (lista[-1][0], i + 1)
+            else:
+                lista.append((i, i + 1))
+    return tramos
+
+
+def _geometria(directorio):
+    # Índice y coordenadas (memmap de solo lectura) escritos por escribir_rutas().
+    base = os.path.join(directorio, NOMBRE_GEOMETRIA)
+    with open(base + ".rutas.json", encoding="utf-8") as archivo:
+        indice = json.load(archivo)
+    if os.path.getsize(base + ".rutas.bin") == 0:
+        return indice, np.empty((0, 2), dtype="<i4")
+    return indice, np.memmap(base + ".rutas.bin", dtype="<i4", mode="r").reshape(-1, 2)
+
+
+def construir_zoom(directorio, zoom, fincas=()):
+    """
+    Escribe las teselas de un zoom (se ejecuta en un proceso del grupo).
+
+    Parámetros:
+        directorio: carpeta de teselas, con la geometría de entrada.
+        zoom: nivel a construir; las rutas se simplifican para ese zoom.
+        fincas: lista de (lat, lon, nombre, info) que se agregan como puntos.
+
+    Retorna:
+        (zoom, teselas escritas, bytes escritos).
+    """
+    indice, coordenadas = _geometria(directorio)
+    escala = indice["escala"]
+    teselas = {}
+
+    for nombre, distancia_m, color, peso, inicio, cantidad in indice["rutas"]:
+        ruta = (coordenadas[inicio:inicio + cantidad] / escala).tolist()
+        puntos, _ = simplificar_ruta(ruta, zoom)
+        propiedades = {"nombre": nombre, "distancia_m": distancia_m, "color": color, "peso": peso}
+        for clave, tramos in cortar_linea(puntos, zoom).items():
+            for desde, hasta in tramos:
+                # GeoJSON usa (lon, lat).
+                teselas.setdefault(clave, []).append({
+                    "type": "Feature", "properties": propiedades,
+                    "geometry": {"type": "LineString", "coordinates": [[lon, lat] for lat, lon in puntos[desde:hasta + 1]]},
+                })
+
+    if fincas:
+        posiciones = np.floor(a_teselas([(f[0], f[1]) for f in fincas], zoom)).astype(np.int64).tolist()
+        for (lat, lon, nombre, info), clave in zip(fincas, posiciones):
+            teselas.setdefault(tuple(clave), []).append({
+                "type": "Feature", "properties": {"nombre": nombre, "info": info},
+                "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            })
+
+    escritos = 0
+    for (x, y), elementos in teselas.items():
+        carpeta = os.path.join(directorio, str(zoom), str(x))
+        os.makedirs(carpeta, exist_ok=True)
+        texto = json.dumps({"type": "FeatureCollection", "features": elementos},
+                           separators=(",", ":"), ensure_ascii=False)
+        with open(os.path.join(carpeta, f"{y}.geojson"), "w", encoding="utf-8") as archivo:
+            archivo.write(texto)
+        escritos += len(texto.encode("utf-8"))
+    return zoom, len(teselas), escritos
+
+
+def exportar_teselas(rutas, fincas, directorio, zoom_minimo=ZOOM_MINIMO, zoom_maximo=ZOOM_MAXIMO, procesos=None):
+    """
+    Exporta rutas y fincas como teselas GeoJSON z/x/y.
+
+    Parámetros:
+        rutas: iterable de (nombre, route_points, distance_m[, estilo]), como en
+            mapa_streaming.escribir_rutas(); se recorre una sola vez.
+        fincas: lista de diccionarios o RegistroUbicaciones (nombre, lat, lon, info).
+        directorio: carpeta de salida.
+        zoom_minimo, zoom_maximo: zooms con teselas propias.
+        procesos: procesos del grupo (None = uno por núcleo).
+
+    Retorna:
+        Diccionario de metadatos (también se guarda en teselas.json).
+
+    Flujo:
+        1. Las rutas se escriben una vez en el binario de entrada, ya
+           simplificadas para zoom_maximo, y se calcula la caja envolvente.
+        2. Cada zoom se construye en un proceso, del más detallado al menos
+           detallado (los de más teselas empiezan primero).
+        3. Se guardan los metadatos.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    inicio = time.perf_counter()
+    # Se borran las teselas de una exportación anterior: si no, las que ya no
+    # tienen nada seguirían mostrando rutas viejas.
+    for z in range(zoom_minimo, zoom_maximo + 1):
+        shutil.rmtree(os.path.join(directorio, str(z)), ignore_errors=True)
+    caja, cantidad, _ = escribir_rutas(rutas, os.path.join(directorio, NOMBRE_GEOMETRIA), zoom_maximo)
+    datos_fincas = [(float(f["lat"]), float(f["lon"]), f["nombre"], f.get("info") or "") for f in fincas]
+    for f in datos_fincas:
+        caja.agregar([f[:2]])
+
+    zooms = {}
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = [pool.submit(construir_zoom, directorio, z, datos_fincas)
+                   for z in range(zoom_maximo, zoom_minimo - 1, -1)]
+        for futuro in futuros:
+            zoom, teselas, tamaño = futuro.result()
+            zooms[str(zoom)] = {"teselas": teselas, "bytes": tamaño}
+
+    metadatos = {
+        "zoom_minimo": zoom_minimo, "zoom_maximo": zoom_maximo,
+        "limites": caja.limites(), "rutas": cantidad, "fincas": len(datos_fincas),
+        "zooms": dict(sorted(zooms.items(), key=lambda par: int(par[0]))),
+        "segundos": round(time.perf_counter() - inicio, 2),
+    }
+    with open(os.path.join(directorio, "teselas.json"), "w", encoding="utf-8") as archivo:
+        json.dump(metadatos, archivo, indent=2)
+    return metadatos
+
+
+class CapaTeselasVectoriales(Layer):
+    """
+    Capa de Folium que descarga solo las teselas GeoJSON a la vista.
+
+    Es un L.GridLayer: por cada tesela visible se pide {z}/{x}/{y}.geojson y
+    su contenido se dibuja sobre un lienzo compartido; al salir de la vista
+    se quita. Por encima de zoom_maximo se reutilizan las teselas de ese zoom;
+    por debajo de zoom_minimo la capa no se muestra. Las capas de las teselas
+    van en un grupo que se añade y se quita del mapa junto con la rejilla
+    (por ejemplo, desde el control de capas).
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function () {
+                var lienzo = L.canvas({padding: 0.5});
+                var capas = {}, pendientes = {}, grupo = L.layerGroup();
+                var rejilla = L.gridLayer({
+                    minNativeZoom: {{ this.zoom_minimo }}, maxNativeZoom: {{ this.zoom_maximo }},
+                    minZoom: {{ this.zoom_minimo }}, maxZoom: 19
+                });
+                rejilla.on("add", function () { grupo.addTo(rejilla._map); });
+                rejilla.on("remove", function () { grupo.remove(); });
+                var clave = function (c) { return c.z + "/" + c.x + "/" + c.y; };
+                rejilla.createTile = function (coords, listo) {
+                    var tesela = document.createElement("div"), k = clave(coords);
+                    pendientes[k] = true;
+                    fetch({{ this.url|tojson }} + "/" + k + ".geojson")
+                        .then(function (respuesta) { return respuesta.ok ? respuesta.json() : null; })
+                        .then(function (datos) {
+                            // Si la tesela ya salió de la vista mientras se descargaba, no se dibuja.
+                            if (datos && pendientes[k] && rejilla._map) {
+                                capas[k] = L.geoJSON(datos, {
+                                    renderer: lienzo,
+                                    style: function (f) {
+                                        return {color: f.properties.color, weight: f.properties.peso, opacity: 1};
+                                    },
+                                    pointToLayer: function (f, latlng) {
+                                        return L.circleMarker(latlng, {renderer: lienzo, radius: 5, color: {{ this.color|tojson }},
+                                                                       weight: 1, fillOpacity: 0.8});
+                                    },
+                                    onEachFeature: function (f, capa) {
+                                        var p = f.properties;
+                                        if (f.geometry.type === "Point") {
+                                            capa.bindTooltip(p.nombre).bindPopup(String(p.info).replace(/\\n/g, "<br>"));
+                                        } else {
+                                            capa.bindTooltip(p.nombre + ": " + (p.distancia_m / 1000).toFixed(2) + " km");
+                                        }
+                                    }
+                                }).addTo(grupo);
+                            }
+                            listo(null, tesela);
+                        })
+                        .catch(function (error) { listo(error, tesela); });
+                    return tesela;
+                };
+                rejilla.on("tileunload", function (e) {
+                    var k = clave(e.coords);
+                    delete pendientes[k];
+                    if (capas[k]) { grupo.removeLayer(capas[k]); delete capas[k]; }
+                });
+                return rejilla;
+            })();
+        {% endmacro %}
+        """
+    )
+
+    def __init__(self, url, zoom_minimo=ZOOM_MINIMO, zoom_maximo=ZOOM_MAXIMO, color="#72b026", name=None, **opciones):
+        opciones.setdefault("overlay", True)
+        opciones.setdefault("control", name is not None)
+        super().__init__(name=name, **opciones)
+        self._name = "CapaTeselasVectoriales"
+        self.url = url
+        self.zoom_minimo = zoom_minimo
+        self.zoom_maximo = zoom_maximo
+        self.color = color
+
+
+def mapa_teselas(directorio, map_filename, centro_acopio=None, puerto=None):
+    """
+    Guarda la página que muestra las teselas de `directorio`.
+
+    La página solo contiene el mapa base, los marcadores del centro de acopio
+    y del puerto, y la capa de teselas (con la ruta relativa a la carpeta).
+    """
+    with open(os.path.join(directorio, "teselas.json"), encoding="utf-8") as archivo:
+        metadatos = json.load(archivo)
+    limites = metadatos["limites"]
+
+    centro = [(limites[0][0] + limites[1][0]) / 2, (limites[0][1] + limites[1][1]) / 2] if limites else [40.0, -89.0]
+    m = folium.Map(location=centro, zoom_start=7)
+    if centro_acopio is not None:
+        folium.Marker(centro_acopio, tooltip="Centro de Acopio", icon=folium.Icon(color="red", icon="home")).add_to(m)
+    if puerto is not None:
+        folium.Marker(
+            location=(puerto["lat"], puerto["lon"]),
+            tooltip=puerto["nombre"],
+            popup=f"<b>{puerto['nombre']}</b><br>{puerto['info'].replace(chr(10), '<br>')}",
+            icon=folium.Icon(color="blue", icon="anchor"),
+        ).add_to(m)
+
+    # URL relativa al HTML, con "/" también en Windows.
+    url = os.path.relpath(os.path.abspath(directorio), os.path.dirname(os.path.abspath(map_filename)))
+    CapaTeselasVectoriales(url.replace(os.sep, "/"), metadatos["zoom_minimo"], metadatos["zoom_maximo"]).add_to(m)
+    if limites:
+        m.fit_bounds(limites)
+    m.save(map_filename)
+    return m
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta las rutas y las fincas como teselas vectoriales z/x/y.")
+    parser.add_argument("--salida", default=os.path.join(DIRECTORIO_DOCS, "teselas"), help="carpeta de teselas")
+    parser.add_argument("--mapa", default=os.path.join(DIRECTORIO_DOCS, "rutas_teselas.html"), help="página HTML")
+    parser.add_argument("--zoom", type=int, nargs=2, default=(ZOOM_MINIMO, ZOOM_MAXIMO), metavar=("MIN", "MAX"))
+    parser.add_argument("--procesos", type=int, default=None, help="procesos (por defecto, uno por núcleo)")
+    parser.add_argument("--enrutador", choices=("osrm", "local", "grafo"), help="ver enrutadores.py")
+    parser.add_argument("--sinteticas", type=int, metavar="N",
+                        help="usar N rutas de prueba en vez de consultar las rutas (ver mapa_streaming.py)")
+    args = parser.parse_args(argv)
+
+    from mapa_streaming import rutas_en_bloques, rutas_sinteticas
+    from registro_ubicaciones import cargar_ubicaciones
+
+    registro = cargar_ubicaciones()
+    acopio, puerto = registro.acopio.punto, registro.puerto
+
+    if args.sinteticas:
+        rutas = rutas_sinteticas(args.sinteticas)
+    else:
+        from rutas_osrm import get_osrm_route
+
+        if args.enrutador:
+            from enrutadores import configurar_enrutador, crear_enrutador
+
+            configurar_enrutador(crear_enrutador(args.enrutador))
+
+        # Las mismas rutas que ruta_finales.py: fincas → centro de acopio y centro → puerto.
+        def todas():
+            yield from rutas_en_bloques((f["nombre"], f.punto, acopio) for f in registro.fincas)
+            try:
+                yield ("Centro → Puerto", *get_osrm_route(acopio, puerto.punto), {"color": "blue", "peso": 6})
+            except Exception as e:
+                print(f"Error en ruta adicional: {e}")
+
+        rutas = todas()
+
+    metadatos = exportar_teselas(rutas, registro.fincas, args.salida, *args.zoom, procesos=args.procesos)
+    for zoom, datos in metadatos["zooms"].items():
+        print(f"  zoom {zoom:>2}: {datos['teselas']:6d} teselas, {datos['bytes'] / 1024:9,.0f} KB")
+    print(f"{metadatos['rutas']} rutas y {metadatos['fincas']} fincas en {metadatos['segundos']:.2f} s.")
+
+    mapa_teselas(args.salida, args.mapa, acopio, puerto)
+    print(f"Mapa guardado como {args.mapa}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
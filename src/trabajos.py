@@ -0,0 +1,188 @@
+# Trabajos en segundo plano para el menú.
+#
+# Generar las rutas o la gráfica de producción tarda (consultas a OSRM,
+# ajuste de modelos) y antes congelaba el menú. GestorTrabajos ejecuta esas
+# funciones en un grupo de hilos: el usuario sigue usando el menú, ve el
+# avance y el tiempo restante de cada trabajo, puede cancelarlo y recibe el
+# resultado cuando está listo. Pedir dos veces el mismo artefacto reutiliza
+# el trabajo que ya está en curso en vez de empezar otro.
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Hilos del gestor: los trabajos esperan sobre todo a la red (OSRM).
+MAX_TRABAJOS = 2
+
+# Líneas de avance que se guardan por trabajo.
+MAX_NOTAS = 50
+
+
+class Cancelado(Exception):
+    """Se lanza dentro de un trabajo cuando el usuario lo cancela."""
+
+
+class Trabajo:
+    """
+    Estado de un trabajo: avance, notas, cancelación y resultado.
+
+    El trabajo se pasa a la función como `progreso`. La función llama a
+    progreso(hechos, total) o progreso.avanzar(...) en cada paso; si el
+    trabajo fue cancelado, esa llamada lanza Cancelado y la función termina.
+    """
+
+    __slots__ = ("clave", "descripcion", "hechos", "total", "notas", "inicio", "fin",
+                 "futuro", "entregado", "_cancelado", "_lock")
+
+    def __init__(self, clave, descripcion):
+        self.clave = clave
+        self.descripcion = descripcion
+        self.hechos = 0
+        self.total = None
+        self.notas = []
+        self.inicio = time.monotonic()
+        self.fin = None
+        self.futuro = None
+        self.entregado = False
+        self._cancelado = threading.Event()
+        self._lock = threading.Lock()
+
+    def avanzar(self, hechos=None, total=None, nota=None):
+        """Registra el avance (y una nota opcional); lanza Cancelado si se pidió cancelar."""
+        with self._lock:
+            if total is not None:
+                self.total = total
+            if hechos is not None:
+                self.hechos = hechos
+            if nota is not None:
+                self.notas = (self.notas + [nota])[-MAX_NOTAS:]
+        if self._cancelado.is_set():
+            raise Cancelado(self.descripcion)
+
+    __call__ = avanzar
+
+    def anotar(self, nota):
+        """Agrega una línea a las notas del trabajo (reemplaza a print dentro del trabajo)."""
+        self.avanzar(nota=str(nota))
+
+    def cancelar(self):
+        """Pide cancelar el trabajo; se detiene en su próximo paso."""
+        self._cancelado.set()
+        if self.futuro is not None:
+            self.futuro.cancel()
+
+    @property
+    def cancelado(self):
+        return self._cancelado.is_set()
+
+    @property
+    def estado(self):
+        if self.futuro is None or not self.futuro.done():
+            return "cancelando" if self.cancelado else "en curso"
+        if self.futuro.cancelled() or isinstance(self.futuro.exception(), Cancelado):
+            return "cancelado"
+        return "error" if self.futuro.exception() is not None else "terminado"
+
+    @property
+    def terminado(self):
+        return self.futuro is not None and self.futuro.done()
+
+    def segundos_restantes(self):
+        """Estimación del tiempo restante según el ritmo hasta ahora (None si no se puede estimar)."""
+        if not self.total or not self.hechos:
+            return None
+        transcurrido = time.monotonic() - self.inicio
+        return transcurrido / self.hechos * (self.total - self.hechos)
+
+    def resultado(self, timeout=None):
+        """Espera y retorna el resultado (o lanza la excepción del trabajo)."""
+        return self.futuro.result(timeout)
+
+    def linea(self, ancho=20):
+        """Resumen de una línea: barra de avance, porcentaje, tiempo restante y última nota."""
+        estado = self.estado
+        if self.total:
+            llenos = int(ancho * self.hechos / self.total)
+            barra = f"[{'#' * llenos}{'.' * (ancho - llenos)}] {self.hechos}/{self.total}"
+        else:
+            barra = f"[{'.' * ancho}]"
+        if estado == "en curso":
+            restante = self.segundos_restantes()
+            detalle = f"quedan ~{restante:.0f} s" if restante is not None else "calculando..."
+        elif estado == "error":
+            detalle = f"error: {self.futuro.exception()}"
+        else:
+            detalle = estado
+        nota = f" | {self.notas[-1]}" if self.notas and estado == "en curso" else ""
+        return f"{self.descripcion[:32]:<32} {barra} {detalle}{nota}"
+
+
+class GestorTrabajos:
+    """
+    Ejecuta funciones en un grupo de hilos y lleva la cuenta de sus trabajos.
+
+    Cada trabajo se identifica por una clave (por ejemplo, el archivo que
+    genera); mientras un trabajo con esa clave está en curso, enviar() retorna
+    el mismo trabajo en vez de empezar otro.
+    """
+
+    def __init__(self, max_trabajos=MAX_TRABAJOS):
+        self._pool = ThreadPoolExecutor(max_workers=max_trabajos, thread_name_prefix="trabajo")
+        self._trabajos = []
+        self._lock = threading.Lock()
+
+    def enviar(self, clave, funcion, *args, descripcion=None, **kwargs):
+        """
+        Ejecuta funcion(*args, progreso=trabajo, **kwargs) en segundo plano.
+
+        Retorna:
+            (trabajo, nuevo): el Trabajo y False si se reutilizó uno en curso.
+        """
+        with self._lock:
+            for trabajo in self._trabajos:
+                if trabajo.clave == clave and not trabajo.terminado:
+                    return trabajo, False
+
+            trabajo = Trabajo(clave, descripcion or clave)
+
+            def ejecutar():
+                trabajo.inicio = time.monotonic()  # el tiempo en cola no cuenta para la estimación
+                try:
+                    return funcion(*args, progreso=trabajo, **kwargs)
+                finally:
+                    trabajo.fin = time.monotonic()
+
+            trabajo.futuro = self._pool.submit(ejecutar)
+            self._trabajos.append(trabajo)
+            return trabajo, True
+
+    def trabajos(self):
+        """Todos los trabajos, del más antiguo al más reciente."""
+        with self._lock:
+            return list(self._trabajos)
+
+    def en_curso(self):
+        return [t for t in self.trabajos() if not t.terminado]
+
+    def por_entregar(self):
+        """
+        Trabajos terminados cuyo resultado todavía no se mostró; quedan marcados
+        como entregados, así cada resultado se entrega una sola vez.
+        """
+        listos = []
+        with self._lock:
+            for trabajo in self._trabajos:
+                if trabajo.terminado and not trabajo.entregado:
+                    trabajo.entregado = True
+                    listos.append(trabajo)
+        return listos
+
+    def cancelar(self, trabajo=None):
+        """Cancela un trabajo, o todos los que están en curso si `trabajo` es None."""
+        for t in ([trabajo] if trabajo is not None else self.en_curso()):
+            t.cancelar()
+
+    def cerrar(self, esperar=False):
+        """Cancela lo pendiente y libera los hilos."""
+        self.cancelar()
+        self._pool.shutdown(wait=esperar, cancel_futures=True)
@@ -0,0 +1,13 @@
+# Configuración común de las pruebas.
+#
+# Los módulos de src/ se importan por nombre (como al ejecutar los scripts) y
+# la cache de rutas va a un directorio temporal para no tocar cache/.
+#
+# Uso: python -m pytest tests
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+os.environ.setdefault("AGROPATH_CACHE_DIR", tempfile.mkdtemp(prefix="agropath-pruebas-"))
@@ -0,0 +1,80 @@
+# Pruebas de la línea de comandos (agropath.py y calculadora.py): códigos de
+# salida y formato de los resultados.
+
+import json
+
+import pytest
+
+import agropath
+import calculadora
+
+
+@pytest.mark.parametrize("main", [agropath.main, calculadora.main])
+@pytest.mark.parametrize("argumentos", [
+    ["--distancia", "10", "--combustible", "nan"],
+    ["--distancia", "inf"],
+    [],
+])
+def test_costos_errores_de_uso(main, argumentos, capsys):
+    prefijo = ["costos"] if main is agropath.main else []
+    with pytest.raises(SystemExit) as salida:
+        main(prefijo + argumentos)
+    assert salida.value.code == agropath.USO
+
+
+@pytest.mark.parametrize("main", [agropath.main, calculadora.main])
+def test_costos_datos_invalidos(main, tmp_path, capsys):
+    archivo = tmp_path / "d.csv"
+    archivo.write_text("distancia_km\n10\n-1\n", encoding="utf-8")
+    prefijo = ["costos"] if main is agropath.main else []
+    assert main(prefijo + ["--archivo", str(archivo)]) == agropath.ERROR
+    assert "negativa" in capsys.readouterr().err
+
+
+def test_costos_json(capsys):
+    assert agropath.main(["costos", "--distancia", "10", "20", "--vuelta", "0.5", "1"]) == agropath.EXITO
+    filas = json.loads(capsys.readouterr().out)
+    assert len(filas) == 4 and filas[0]["distancia_km"] == 10.0
+
+
+def test_resultado_no_escribible(tmp_path, capsys):
+    destino = tmp_path / "no_existe" / "salida.json"
+    assert agropath.main(["--resultado", str(destino), "costos", "--distancia", "10"]) == agropath.ERROR
+    assert "Error" in capsys.readouterr().err
+
+
+def test_mapas_artefacto_desconocido(capsys):
+    with pytest.raises(SystemExit) as salida:
+        agropath.main(["mapas", "nope"])
+    assert salida.value.code == agropath.USO
+    assert "disponibles" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("contenido, mensaje", [
+    ("lat,lon\n1,2\n", "faltan las columnas"),
+    ("origen_lat,origen_lon,destino_lat,destino_lon\n40,-89,41,x\n", "fila 2"),
+    ("origen_lat,origen_lon,destino_lat,destino_lon\n40,-89,95,-89\n", "fuera de rango"),
+])
+def test_pares_invalidos(tmp_path, contenido, mensaje):
+    archivo = tmp_path / "pares.csv"
+    archivo.write_text(contenido, encoding="utf-8")
+    with pytest.raises(ValueError, match=mensaje):
+        agropath._leer_pares(str(archivo))
+
+
+def test_pares_con_nombre_opcional(tmp_path):
+    archivo = tmp_path / "pares.csv"
+    archivo.write_text("nombre,origen_lat,origen_lon,destino_lat,destino_lon,extra\n"
+                       "a,40,-89,41,-88,x\n,40.5,-89,41,-88,y\n", encoding="utf-8")
+    assert agropath._leer_pares(str(archivo)) == [
+        ("a", (40.0, -89.0), (41.0, -88.0)),
+        ("par 2", (40.5, -89.0), (41.0, -88.0)),
+    ]
+
+
+@pytest.mark.parametrize("hilos", ["0", "-2", "x"])
+def test_mapas_rechaza_hilos_no_positivos(hilos, capsys):
+    with pytest.raises(SystemExit) as salida:
+        agropath.main(["mapas", "--hilos", hilos])
+    assert salida.value.code == agropath.USO
+    assert "--hilos" in capsys.readouterr().err
@@ -0,0 +1,83 @@
+# Pruebas de asignacion.py con instancias pequeñas que se pueden revisar a mano.
+#
+# El costo logístico es lineal en la distancia (calculadora.py), así que la
+# asignación de menor costo es la de menos km por tonelada.
+
+import numpy as np
+import pytest
+
+from asignacion import asignar, asignar_optimo, asignar_voraz
+from calculadora import calcular_costo_total_soya
+
+COSTO_KM = calcular_costo_total_soya(1.0)[1]
+
+# Dos fincas de 1 t, dos centros y un puerto a 1 km de cada centro. Las dos
+# prefieren el centro 0, pero la finca 1 pierde más (4 km) si no lo consigue.
+KM_FC = np.array([[1.0, 2.0], [1.0, 5.0]])
+KM_CP = np.array([[1.0], [1.0]])
+
+
+@pytest.mark.parametrize("asignar_fn", [asignar_voraz, asignar_optimo])
+def test_sin_capacidad_todas_al_mejor_centro(asignar_fn):
+    resultado = asignar_fn(KM_FC, KM_CP)
+    assert resultado["centro"].tolist() == [0, 0]
+    np.testing.assert_allclose(resultado["distancia_km"], [2.0, 2.0])
+    assert resultado["costo_total"] == pytest.approx(4 * COSTO_KM)
+
+
+@pytest.mark.parametrize("asignar_fn", [asignar_voraz, asignar_optimo])
+def test_capacidad_de_los_centros(asignar_fn):
+    # Con 1 t por centro, la finca 1 se queda con el centro 0 y la finca 0 va al 1.
+    resultado = asignar_fn(KM_FC, KM_CP, capacidad_centros=[1.0, 1.0])
+    assert resultado["centro"].tolist() == [1, 0]
+    np.testing.assert_allclose(resultado["flujo_fc"], [[0, 1], [1, 0]], atol=1e-9)
+    np.testing.assert_allclose(resultado["flujo_cp"], [[1], [1]], atol=1e-9)
+    assert resultado["costo_total"] == pytest.approx((3 + 2) * COSTO_KM)
+
+
+def test_capacidad_de_los_puertos():
+    # Dos puertos; el cercano (0) solo recibe 1 t y la otra tonelada va al lejano.
+    km_cp = np.array([[1.0, 10.0], [1.0, 10.0]])
+    resultado = asignar_optimo(KM_FC, km_cp, capacidad_puertos=[1.0, np.inf])
+    np.testing.assert_allclose(resultado["flujo_cp"].sum(axis=0), [1, 1], atol=1e-9)
+    assert resultado["costo_total"] == pytest.approx((1 + 1 + 1 + 10) * COSTO_KM)
+
+
+def test_capacidad_insuficiente():
+    with pytest.raises(ValueError, match="factible"):
+        asignar_optimo(KM_FC, KM_CP, toneladas=[1.0, 2.0], capacidad_centros=[1.0, 1.0])
+    # El voraz deja sin asignar la finca de 2 t, que no cabe en ningún centro.
+    resultado = asignar_voraz(KM_FC, KM_CP, toneladas=[1.0, 2.0], capacidad_centros=[1.0, 1.0])
+    assert resultado["centro"].tolist() == [0, -1]
+    assert np.isnan(resultado["distancia_km"][1])
+
+
+def test_sin_ruta_no_se_usa():
+    km_fc = np.array([[np.nan, 3.0], [1.0, 1.0]])
+    resultado = asignar_optimo(km_fc, KM_CP)
+    assert resultado["centro"].tolist() == [1, 0]
+
+
+@pytest.mark.parametrize("costo_apertura, abiertos", [
+    (0.01, [True, True]),           # abrir es barato: cada finca a su centro
+    (1000.0, [True, False]),        # abrir es caro: un solo centro para las dos
+    ([1000.0, 0.0], [False, True]), # un costo por centro
+])
+def test_costo_de_apertura(costo_apertura, abiertos):
+    km_fc = np.array([[1.0, 2.0], [2.0, 1.0]])
+    resultado = asignar_optimo(km_fc, KM_CP, costo_apertura=costo_apertura)
+    assert resultado["abiertos"].tolist() == abiertos
+    km = {(True, True): 4.0, (True, False): 5.0, (False, True): 5.0}[tuple(abiertos)]
+    apertura = np.dot(np.broadcast_to(costo_apertura, 2), abiertos)
+    assert resultado["costo_total"] == pytest.approx(km * COSTO_KM + apertura)
+
+
+def test_voraz_rechaza_restricciones_que_ignora():
+    fincas = [{"lat": 40.0, "lon": -89.0}]
+    centros = [{"lat": 40.1, "lon": -89.0}]
+    with pytest.raises(ValueError, match="costo_apertura"):
+        asignar(fincas, centros, [{"lat": 40.2, "lon": -89.0}], fuente="geodesica", metodo="voraz",
+                costo_apertura=5.0)
+    with pytest.raises(ValueError, match="puertos"):
+        asignar(fincas, centros, [{"lat": 40.2, "lon": -89.0, "capacidad": 1.0}], fuente="geodesica",
+                metodo="voraz")
@@ -0,0 +1,62 @@
+# Pruebas de calculadora.py: costos en lote y lectura de distancias.
+
+import numpy as np
+import pytest
+
+from calculadora import (calcular_costo_total_soya, calcular_costos_lote, filas_costos, leer_distancias,
+                         validar_distancias)
+
+
+def test_lote_igual_a_la_formula_escalar():
+    distancias = np.array([[10.0, 250.0], [0.0, np.nan]])
+    combustible, operacional, vuelta = [0.01, 0.02, 0.03], [2.0, 2.5], [0.5, 1.0]
+    total, logistico = calcular_costos_lote(distancias, combustible, operacional, vuelta, costo_produccion_ton=100.0)
+    assert total.shape == logistico.shape == (2, 2, 3, 2, 2)
+    for (i, j, a, b, c), valor in np.ndenumerate(logistico):
+        esperado = calcular_costo_total_soya(distancias[i, j], combustible[a], operacional[b], vuelta[c], 100.0)
+        np.testing.assert_allclose([total[i, j, a, b, c], valor], esperado)
+
+
+def test_lote_con_parametros_escalares():
+    total, logistico = calcular_costos_lote([1.0, 2.0])
+    assert logistico.shape == (2,)
+    np.testing.assert_allclose(total, calcular_costo_total_soya(np.array([1.0, 2.0]))[0])
+    with pytest.raises(ValueError, match="negativa"):
+        calcular_costos_lote([-1.0])
+
+
+def test_filas_costos():
+    filas = filas_costos([10.0, 20.0], factor_vuelta=[0.5, 1.0])
+    assert [(f["distancia_km"], f["factor_vuelta"]) for f in filas] == [(10, 0.5), (10, 1.0), (20, 0.5), (20, 1.0)]
+    assert filas[0]["costo_total_ton"] == pytest.approx(calcular_costo_total_soya(10.0)[0])
+
+
+@pytest.mark.parametrize("contenido, columna, esperado", [
+    ("distancia_km\n1\n2.5\n", "distancia_km", [1.0, 2.5]),
+    ("id,km\n1,10\n2,20\n", "km", [10.0, 20.0]),
+    ("nombre,km\na,10\nb,20\n", "distancia_km", [10.0, 20.0]),
+    ("10\n20\n", "distancia_km", [10.0, 20.0]),
+])
+def test_leer_distancias(tmp_path, contenido, columna, esperado):
+    ruta = tmp_path / "d.csv"
+    ruta.write_text(contenido, encoding="utf-8")
+    assert leer_distancias(str(ruta), columna) == esperado
+
+
+@pytest.mark.parametrize("contenido, mensaje", [
+    ("id,km\n1,10\n", "columnas numéricas"),
+    ("distancia_km\n1\nx\n", "fila 3"),
+    ("distancia_km\nnan\n", "finito"),
+    ("distancia_km\n-3\n", "negativa"),
+])
+def test_leer_distancias_invalidas(tmp_path, contenido, mensaje):
+    ruta = tmp_path / "d.csv"
+    ruta.write_text(contenido, encoding="utf-8")
+    with pytest.raises(ValueError, match=mensaje):
+        leer_distancias(str(ruta))
+
+
+def test_validar_distancias():
+    validar_distancias([0.0, 1.5])
+    with pytest.raises(ValueError):
+        validar_distancias(float("inf"))
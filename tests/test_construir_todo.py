@@ -0,0 +1,38 @@
+# Pruebas de construir_todo: argumentos y huella de las entradas compartidas.
+
+import os
+
+import pytest
+
+import construir_todo
+
+
+@pytest.mark.parametrize("hilos", ["0", "-1"])
+def test_hilos_debe_ser_positivo(hilos, capsys):
+    with pytest.raises(SystemExit) as salida:
+        construir_todo.main(["--hilos", hilos])
+    assert salida.value.code == 2
+    assert "al menos 1" in capsys.readouterr().err
+
+
+def test_huella_cambia_con_el_archivo(tmp_path):
+    archivo = tmp_path / "us-states.json"
+    archivo.write_text('{"type":"FeatureCollection","features":[]}', encoding="utf-8")
+    antes = construir_todo._huella_archivos(str(archivo), str(tmp_path / "no-existe.json"))
+    assert construir_todo._huella_archivos(str(archivo)) == antes
+
+    estado = os.stat(archivo)
+    os.utime(archivo, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000_000))
+    assert construir_todo._huella_archivos(str(archivo)) != antes
+
+
+def test_estados_no_recorre_el_geojson(monkeypatch, tmp_path):
+    # El hash de "estados" sale de la huella del archivo, no del GeoJSON.
+    hasheados = []
+    original = construir_todo._hash_valor
+    monkeypatch.setattr(construir_todo, "_hash_valor", lambda valor: hasheados.append(valor) or original(valor))
+
+    estados = construir_todo.construir(str(tmp_path), seleccion=["estados"])
+
+    assert estados == {"estados": "construido"}
+    assert hasheados and all("FeatureCollection" not in str(valor) for valor in hasheados)
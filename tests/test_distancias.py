@@ -0,0 +1,32 @@
+# Pruebas de distancias.py: el modo por defecto reproduce geopy.geodesic.
+
+import numpy as np
+import pytest
+from geopy.distance import geodesic
+
+from distancias import MODO_POR_DEFECTO, haversine_m, longitudes_segmentos, vincenty_m
+from grafo_compacto import GrafoCompacto
+
+RUTA = [(40.92, -89.53), (40.95, -89.40), (40.95, -89.40), (39.48, -88.30), (38.61, -90.20)]
+
+
+def test_por_defecto_igual_a_geodesic():
+    assert MODO_POR_DEFECTO == "vincenty"
+    referencia = [geodesic(a, b).meters for a, b in zip(RUTA[:-1], RUTA[1:])]
+    np.testing.assert_allclose(longitudes_segmentos(RUTA), referencia, atol=1e-3)
+    assert GrafoCompacto.desde_rutas([RUTA]).peso_total() == pytest.approx(sum(referencia), rel=1e-6)  # pesos en float32
+
+
+def test_haversine_es_opcional_y_aproximado():
+    referencia = longitudes_segmentos(RUTA, "karney")
+    aproximadas = longitudes_segmentos(RUTA, "haversine")
+    np.testing.assert_allclose(aproximadas, referencia, rtol=5e-3)
+    with pytest.raises(ValueError, match="desconocido"):
+        longitudes_segmentos(RUTA, "plano")
+
+
+def test_vincenty_con_broadcasting():
+    distancias = vincenty_m(40.0, -89.0, np.array([[40.0], [41.0]]), np.array([-89.0, -88.0]))
+    assert distancias.shape == (2, 2) and distancias[0, 0] == 0.0
+    assert distancias[1, 1] == pytest.approx(geodesic((40.0, -89.0), (41.0, -88.0)).meters, abs=1e-3)
+    assert haversine_m(40.0, -89.0, 41.0, -88.0) == pytest.approx(distancias[1, 1], rel=5e-3)
@@ -0,0 +1,114 @@
+# Pruebas de ServidorLocal con los clientes de OSRM (rutas_osrm, matriz_distancias).
+#
+# La red vial de prueba es pequeña y fija: dos calles que se cruzan y un tramo
+# aparte, sin conexión con ellas, para los casos sin ruta.
+
+import numpy as np
+import pytest
+import requests
+
+from enrutadores import EnrutadorGrafo, ServidorLocal
+from matriz_distancias import matriz_osrm
+from red_vial import RedVial
+from rutas_osrm import get_osrm_route, obtener_rutas_lote
+
+# Calle este-oeste y calle norte-sur que se cruzan en (40.0, -89.0).
+ESTE_OESTE = [(40.0, -89.0 + 0.01 * i) for i in range(-5, 6)]
+NORTE_SUR = [(40.0 + 0.01 * i, -89.0) for i in range(-5, 6)]
+# Tramo aislado, a unos 110 km al norte.
+AISLADO = [(41.0, -89.0 + 0.01 * i) for i in range(4)]
+
+OESTE, ESTE = ESTE_OESTE[0], ESTE_OESTE[-1]
+SUR, NORTE = NORTE_SUR[0], NORTE_SUR[-1]
+FUERA_DE_LA_RED = (45.0, -80.0)
+
+
+@pytest.fixture(scope="module")
+def servidor(tmp_path_factory):
+    archivo = tmp_path_factory.mktemp("red") / "red_vial.npz"
+    RedVial.desde_rutas([ESTE_OESTE, NORTE_SUR, AISLADO]).guardar(str(archivo))
+    with ServidorLocal(EnrutadorGrafo.cargar(str(archivo)), puerto=0) as servidor:
+        yield servidor
+
+
+def test_ruta_por_la_red(servidor):
+    puntos, distancia = get_osrm_route(OESTE, NORTE, osrm_url=servidor.url, usar_cache=False)
+    assert puntos[0] == pytest.approx(OESTE) and puntos[-1] == pytest.approx(NORTE)
+    assert (40.0, -89.0) in [tuple(np.round(p, 6)) for p in puntos]  # pasa por el cruce
+    # 5 tramos de 0.01° de longitud (~852 m a 40°N) + 5 de latitud (~1112 m).
+    assert distancia == pytest.approx(5 * 852 + 5 * 1112, rel=0.01)
+
+
+def test_lote_con_errores_por_par(servidor):
+    pares = [(OESTE, ESTE), (SUR, AISLADO[-1]), (FUERA_DE_LA_RED, NORTE), (NORTE, SUR)]
+    resultados = obtener_rutas_lote(pares, osrm_url=servidor.url, usar_cache=False, reintentos=0)
+
+    assert len(resultados) == len(pares)
+    (ruta, error), (sin_camino, error_camino), (fuera, error_fuera), (vuelta, error_vuelta) = resultados
+    assert error is None and ruta[1] == pytest.approx(10 * 852, rel=0.01)
+    assert error_vuelta is None and vuelta[1] == pytest.approx(10 * 1112, rel=0.01)
+    # Los pares que fallan traen su propio error, sin afectar a los demás.
+    assert sin_camino is None and isinstance(error_camino, requests.HTTPError)
+    assert fuera is None and isinstance(error_fuera, requests.HTTPError)
+    assert error_fuera.response.json()["code"] == "NoRoute"
+
+
+def test_matriz_osrm(servidor):
+    distancias, duraciones = matriz_osrm([OESTE, SUR], [ESTE, NORTE, AISLADO[0]], osrm_url=servidor.url)
+
+    assert distancias.shape == duraciones.shape == (2, 3)
+    assert distancias[0, 0] == pytest.approx(10 * 852, rel=0.01)
+    assert distancias[1, 1] == pytest.approx(10 * 1112, rel=0.01)
+    assert distancias[0, 1] == pytest.approx(distancias[1, 0], rel=1e-5)  # pesos en float32
+    # Sin camino hasta el tramo aislado: null en la respuesta, NaN en la matriz.
+    assert np.isnan(distancias[:, 2]).all() and np.isnan(duraciones[:, 2]).all()
+    assert (duraciones[:, :2] > 0).all()
+
+
+def test_matriz_osrm_por_bloques(servidor):
+    origenes, destinos = ESTE_OESTE[:4], NORTE_SUR[:5]
+    completa, _ = matriz_osrm(origenes, destinos, osrm_url=servidor.url)
+    por_bloques, _ = matriz_osrm(origenes, destinos, osrm_url=servidor.url, max_coordenadas=4)
+    np.testing.assert_allclose(por_bloques, completa)
+
+
+@pytest.mark.parametrize("consulta", [
+    "/table/v1/driving/-89.0,40.0;-88.95,40.0?sources=5",
+    "/table/v1/driving/-89.0,40.0;-88.95,40.0?destinations=0;2",
+    "/table/v1/driving/-89.0,40.0;-88.95,40.0?sources=x",
+    "/route/v1/driving/-89.0,40.0",
+    "/route/v1/driving/-89.0;-88.95,40.0",
+])
+def test_consultas_invalidas(servidor, consulta):
+    respuesta = requests.get(servidor.url + consulta, timeout=5)
+    assert respuesta.status_code == 400
+    assert respuesta.json()["code"] == "InvalidQuery"
+    # El hilo del servidor sigue atendiendo después del error.
+    assert requests.get(servidor.url + "/route/v1/driving/-89.05,40.0;-88.95,40.0", timeout=5).json()["code"] == "Ok"
+
+
+def test_ruta_por_varias_coordenadas(servidor):
+    coords = ";".join(f"{lon},{lat}" for lat, lon in (OESTE, ESTE, NORTE))
+    ruta = requests.get(f"{servidor.url}/route/v1/driving/{coords}", timeout=5).json()["routes"][0]
+
+    # Dos tramos: OESTE → ESTE y ESTE → NORTE (de vuelta por el cruce).
+    assert len(ruta["legs"]) == 2
+    assert ruta["legs"][0]["distance"] == pytest.approx(10 * 852, rel=0.01)
+    assert ruta["legs"][1]["distance"] == pytest.approx(5 * 852 + 5 * 1112, rel=0.01)
+    assert ruta["distance"] == pytest.approx(sum(t["distance"] for t in ruta["legs"]))
+    # La geometría va de OESTE a NORTE pasando por ESTE (lon, lat como en OSRM).
+    lonlat = np.round(ruta["geometry"]["coordinates"], 6).tolist()
+    assert lonlat[0] == [OESTE[1], OESTE[0]] and lonlat[-1] == [NORTE[1], NORTE[0]]
+    assert [ESTE[1], ESTE[0]] in lonlat
+
+
+class _EnrutadorRoto:
+    def ruta(self, origen, destino, profile="driving", **_):
+        raise RuntimeError("falla interna")
+
+
+def test_error_interno_responde_500():
+    with ServidorLocal(_EnrutadorRoto(), puerto=0) as roto:
+        respuesta = requests.get(roto.url + "/route/v1/driving/-89.05,40.0;-88.95,40.0", timeout=5)
+    assert respuesta.status_code == 500
+    assert respuesta.json() == {"code": "InternalError", "message": "falla interna"}
@@ -0,0 +1,24 @@
+# Pruebas de IndiceEspacial: vecino más cercano con y sin puntos.
+
+import math
+
+import pytest
+
+from distancias import haversine_m
+from indice_espacial import IndiceEspacial
+
+
+def test_mas_cercano():
+    fincas = [{"nombre": "A", "lat": 40.0, "lon": -89.0}, {"nombre": "B", "lat": 41.0, "lon": -88.0}]
+    finca, distancia = IndiceEspacial.desde_lugares(fincas).mas_cercano((40.1, -89.0))
+    assert finca["nombre"] == "A"
+    assert distancia == pytest.approx(haversine_m(40.1, -89.0, 40.0, -89.0))
+
+
+@pytest.mark.parametrize("indice", [
+    IndiceEspacial([]),
+    IndiceEspacial.desde_lugares([]),
+    IndiceEspacial.desde_rutas([]),
+])
+def test_mas_cercano_sin_puntos(indice):
+    assert indice.mas_cercano((40.0, -89.0)) == (None, math.inf)
@@ -0,0 +1,36 @@
+# Pruebas de build_streaming_map(): los marcadores son los mismos que en
+# ruta_finales.build_unified_map() y la geometría queda fuera del HTML.
+
+import pytest
+
+from mapa_streaming import build_streaming_map
+from registro_ubicaciones import cargar_ubicaciones
+from ruta_finales import build_unified_map
+
+
+@pytest.mark.parametrize("construir", [build_streaming_map, build_unified_map])
+def test_centro_de_acopio_con_nombre_e_info(construir, tmp_path):
+    registro = cargar_ubicaciones()
+    acopio = registro.acopio
+    ruta = [acopio.punto, registro.puerto.punto]
+    rutas = [("Finca", ruta, 1000.0)]
+    if construir is build_unified_map:
+        rutas = {nombre: (puntos, d) for nombre, puntos, d in rutas}
+    archivo = tmp_path / "mapa.html"
+
+    construir(registro.fincas, acopio, registro.puerto, rutas, None, str(archivo))
+
+    html = archivo.read_text(encoding="utf-8")
+    assert acopio.nombre in html
+    assert acopio.info.split("\n")[0] in html
+
+
+def test_centro_de_acopio_solo_coordenadas(tmp_path):
+    registro = cargar_ubicaciones()
+    archivo = tmp_path / "mapa.html"
+    cantidad = build_streaming_map(registro.fincas, registro.acopio.punto, registro.puerto,
+                                   iter([("Finca", [registro.acopio.punto, registro.puerto.punto], 1000.0)]),
+                                   None, str(archivo))
+    assert cantidad == 1
+    assert "Centro de Acopio" in archivo.read_text(encoding="utf-8")
+    assert (tmp_path / "mapa.rutas.bin").exists()
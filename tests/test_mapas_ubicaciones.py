@@ -0,0 +1,45 @@
+# Los mapas leen el registro de ubicaciones al generarse, no al importarse:
+# un cambio en el CSV se ve en la siguiente llamada sin reiniciar el proceso.
+
+import os
+import shutil
+
+import pytest
+
+import centro_de_acopio
+import fincas_de_produccion
+import puerto
+import registro_ubicaciones
+
+ORIGINAL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dataset", "ubicaciones.csv")
+
+
+@pytest.fixture
+def ubicaciones(tmp_path, monkeypatch):
+    copia = tmp_path / "ubicaciones.csv"
+    shutil.copy(ORIGINAL, copia)
+    cargar = registro_ubicaciones.cargar_ubicaciones
+    for modulo in (centro_de_acopio, fincas_de_produccion, puerto):
+        monkeypatch.setattr(modulo, "cargar_ubicaciones", lambda: cargar(str(copia)))
+    return copia
+
+
+@pytest.mark.parametrize("generar, tipo", [
+    (fincas_de_produccion.fincas_de_produccion, "finca"),
+    (centro_de_acopio.centros_de_acopio, "acopio"),
+    (puerto.puerto, "puerto"),
+])
+def test_cambios_del_csv_se_ven_sin_reimportar(ubicaciones, tmp_path, generar, tipo):
+    mapa = tmp_path / "mapa.html"
+    generar(str(mapa))
+    assert "Lugar renombrado" not in mapa.read_text(encoding="utf-8")
+
+    lineas = ubicaciones.read_text(encoding="utf-8").splitlines()
+    i = next(n for n, linea in enumerate(lineas) if linea.startswith(tipo + ","))
+    campos = lineas[i].split(",")
+    campos[1] = "Lugar renombrado"
+    lineas[i] = ",".join(campos)
+    ubicaciones.write_text("\n".join(lineas) + "\n", encoding="utf-8")
+
+    generar(str(mapa))
+    assert "Lugar renombrado" in mapa.read_text(encoding="utf-8")
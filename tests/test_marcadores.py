@@ -0,0 +1,42 @@
+# Pruebas de marcadores.py: textos de los lugares dentro del HTML generado.
+
+import json
+import re
+
+import folium
+import pytest
+
+from marcadores import agregar_marcadores, json_para_script
+
+MALICIOSO = "A</script><script>alert(1)</script>"
+LUGARES = [
+    {"nombre": MALICIOSO, "lat": 40.0, "lon": -89.0, "info": "Parcela\nnorte & sur"},
+    {"nombre": "Finca 2", "lat": 40.1, "lon": -89.1, "info": "Parcela de producción"},
+]
+
+
+def test_json_para_script_conserva_los_textos():
+    textos = [MALICIOSO, "a & b", "ñandú"]
+    codificado = json_para_script(textos)
+    assert "<" not in codificado and ">" not in codificado and "&" not in codificado
+    assert json.loads(codificado) == textos
+
+
+@pytest.mark.parametrize("modo", ["agrupado", "canvas"])
+def test_textos_no_cierran_el_script(modo):
+    m = folium.Map()
+    agregar_marcadores(m, LUGARES, modo=modo)
+    html = m.get_root().render()
+    assert "<script>alert(1)" not in html
+    # Lo que se pegó como "var textos = [...]" decodifica a los textos originales.
+    textos = json.loads(re.search(r"var textos = (\[.*?\]);", html).group(1))
+    assert MALICIOSO in textos and "Parcela\nnorte & sur" in textos
+
+
+def test_popup_igual_en_modo_marcadores():
+    m = folium.Map()
+    agregar_marcadores(m, LUGARES[1:], modo="marcadores")
+    agregar_marcadores(m, LUGARES[:1], modo="marcadores", popup_con_nombre=False)
+    html = m.get_root().render()
+    assert "<b>Finca 2</b><br>Parcela de producción" in html
+    assert "Parcela<br>norte & sur" in html
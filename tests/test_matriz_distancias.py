@@ -0,0 +1,67 @@
+# Pruebas de matriz_distancias(): reparto de opciones entre OSRM y el cálculo
+# geodésico, y cuándo se usa el cálculo geodésico en lugar de OSRM.
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import requests
+
+from enrutadores import configurar_enrutador
+from matriz_distancias import matriz_distancias, matriz_geodesica
+
+ORIGENES = [(40.0, -89.0)]
+DESTINOS = [(40.1, -89.0), (40.0, -88.9)]
+# Puerto cerrado: OSRM "no disponible" sin depender de la red.
+SIN_SERVIDOR = "http://127.0.0.1:1"
+
+
+def test_auto_reparte_las_opciones():
+    distancias, duraciones = matriz_distancias(
+        ORIGENES, DESTINOS, osrm_url=SIN_SERVIDOR, reintentos=0, factor_desvio=1.0, velocidad_kmh=36.0
+    )
+    esperadas, _ = matriz_geodesica(ORIGENES, DESTINOS, factor_desvio=1.0)
+    assert distancias == pytest.approx(esperadas)
+    assert duraciones == pytest.approx(esperadas / 10.0)
+
+
+def test_auto_rechaza_opciones_desconocidas():
+    with pytest.raises(TypeError, match="factor"):
+        matriz_distancias(ORIGENES, DESTINOS, osrm_url=SIN_SERVIDOR, factor=1.0)
+
+
+class _Responde400(BaseHTTPRequestHandler):
+    def do_GET(self):
+        cuerpo = b'{"code":"InvalidQuery","message":"Query string malformed"}'
+        self.send_response(400)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_auto_propaga_errores_4xx():
+    servidor = HTTPServer(("127.0.0.1", 0), _Responde400)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    try:
+        with pytest.raises(requests.HTTPError):
+            matriz_distancias(ORIGENES, DESTINOS, osrm_url=f"http://127.0.0.1:{servidor.server_port}", reintentos=0)
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def test_auto_sin_archivo_de_grafo_usa_osrm_o_geodesica(monkeypatch):
+    # La cache de las pruebas es un directorio vacío: no hay red_vial.npz.
+    monkeypatch.setenv("AGROPATH_ENRUTADOR", "grafo")
+    configurar_enrutador(None)
+    try:
+        distancias, _ = matriz_distancias(ORIGENES, DESTINOS, osrm_url=SIN_SERVIDOR, reintentos=0)
+    finally:
+        configurar_enrutador(None)
+    esperadas, _ = matriz_geodesica(ORIGENES, DESTINOS)
+    assert distancias == pytest.approx(esperadas)
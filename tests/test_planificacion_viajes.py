@@ -0,0 +1,68 @@
+# Pruebas de la planificación de viajes: capacidad de los camiones, 2-opt
+# con distancias asimétricas y fincas sin ruta (NaN en la matriz).
+
+import itertools
+
+import numpy as np
+import pytest
+
+from planificacion_viajes import _longitud, ahorros, dos_opt, planificar
+
+# Centro (nodo 0) y cuatro fincas sobre una línea, a 1 km entre sí. Volver
+# hacia el centro cuesta un 50 % más que alejarse (subida, desvíos...).
+POSICIONES = np.array([0.0, 1.0, 2.0, 3.0, 4.0])
+TRAMOS = np.abs(POSICIONES[:, None] - POSICIONES[None, :])
+D = TRAMOS * np.where(POSICIONES[:, None] > POSICIONES[None, :], 1.5, 1.0)
+
+
+def test_capacidad_divide_los_viajes():
+    plan = planificar(D, [10.0, 10.0, 10.0, 10.0], capacidad=25.0)
+
+    assert len(plan["viajes"]) == 2
+    assert sorted(i for viaje in plan["viajes"] for i in viaje) == [0, 1, 2, 3]
+    assert all(carga <= 25.0 for carga in plan["carga"])
+    assert sum(plan["carga"]) == pytest.approx(40.0)
+    assert plan["km_total"] == pytest.approx(sum(plan["km"]))
+    assert plan["sin_asignar"] == []
+
+
+def test_sin_limite_de_capacidad_un_solo_viaje():
+    plan = planificar(D, [1.0] * 4, capacidad=100.0)
+    assert len(plan["viajes"]) == 1
+    assert plan["km_total"] < plan["km_individual"]
+
+
+def test_finca_con_mas_carga_que_un_camion():
+    with pytest.raises(ValueError, match="capacidad"):
+        ahorros(D, [30.0, 1.0, 1.0, 1.0], 25.0)
+
+
+def test_dos_opt_mejora_con_distancias_asimetricas():
+    inicial = [3, 1, 4, 2]
+    mejorado = dos_opt(inicial, D)
+
+    optimo = min(_longitud(list(p), D) for p in itertools.permutations([1, 2, 3, 4]))
+    assert sorted(mejorado) == [1, 2, 3, 4]
+    assert _longitud(mejorado, D) < _longitud(inicial, D)
+    assert _longitud(mejorado, D) == pytest.approx(optimo)
+
+
+def test_dos_opt_no_empeora_un_viaje_optimo():
+    # Al revés cuesta más (1.5 por km de vuelta): 2-opt no debe invertirlo.
+    assert dos_opt([1, 2, 3, 4], D) == [1, 2, 3, 4]
+
+
+def test_fincas_sin_ruta_quedan_sin_asignar():
+    con_nan = D.copy()
+    con_nan[0, 2] = np.nan          # no hay ruta del centro a la finca 1
+    con_nan[3, 4] = np.nan          # entre dos fincas: solo impide unirlas en ese orden
+
+    plan = planificar(con_nan, [1.0] * 4, capacidad=100.0)
+
+    assert plan["sin_asignar"] == [1]
+    asignadas = [i for viaje in plan["viajes"] for i in viaje]
+    assert sorted(asignadas) == [0, 2, 3]
+    assert all(np.isfinite(plan["km"]))
+    assert np.isfinite(plan["km_individual"])
+    assert np.isnan(plan["distancia_a_bordo_km"][1])
+    assert np.isfinite(np.delete(plan["distancia_a_bordo_km"], 1)).all()
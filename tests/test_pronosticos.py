@@ -0,0 +1,99 @@
+# Pruebas de ModeloTendencias: comparación con np.polyfit sobre Soy.csv,
+# intervalos de predicción y agrupación de las series por años faltantes.
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from consultas_soya import TABLA_EXISTENCIAS
+from pronosticos import ModeloTendencias, backtest, matriz_series
+
+
+@pytest.fixture(scope="module")
+def soya():
+    años, claves, Y = matriz_series()
+    return años, claves, Y, ModeloTendencias.ajustar(años, Y, claves)
+
+
+def test_total_storage_igual_que_polyfit(soya):
+    años, claves, Y, modelo = soya
+    i = modelo.indice(TABLA_EXISTENCIAS, "Total storage")
+    presentes = ~np.isnan(Y[:, i])
+    pendiente, ordenada = np.polyfit(años[presentes], Y[presentes, i], 1)
+
+    assert modelo.coeficientes[1, i] == pytest.approx(pendiente)
+    assert pendiente == pytest.approx(38692.46, rel=1e-6)
+    # El término independiente es el valor de la recta en el año de referencia.
+    assert modelo.coeficientes[0, i] == pytest.approx(ordenada + pendiente * modelo.año_ref)
+
+
+def test_cada_serie_igual_que_su_propio_polyfit(soya):
+    # Ajustar por patrón de faltantes da lo mismo que ajustar serie por serie.
+    años, claves, Y, modelo = soya
+    for i in range(Y.shape[1]):
+        presentes = ~np.isnan(Y[:, i])
+        if presentes.sum() < 2:
+            assert np.isnan(modelo.coeficientes[:, i]).all()
+            continue
+        pendiente, _ = np.polyfit(años[presentes], Y[presentes, i], 1)
+        assert modelo.coeficientes[1, i] == pytest.approx(pendiente, rel=1e-6, abs=1e-9)
+        assert modelo.observaciones[i] == presentes.sum()
+
+
+def test_agrupa_por_patron_de_faltantes():
+    años = np.arange(2000, 2010)
+    x = (años - 2000).astype(float)
+    Y = np.column_stack([2 * x + 1, -x + 5, 3 * x, x + 7, 0.5 * x])
+    # Tres patrones de faltantes: las columnas 1 y 4 comparten el suyo y se
+    # resuelven en el mismo lstsq; la 0 y la 2 están completas.
+    Y[:3, [1, 4]] = np.nan
+    Y[[2, 5], 3] = np.nan
+
+    modelo = ModeloTendencias.ajustar(años, Y, [(1, str(i)) for i in range(5)])
+
+    np.testing.assert_allclose(modelo.coeficientes[1], [2.0, -1.0, 3.0, 1.0, 0.5], atol=1e-9)
+    np.testing.assert_array_equal(modelo.observaciones, [10, 7, 10, 8, 7])
+    assert np.all(modelo.varianza < 1e-18)
+
+
+def test_serie_con_un_solo_dato_queda_en_nan():
+    años = np.arange(2000, 2005)
+    Y = np.column_stack([np.arange(5.0), [np.nan, np.nan, 4.0, np.nan, np.nan]])
+    modelo = ModeloTendencias.ajustar(años, Y, [(1, "a"), (1, "b")])
+    assert np.isnan(modelo.coeficientes[:, 1]).all()
+    media, inferior, superior = modelo.predecir([2010])
+    assert np.isnan(media[0, 1]) and np.isnan(inferior[0, 1]) and np.isnan(superior[0, 1])
+
+
+def test_intervalo_de_prediccion(soya):
+    años, claves, Y, modelo = soya
+    futuros = [2025, 2026, 2027]
+    media, inferior, superior = modelo.predecir(futuros, nivel=0.9)
+
+    assert media.shape == inferior.shape == superior.shape == (3, len(claves))
+    finitos = np.isfinite(inferior)
+    assert (inferior[finitos] <= media[finitos]).all() and (media[finitos] <= superior[finitos]).all()
+    # El intervalo se abre al alejarse de los datos.
+    ancho = superior - inferior
+    assert (np.diff(ancho[:, finitos.all(axis=0)], axis=0) > 0).all()
+
+    # Fórmula clásica para una serie: t · s · sqrt(1 + 1/n + (x0 - x̄)² / Sxx).
+    i = modelo.indice(TABLA_EXISTENCIAS, "Total storage")
+    presentes = ~np.isnan(Y[:, i])
+    x, y = años[presentes].astype(float), Y[presentes, i]
+    n = len(x)
+    residuos = y - np.polyval(np.polyfit(x, y, 1), x)
+    s = np.sqrt((residuos ** 2).sum() / (n - 2))
+    x0 = np.array(futuros, dtype=float)
+    margen = stats.t.ppf(0.95, n - 2) * s * np.sqrt(1 + 1 / n + (x0 - x.mean()) ** 2 / ((x - x.mean()) ** 2).sum())
+    np.testing.assert_allclose(superior[:, i] - media[:, i], margen, rtol=1e-8)
+
+
+def test_backtest_recta_exacta():
+    años = np.arange(1990, 2010)
+    Y = np.column_stack([10.0 + 2.0 * (años - 1990), np.full(len(años), np.nan)])
+    resultado = backtest(años, Y, [(1, "recta"), (1, "vacia")], ventana_minima=5)
+
+    assert resultado["pronosticos"].tolist() == [15, 0]
+    assert resultado["mae"][0] == pytest.approx(0.0, abs=1e-9)
+    assert np.isnan(resultado["mae"][1])
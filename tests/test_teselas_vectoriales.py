@@ -0,0 +1,62 @@
+# Pruebas de las coordenadas de tesela (Web Mercator, esquema z/x/y) y del
+# reparto de una línea entre las teselas que cruza.
+
+import math
+
+import numpy as np
+import pytest
+
+from teselas_vectoriales import a_teselas, cortar_linea
+
+
+def desde_teselas(x, y, zoom):
+    # Inversa de a_teselas(): (x, y) fraccionarias → (lat, lon).
+    n = 2.0 ** zoom
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n)))), x / n * 360.0 - 180.0
+
+
+@pytest.mark.parametrize("punto, zoom, tesela", [
+    ((0.0, 0.0), 0, (0, 0)),
+    ((0.0, 0.0), 1, (1, 1)),
+    ((52.52, 13.4), 10, (550, 335)),       # Berlín
+    ((40.0, -89.0), 10, (258, 387)),       # centro de Illinois
+    ((85.0511, -180.0), 3, (0, 0)),        # esquina noroeste del mundo
+    ((-85.0511, 179.999), 3, (7, 7)),      # esquina sureste
+])
+def test_a_teselas(punto, zoom, tesela):
+    assert tuple(np.floor(a_teselas([punto], zoom)[0]).astype(int)) == tesela
+
+
+def test_a_teselas_ida_y_vuelta():
+    puntos = [(40.0, -89.0), (-33.9, 151.2), (10.0, -75.5)]
+    for lat, lon in puntos:
+        x, y = a_teselas([(lat, lon)], 7)[0]
+        assert desde_teselas(x, y, 7) == pytest.approx((lat, lon))
+
+
+def test_cortar_linea_solo_las_teselas_que_cruza():
+    # Segmento de (0.5, 0.5) a (2.5, 1.5) en zoom 2: su rectángulo tiene 6
+    # teselas, pero la línea solo cruza 4 (x = 1 en y = 0.75, y = 1 en
+    # x = 1.5, x = 2 en y = 1.25).
+    puntos = [desde_teselas(0.5, 0.5, 2), desde_teselas(2.5, 1.5, 2)]
+    assert cortar_linea(puntos, 2) == {(0, 0): [(0, 1)], (1, 0): [(0, 1)], (1, 1): [(0, 1)], (2, 1): [(0, 1)]}
+
+
+def test_cortar_linea_une_segmentos_consecutivos():
+    # Tres segmentos dentro de la tesela (0, 0) y uno que sale a (1, 0).
+    zoom = 3
+    puntos = [desde_teselas(x, 0.5, zoom) for x in (0.1, 0.3, 0.5, 0.7, 1.5)]
+    assert cortar_linea(puntos, zoom) == {(0, 0): [(0, 4)], (1, 0): [(3, 4)]}
+
+
+def test_cortar_linea_por_una_esquina():
+    # La diagonal pasa justo por la esquina (1, 1): se incluyen las dos
+    # teselas vecinas porque el trazo tiene ancho.
+    puntos = [desde_teselas(0.5, 0.5, 2), desde_teselas(1.5, 1.5, 2)]
+    assert set(cortar_linea(puntos, 2)) == {(0, 0), (1, 0), (0, 1), (1, 1)}
+
+
+def test_cortar_linea_hacia_el_oeste():
+    puntos = [desde_teselas(3.5, 2.2, 2), desde_teselas(0.5, 2.8, 2)]
+    assert set(cortar_linea(puntos, 2)) == {(3, 2), (2, 2), (1, 2), (0, 2)}
+    assert cortar_linea(puntos[:1], 2) == {}